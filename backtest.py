@@ -3,6 +3,9 @@ import pandas as pd
 from pyrobot.robot import Robot
 from pyrobot.indicators import Indicators
 from pyrobot.strategies import Strategies
+from pyrobot.indicator_cache import IndicatorCache
+from pyrobot.walk_forward import WalkForward
+from pyrobot.monte_carlo import MonteCarlo
 
 # import yfinance as yf
 # data = yf.download(tickers="GC=F", period="5d", interval="15m")
@@ -40,13 +43,21 @@ historical_candles = trading_robot.grab_historical_candles(instrument_ids=[18],
 
 stock_frame = trading_robot.create_stock_frame(data=historical_candles)
 
-indicator_client = Indicators(price_data_frame=stock_frame)
+# Reuse the indicators of earlier runs on the same candles
+indicator_client = Indicators(price_data_frame=stock_frame, cache=IndicatorCache())
 
 strategies = Strategies(price_data_frame=stock_frame, indicator_client=indicator_client)
 strategies.supertrend_psar_indicators()
 
 # indicator_client.refresh()
 
+# walk_forward = WalkForward(price_data_frame=stock_frame, indicator_client=indicator_client, in_sample=2000, out_of_sample=500)
+# walk_forward.run(
+#   param_grid={'risk_ratio': ['1:1', '1.5:1', '2:1'], 'supertrend.multiplier': [2, 3, 4]},
+#   trading_budget=10000,
+#   workers=4
+# )
+
 # print(stock_frame.frame)
 
 # strategies.new_backtest_strategy(
@@ -59,4 +70,7 @@ strategies.new_backtest_strategy(
   trading_budget=10000,
   # leverage=20,
   multiple_trade=False
-)
\ No newline at end of file
+)
+
+# monte_carlo = MonteCarlo.from_ledger(ledger=strategies.trade_ledger, starting_equity=10000)
+# monte_carlo.run(paths=100000, method='bootstrap', workers=4)
@@ -1,15 +1,23 @@
 import time
+import asyncio
 import pprint
 import operator
 import threading
 import winsound
 
 from configparser import ConfigParser
-from threading import Thread
 
 from pyrobot.indicators import Indicators
 from pyrobot.strategies import Strategies
 from pyrobot.robot import Robot
+from pyrobot.paper_broker import PaperBroker
+from pyrobot.execution_service import ExecutionService
+from pyrobot.live_pipeline import LivePipeline
+from pyrobot.bar_aggregator import BarAggregator
+from pyrobot.bar_aggregator import read_tick_socket
+from pyrobot.checkpoint import Checkpoint
+from pyrobot.model_registry import ModelRegistry
+from pyrobot.inference_service import InferenceService
 
 # Grab configuration values.
 config = ConfigParser()
@@ -42,9 +50,15 @@ trading_robot = Robot(
   mode = 'virtual',
   multiple_trade = False,
   allocate_amount = 10000,
-  trading_size = 1
+  trading_size = 1,
+  # broker = PaperBroker(multiple_trade=False, allocate_amount=10000, trading_size=1),
+  # Build the bars from a tick feed, with the forming bar evaluated on every tick
+  # bar_aggregator = BarAggregator(period=period),
+  # intrabar = True,
 )
 
+# trading_robot.bar_aggregator.consume(ticks=read_tick_socket(host='127.0.0.1', port=9009))
+
 symbol_list = [
   'USDCAD',	'EURJPY',
   'EURUSD',	'EURCHF',
@@ -64,17 +78,48 @@ symbol_list = [
 # unwanted_instruments_ids = [8,9,13,46,48,53,54,56,59,61,62,68,83]
 # additional_instruments_ids = [18]
 
-historical_candles = trading_robot.grab_historical_candles(instrument_ids=[18], period=period)
-# historical_candles = trading_robot.grab_historical_candles(instrument_ids=[1, 2], period=period)
-# historical_candles = trading_robot.grab_historical_candles(instrument_ids=instruments_ids[:10], period=period)
-# historical_candles = trading_robot.grab_historical_candles(instrument_ids=instruments_ids, period=period)
+# Saved every 5 minutes, a restart resumes from it and only grabs the missed bars
+checkpoint = Checkpoint(path='.checkpoint', interval=300)
+
+stock_frame = trading_robot.resume_stock_frame(checkpoint=checkpoint)
+resumed = stock_frame is not None
+
+if not resumed:
+  historical_candles = trading_robot.grab_historical_candles(instrument_ids=[18], period=period)
+  # historical_candles = trading_robot.grab_historical_candles(instrument_ids=[1, 2], period=period)
+  # historical_candles = trading_robot.grab_historical_candles(instrument_ids=instruments_ids[:10], period=period)
+  # historical_candles = trading_robot.grab_historical_candles(instrument_ids=instruments_ids, period=period)
 
-stock_frame = trading_robot.create_stock_frame(data=historical_candles)
+  stock_frame = trading_robot.create_stock_frame(data=historical_candles)
 
 indicator_client = Indicators(price_data_frame=stock_frame)
 
 strategies = Strategies(price_data_frame=stock_frame, indicator_client=indicator_client)
-strategies.fractals_alligator()
+
+# The resumed frame holds the indicator columns, the first refresh of the loop adds the missed bars to them
+if not (resumed and checkpoint.restore_indicators(indicator_client=indicator_client, strategies=strategies)):
+  strategies.fractals_alligator()
+
+# Keep the frame flat, only the bars the indicators read back plus a margin
+stock_frame.set_retention(capacity=indicator_client.max_lookback() + 100)
+# stock_frame.set_retention(capacity=indicator_client.max_lookback() + 100, spill_path='stock_frame_spill.csv')
+
+# Score the latest bars with the model trained by predictor.py, kept loaded between bars
+# inference_service = InferenceService(registry=ModelRegistry(path='models'), name='lstm_close', stock_frame=stock_frame, indicator_client=indicator_client)
+
+# Execute the orders in the background, one lane per group of symbols
+if trade:
+  execution_service = ExecutionService(broker=trading_robot.etoro, lanes=4, order_timeout=60).start()
+
+# Or run the stages below as event bus subscribers, a slow WhatsApp API then never delays the signals
+# live_pipeline = LivePipeline(
+#   robot=trading_robot,
+#   indicator_client=indicator_client,
+#   strategies=strategies,
+#   execution_service=execution_service if trade else None,
+#   notify=signal_notification
+# )
+# asyncio.run(live_pipeline.run())
 
 while True:
 
@@ -95,6 +140,13 @@ while True:
   # Get signals.
   signals = strategies.get_strategy_signals()
 
+  # Time from the last tick to the signals, when the bars are built from ticks
+  if trading_robot.bar_aggregator is not None:
+    trading_robot.bar_aggregator.record_signal_latency()
+
+  # Get the predicted next closes.
+  # predictions = inference_service.predict()
+
   # Print out the signals
   # print(signals['buys'])
   # print(signals['sells'])
@@ -116,17 +168,14 @@ while True:
   # Execute Trades.
   if trade:
 
-    # Put signal and atr value into a dict for passing into the thread
-    args = {
-      'signals': signals
-    }
-
-    # Run the function in a thread
-    thread = Thread(
-      target = trading_robot.execute_signals, 
-      args = (args, )
-    )
-    thread.start()
+    # Queue the orders, closes run before opens of the same symbol
+    execution_service.submit_signals(signals=signals)
+
+    # Print the statistics once the orders of this bar are done
+    execution_service.print_history_records(timeout=60)
+
+  # Checkpoint the frame and the indicators.
+  checkpoint.save(stock_frame=stock_frame, indicator_client=indicator_client, strategies=strategies, force=False)
 
   # Grab the last bar time.
   last_bar_time = stock_frame.frame.tail(n=1).index.get_level_values(1).values[0]
@@ -0,0 +1,275 @@
+import ssl
+import gzip
+import json
+import zlib
+import time
+import queue
+import socket
+import threading
+import http.client
+
+from typing import Dict
+from typing import Tuple
+
+# Responses worth retrying, the request did not reach the API or it was overloaded
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Methods which are safe to send twice
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE')
+
+class Response():
+
+  """
+  A fully read HTTP response.
+
+  The body is read and decompressed before the connection goes back to the
+  pool, so the response can be used after the socket serves other requests.
+  """
+
+  def __init__(self, status: int, reason: str, headers: http.client.HTTPMessage, body: bytes) -> None:
+
+    self.status = status
+    self.reason = reason
+    self.headers = headers
+    self.body = body
+    self._data = None
+    self._parsed = False
+
+  def __repr__(self) -> str:
+    return '<Response [{status} {reason}]>'.format(status=self.status, reason=self.reason)
+
+  def read(self) -> bytes:
+    return self.body
+
+  @property
+  def data(self):
+    """The JSON body, `None` for an empty or a non JSON body."""
+
+    if not self._parsed:
+      self._parsed = True
+      try:
+        self._data = json.loads(self.body) if self.body else None
+      except ValueError:
+        self._data = None
+
+    return self._data
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+
+  """HTTPS connection resuming the last TLS session of its pool."""
+
+  def __init__(self, host: str, pool: 'ConnectionPool', **kwargs) -> None:
+
+    super().__init__(host, **kwargs)
+    self._pool = pool
+
+  def connect(self) -> None:
+
+    http.client.HTTPConnection.connect(self)
+
+    session = self._pool._tls_session
+    try:
+      self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host, session=session)
+    except ssl.SSLError:
+      if session is None:
+        raise
+      # The server refused the session, do a full handshake on a new socket
+      self._pool._tls_session = None
+      self.sock.close()
+      http.client.HTTPConnection.connect(self)
+      self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host)
+
+  def close(self) -> None:
+
+    # `getresponse` closes the connections the server asked to close, keep their session first
+    self.save_session()
+    super().close()
+
+  def save_session(self) -> None:
+    """Makes the TLS session of the connection the one new connections resume."""
+
+    if isinstance(self.sock, ssl.SSLSocket) and self.sock.session is not None:
+      self._pool._tls_session = self.sock.session
+
+
+class ConnectionPool():
+
+  """
+  Thread-safe pool of keep-alive HTTPS connections to one host.
+
+  Idle connections are reused last in, first out, new connections resume the
+  TLS session of the previous ones, failed requests are retried with an
+  exponential backoff and gzip/deflate bodies are decompressed.
+  """
+
+  def __init__(self, host: str, port: int = 443, maxsize: int = 10, timeout: float = 10.0, retries: int = 3,
+               backoff_factor: float = 0.5, context: ssl.SSLContext = None) -> None:
+    """Initalizes the connection pool.
+
+    Arguments:
+    ----
+    host {str} -- The host name, for example `api.etoro.com`.
+
+    port {int} -- The port. (default: {443})
+
+    maxsize {int} -- Maximum number of idle connections kept open. (default: {10})
+
+    timeout {float} -- Seconds to wait for connecting and for every read. (default: {10.0})
+
+    retries {int} -- Number of times a failed request is sent again. (default: {3})
+
+    backoff_factor {float} -- The retry `n` waits `backoff_factor * 2 ** (n - 1)` seconds. (default: {0.5})
+
+    context {ssl.SSLContext} -- The SSL context, defaults to the system trusted CAs. (default: {None})
+    """
+
+    self.host = host
+    self.port = port
+    self.timeout = timeout
+    self.retries = retries
+    self.backoff_factor = backoff_factor
+
+    self._context = context or ssl.create_default_context()
+    self._tls_session: ssl.SSLSession = None
+    self._idle = queue.LifoQueue(maxsize=maxsize)
+    self._lock = threading.Lock()
+    self._closed = False
+
+    self.statistics = {'requests': 0, 'connections': 0, 'reused': 0, 'retries': 0}
+
+  def request(self, method: str, url: str, body: bytes = None, headers: Dict[str, str] = None) -> Response:
+    """Sends a request and returns the fully read response.
+
+    Arguments:
+    ----
+    method {str} -- The HTTP method.
+
+    url {str} -- The path with the encoded query string.
+
+    body {bytes} -- The request body. (default: {None})
+
+    headers {Dict[str, str]} -- The request headers. (default: {None})
+
+    Returns:
+    ----
+    {Response} -- The response, responses with a retry status are returned after the last retry.
+    """
+
+    headers = dict(headers or {})
+    headers.setdefault('Accept-Encoding', 'gzip, deflate')
+    headers.setdefault('Connection', 'keep-alive')
+
+    retry = method.upper() in IDEMPOTENT_METHODS
+    attempt = 0
+
+    while True:
+
+      conn, reused = self._get_connection()
+
+      try:
+        conn.request(method, url, body=body, headers=headers)
+        response = conn.getresponse()
+        status, reason, response_headers = response.status, response.reason, response.headers
+        raw = response.read()
+
+      except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError, ssl.SSLEOFError) as error:
+        conn.close()
+
+        # The server closed an idle keep-alive connection, send again on a new one,
+        # unless the request may have been processed and is not safe to send twice
+        if reused and retry:
+          continue
+
+        attempt = self._backoff(attempt=attempt, retry=retry, error=error)
+        continue
+
+      except (http.client.HTTPException, socket.timeout, OSError) as error:
+        conn.close()
+        attempt = self._backoff(attempt=attempt, retry=retry, error=error)
+        continue
+
+      self._release(conn=conn, response=response)
+
+      with self._lock:
+        self.statistics['requests'] += 1
+
+      if status in RETRY_STATUSES and retry and attempt < self.retries:
+        attempt = self._backoff(attempt=attempt, retry=retry, error=None)
+        continue
+
+      return Response(
+        status=status,
+        reason=reason,
+        headers=response_headers,
+        body=self._decode(body=raw, encoding=response_headers.get('Content-Encoding'))
+      )
+
+  def close(self) -> None:
+    """Closes all the idle connections."""
+
+    self._closed = True
+
+    while True:
+      try:
+        self._idle.get_nowait().close()
+      except queue.Empty:
+        break
+
+  def _get_connection(self) -> Tuple[_HTTPSConnection, bool]:
+
+    try:
+      conn = self._idle.get_nowait()
+      with self._lock:
+        self.statistics['reused'] += 1
+      return conn, True
+    except queue.Empty:
+      pass
+
+    with self._lock:
+      self.statistics['connections'] += 1
+
+    conn = _HTTPSConnection(self.host, pool=self, port=self.port, timeout=self.timeout, context=self._context)
+    return conn, False
+
+  def _release(self, conn: _HTTPSConnection, response: http.client.HTTPResponse) -> None:
+
+    conn.save_session()
+
+    if self._closed or response.will_close or conn.sock is None:
+      conn.close()
+      return
+
+    try:
+      self._idle.put_nowait(conn)
+    except queue.Full:
+      conn.close()
+
+  def _backoff(self, attempt: int, retry: bool, error: Exception) -> int:
+
+    if error is not None and (not retry or attempt >= self.retries):
+      raise error
+
+    attempt += 1
+    with self._lock:
+      self.statistics['retries'] += 1
+
+    time.sleep(self.backoff_factor * 2 ** (attempt - 1))
+    return attempt
+
+  def _decode(self, body: bytes, encoding: str) -> bytes:
+
+    if not body or not encoding:
+      return body
+
+    encoding = encoding.lower()
+    if encoding == 'gzip':
+      return gzip.decompress(body)
+    if encoding == 'deflate':
+      try:
+        return zlib.decompress(body)
+      except zlib.error:
+        # Raw deflate stream without the zlib header
+        return zlib.decompress(body, -zlib.MAX_WBITS)
+
+    return body
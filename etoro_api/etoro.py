@@ -4,14 +4,19 @@ import time
 import json
 import pprint
 import requests
+import numpy as np
 
 from datetime import datetime
 from selenium import webdriver
 from configparser import ConfigParser
 from typing import List
 from typing import Dict
+from typing import Union
 from dataclasses import dataclass
 
+from pyrobot.candle_decoder import decode_candles
+from pyrobot.candle_decoder import concat_candles
+
 # Grab configuration values.
 config = ConfigParser()
 config.read("config/config.ini")
@@ -188,8 +193,9 @@ class Etoro():
 
     return instruments_metadata
 
-  def grab_historical_candles(self, instrument_ids: List[int], period: str) -> List[dict]:
-    
+  def grab_historical_candles(self, instrument_ids: List[int], period: str, columnar: bool = False) -> Union[List[dict], Dict[str, np.ndarray]]:
+    """Grabs the last 500 candles of the instruments, as typed arrays when `columnar` is set."""
+
     self.instrument_ids = instrument_ids
 
     period_list = {
@@ -216,6 +222,10 @@ class Etoro():
       )
       res = requests.get(url)
 
+      if columnar:
+        historical_candles.append(decode_candles(body=res.content, instrument_id=instrument_id))
+        continue
+
       candles = json.loads(res.text.lower())["candles"][0]["candles"]
 
       # get symbol by the instrument id
@@ -227,5 +237,8 @@ class Etoro():
       #   candle["instrumentid"] = str(candle["instrumentid"]) + ' - ' + symbol
 
       historical_candles.extend(candles)
-      
+
+    if columnar:
+      return concat_candles(candles=historical_candles)
+
     return historical_candles
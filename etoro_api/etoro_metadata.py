@@ -1,10 +1,65 @@
+from typing import List
+
 from etoro_api.rest_api import RESTAPIs
+from etoro_api.response_cache import ResponseCache
 
 class Metadata():
   """The metadata API provides basic meta data for the eToro system. The metadata is comprised of reference tables for all the other end-points in this API"""
 
-  def __init__(self):
+  def __init__(self, cache: ResponseCache = None):
+    """Initalizes the metadata API.
+
+    Arguments:
+    ----
+    cache {ResponseCache} -- Cache of the reference tables, defaults to a cache
+        in the `.etoro_cache` folder. (default: {None})
+    """
+
     self.call_api = RESTAPIs()
+    self.cache = cache if cache is not None else ResponseCache()
+
+  def _get(self, url: str, query_params: dict = None):
+    """Returns the response data of the endpoint, from the cache while it is fresh."""
+
+    key = self.cache.key(url=url, query_params=query_params)
+    entry = self.cache.get(key)
+
+    if entry is not None and self.cache.is_fresh(entry=entry, url=url):
+      self.cache.hits += 1
+      return entry['data']
+
+    try:
+      res = self.call_api.GET(
+        url=url,
+        query_params=query_params,
+        headers=self.cache.conditional_headers(entry=entry)
+      )
+    except Exception:
+      # Serve the stale table rather than failing while the API is unreachable
+      if entry is not None:
+        return entry['data']
+      raise
+
+    # Not modified since it was cached
+    if res.status == 304 and entry is not None:
+      self.cache.revalidated += 1
+      return self.cache.touch(key=key, entry=entry)['data']
+
+    if res.status == 200:
+      data = res.data
+    else:
+      raise SystemExit(res.reason)
+
+    self.cache.misses += 1
+    self.cache.set(
+      key=key,
+      url=url,
+      data=data,
+      etag=res.headers.get('ETag'),
+      last_modified=res.headers.get('Last-Modified')
+    )
+
+    return data
   
   def get_asset_classes(self) -> List[dict]:  
     """Returns the asset classes of the system
@@ -25,17 +80,10 @@ class Metadata():
     ]
     """
 
-    res = self.call_api.GET(
+    return self._get(
       url="/Metadata/V1/AssetClasses",
     )
 
-    if res.status == 200:
-      data = res.read()
-    else:
-      raise SystemExit(res.reason)
-
-    return data
-
   def get_candle_periods(self) -> List[dict]:  
     """Returns the intervals in which you may retrieve historical price candles
 
@@ -55,17 +103,10 @@ class Metadata():
     ]
     """
 
-    res = self.call_api.GET(
+    return self._get(
       url="/Metadata/V1/CandlePeriod",
     )
 
-    if res.status == 200:
-      data = res.read()
-    else:
-      raise SystemExit(res.reason)
-
-    return data
-
   def get_countries(self) -> List[dict]:  
     """Returns a vector of all countries recognized in the system. Each member contains an internal country id, it's name and its abbreviation
 
@@ -92,17 +133,10 @@ class Metadata():
     ]
     """
 
-    res = self.call_api.GET(
+    return self._get(
       url="/Metadata/V1/Countries",
     )
 
-    if res.status == 200:
-      data = res.read()
-    else:
-      raise SystemExit(res.reason)
-
-    return data
-
   def get_exchanges(self) -> List[dict]:  
     """Returns a vector of all the exchanges defined in the system.
 
@@ -122,17 +156,10 @@ class Metadata():
     ]
     """
 
-    res = self.call_api.GET(
+    return self._get(
       url="/Metadata/V1/Exchanges",
     )
 
-    if res.status == 200:
-      data = res.read()
-    else:
-      raise SystemExit(res.reason)
-
-    return data
-
   def get_instruments(self, InstrumentIds: str=None) -> List[dict]:  
     """Returns the instruments which are defined in the system.
 
@@ -165,18 +192,11 @@ class Metadata():
     ]
     """
 
-    res = self.call_api.GET(
+    return self._get(
       url="/Metadata/V1/Instruments",
-      query_params=InstrumentIds
+      query_params={'InstrumentIds': InstrumentIds}
     )
 
-    if res.status == 200:
-      data = res.read()
-    else:
-      raise SystemExit(res.reason)
-
-    return data
-
   def get_sectors(self) -> List[dict]:  
     """Returns a vector of all the stock sectors in the system
 
@@ -196,17 +216,10 @@ class Metadata():
     ]
     """
 
-    res = self.call_api.GET(
+    return self._get(
       url="/Metadata/V1/Sectors",
     )
 
-    if res.status == 200:
-      data = res.read()
-    else:
-      raise SystemExit(res.reason)
-
-    return data
-
   def get_stats_periods(self) -> List[dict]:  
     """Returns the predefined periods used for aggregate data
 
@@ -226,13 +239,6 @@ class Metadata():
     ]
     """
 
-    res = self.call_api.GET(
+    return self._get(
       url="/Metadata/V1/StatsPeriods",
-    )
-
-    if res.status == 200:
-      data = res.read()
-    else:
-      raise SystemExit(res.reason)
-
-    return data
\ No newline at end of file
+    )
\ No newline at end of file
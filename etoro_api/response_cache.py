@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from typing import Any
+from typing import Dict
+
+from pyrobot.file_utils import atomic_write
+
+# Seconds a cached response is served without asking the API
+DEFAULT_TTLS = {
+  '/Metadata/V1/AssetClasses': 7 * 24 * 3600,
+  '/Metadata/V1/CandlePeriod': 30 * 24 * 3600,
+  '/Metadata/V1/Countries': 30 * 24 * 3600,
+  '/Metadata/V1/Exchanges': 7 * 24 * 3600,
+  '/Metadata/V1/Instruments': 24 * 3600,
+  '/Metadata/V1/Sectors': 30 * 24 * 3600,
+  '/Metadata/V1/StatsPeriods': 3600,
+  'https://api.etorostatic.com/sapi/instrumentsmetadata/V1.1/instruments': 24 * 3600,
+}
+
+class ResponseCache():
+
+  """
+  Cache of JSON API responses for slowly changing reference data.
+
+  Entries live in memory and in one JSON file per request on disk, so a cold
+  start reads them from disk without any request. Each endpoint has its own
+  time to live, once it is over the entry is revalidated with a conditional
+  request (`If-None-Match` / `If-Modified-Since`) and only downloaded again
+  when it changed.
+  """
+
+  def __init__(self, path: str = '.etoro_cache', ttls: Dict[str, float] = None, default_ttl: float = 3600) -> None:
+    """Initalizes the response cache.
+
+    Arguments:
+    ----
+    path {str} -- Folder of the on-disk store, `None` to only cache in memory. (default: {'.etoro_cache'})
+
+    ttls {Dict[str, float]} -- Seconds to live per endpoint path, merged over `DEFAULT_TTLS`. (default: {None})
+
+    default_ttl {float} -- Seconds to live of the endpoints not in `ttls`. (default: {3600})
+    """
+
+    self._path = path
+    self._ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+    self._default_ttl = default_ttl
+    self._memory: Dict[str, dict] = {}
+    self._lock = threading.Lock()
+
+    self.hits = 0
+    self.revalidated = 0
+    self.misses = 0
+
+    if self._path:
+      os.makedirs(self._path, exist_ok=True)
+
+  def key(self, url: str, query_params: dict = None) -> str:
+
+    params = sorted((query_params or {}).items())
+    return hashlib.blake2b(repr((url, params)).encode(), digest_size=16).hexdigest()
+
+  def ttl(self, url: str) -> float:
+    return self._ttls.get(url, self._default_ttl)
+
+  def get(self, key: str) -> dict:
+    """Returns the cached entry, fresh or not, or `None` if the key is not cached."""
+
+    with self._lock:
+      entry = self._memory.get(key)
+
+    if entry is None and self._path:
+      try:
+        with open(os.path.join(self._path, key + '.json'), 'r') as cache_file:
+          entry = json.load(cache_file)
+      except (OSError, ValueError):
+        entry = None
+
+      if entry is not None:
+        with self._lock:
+          self._memory[key] = entry
+
+    return entry
+
+  def is_fresh(self, entry: dict, url: str) -> bool:
+    return time.time() - entry['fetched'] < self.ttl(url)
+
+  def conditional_headers(self, entry: dict) -> Dict[str, str]:
+    """Returns the headers asking the API to only send the response if it changed."""
+
+    headers = {}
+
+    if entry is None:
+      return headers
+
+    if entry.get('etag'):
+      headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+      headers['If-Modified-Since'] = entry['last_modified']
+
+    return headers
+
+  def set(self, key: str, url: str, data: Any, etag: str = None, last_modified: str = None) -> dict:
+
+    entry = {
+      'url': url,
+      'data': data,
+      'etag': etag,
+      'last_modified': last_modified,
+      'fetched': time.time(),
+    }
+
+    self._store(key=key, entry=entry)
+    return entry
+
+  def touch(self, key: str, entry: dict) -> dict:
+    """Marks an entry as fresh again, after the API answered it did not change."""
+
+    entry = dict(entry, fetched=time.time())
+    self._store(key=key, entry=entry)
+    return entry
+
+  def clear(self) -> None:
+
+    with self._lock:
+      self._memory.clear()
+
+    if self._path:
+      for file_name in os.listdir(self._path):
+        if file_name.endswith('.json'):
+          os.remove(os.path.join(self._path, file_name))
+
+  def _store(self, key: str, entry: dict) -> None:
+
+    with self._lock:
+      self._memory[key] = entry
+
+    if self._path:
+
+      with atomic_write(os.path.join(self._path, key + '.json')) as cache_file:
+        json.dump(entry, cache_file)
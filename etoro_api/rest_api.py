@@ -1,53 +1,79 @@
 import json
-import http.client
+import threading
 
+from urllib.parse import urlencode
 from configparser import ConfigParser
 
+from typing import Dict
+
+from etoro_api.connection_pool import ConnectionPool
+from etoro_api.connection_pool import Response
+
 # Grab configuration values.
 config = ConfigParser()
 config.read("config/config.ini")
 
 SUBSCRIPTION_KEY = config.get("main", "subscription_key")
 
+# One pool per host, shared by every RESTAPIs instance
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(host: str, **kwargs) -> ConnectionPool:
+  """Returns the shared connection pool of the host, `kwargs` are used when the pool is created."""
+
+  with _pools_lock:
+    if host not in _pools:
+      _pools[host] = ConnectionPool(host=host, **kwargs)
+    return _pools[host]
+
 class RESTAPIs():
 
-  def __init__(self):
+  def __init__(self, host: str = 'api.etoro.com', timeout: float = 10.0, retries: int = 3, pool_size: int = 10, **kwargs):
     self.subscription_key = SUBSCRIPTION_KEY
+    self.pool = get_pool(host=host, timeout=timeout, retries=retries, maxsize=pool_size, **kwargs)
 
-  def request(self, method: str, url: str, query_params=None, headers={}, body=None):
+  def request(self, method: str, url: str, query_params=None, headers=None, body=None) -> Response:
 
     # check request method
     method = method.upper()
     assert method in ['GET', 'POST', 'PUT', 'DELETE']
 
-    headers = {
+    request_headers = {
       'Ocp-Apim-Subscription-Key': self.subscription_key,
+      'Accept': 'application/json',
     }
+    request_headers.update(headers or {})
 
-    params = json.dumps(query_params)
+    # Drop the unset params, the API reads missing and empty params differently
+    if query_params:
+      params = urlencode({key: value for key, value in query_params.items() if value is not None}, doseq=True)
+      if params:
+        url = "{url}?{params}".format(url=url, params=params)
+
+    if body is not None and not isinstance(body, (bytes, str)):
+      body = json.dumps(body)
+      request_headers.setdefault('Content-Type', 'application/json')
 
     try:
-      conn = http.client.HTTPSConnection('api.etoro.com')
-      conn.request(method, "{url}?%s" % params, "{body}", headers)
-      response = conn.getresponse()
-      conn.close()
+      response = self.pool.request(method, url, body=body, headers=request_headers)
     except Exception as e:
-      print("[Errno {0}] {1}".format(e.errno, e.strerror))
-      response = e.strerror
-    
+      print("Unable to request {method} {url} due to ==> {error}".format(method=method, url=url, error=e))
+      raise
+
     return response
 
   def GET(self, url, headers=None, query_params=None):
     return self.request(
-      method="GET", 
+      method="GET",
       url=url,
       query_params=query_params,
       headers=headers,
     )
-  
+
   def POST(self, url, headers=None, query_params=None, body=None):
     return self.request(
-      method="POST", 
+      method="POST",
       url=url,
       query_params=query_params,
       body=body,
@@ -56,7 +82,7 @@ class RESTAPIs():
 
   def PUT(self, url, headers=None, query_params=None, body=None):
     return self.request(
-      method="PUT", 
+      method="PUT",
       url=url,
       query_params=query_params,
       body=body,
@@ -65,9 +91,9 @@ class RESTAPIs():
 
   def DELETE(self, url, headers=None, query_params=None, body=None):
     return self.request(
-      method="DELETE", 
+      method="DELETE",
       url=url,
       query_params=query_params,
       body=body,
       headers=headers,
-  )
\ No newline at end of file
+  )
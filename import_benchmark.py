@@ -0,0 +1,54 @@
+import sys
+import subprocess
+
+# Cold start of the modules the backtest and research scripts import
+modules = [
+  'pyrobot.stock_frame',
+  'pyrobot.indicators',
+  'pyrobot.strategies',
+  'pyrobot.robot',
+  'pyrobot.backtest_engine',
+]
+
+# Backends only the live trading imports, and numba which the scans compile with on first use
+optional_modules = ['selenium', 'twilio', 'numba', 'pyrobot.etoro_prototype', 'pyrobot.twilio_whatsapp']
+
+runs = 5
+
+script = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(name for name in {optional_modules} if name in sys.modules))
+'''
+
+print("=" * 100)
+print('Import Benchmark, best of {runs} fresh interpreters'.format(runs=runs))
+print("=" * 100)
+print('{:<30}{:>16}   {}'.format('Module', 'Import (ms)', 'Optional backends imported'))
+print("-" * 100)
+
+for module in modules:
+
+  timings = []
+  loaded = ''
+
+  for _ in range(runs):
+    output = subprocess.run(
+      [sys.executable, '-c', script.format(module=module, optional_modules=optional_modules)],
+      capture_output=True,
+      text=True
+    )
+
+    if output.returncode != 0:
+      loaded = 'Unable to import due to ==> {error}'.format(error=output.stderr.strip().splitlines()[-1])
+      break
+
+    elapsed, _, loaded = output.stdout.strip().partition(' ')
+    timings.append(float(elapsed) * 1000)
+
+  best = round(min(timings), 1) if timings else '-'
+  print('{:<30}{:>16}   {}'.format(module, best, loaded or '-'))
+
+print("-" * 100)
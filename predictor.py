@@ -4,7 +4,6 @@ import pandas as pd
 import pandas_datareader as web
 import datetime as dt
 
-from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, Dropout, LSTM
 
@@ -17,7 +16,11 @@ currency = 'BTC-USD'
 # print(data)
 
 from configparser import ConfigParser
-from robot import Robot
+from pyrobot.robot import Robot
+from pyrobot.indicators import Indicators
+from pyrobot.dataset import WindowDataset
+from pyrobot.features import FeaturePipeline
+from pyrobot.model_registry import ModelRegistry
 
 config = ConfigParser()
 config.read("config/config.ini")
@@ -34,43 +37,54 @@ trading_robot = Robot(
   mode = 'virtual'
 )
 
-instruments_ids = trading_robot.get_instruments_ids(instrument_type='currencies')
+instruments_ids = trading_robot.get_instruments_ids_by_type(instrument_type='currencies')
 
 historical_candles = trading_robot.grab_historical_candles(instrument_ids=[1], period=period)
 
 stock_frame = trading_robot.create_stock_frame(data=historical_candles)
 
-data = stock_frame._frame
-
-# prepare data
-scaler = MinMaxScaler(feature_range=(0,1))
-scaled_data = scaler.fit_transform(data['close'].values.reshape(-1,1))
+data = stock_frame.frame
 
 prediction_days = 160
 
-x_train = []
-y_train = []
+# prepare data, the windows are views on the scaled closes
+dataset = WindowDataset(stock_frame=stock_frame, features=['close'], target='close', window=prediction_days)
+
+# Or train on indicator features, built once and then served from the feature cache
+# feature_pipeline = FeaturePipeline(steps=[('rsi', {'period': 14}), ('macd', {}), ('average_true_range', {'period': 14})])
+# feature_set = feature_pipeline.build(stock_frame=stock_frame)
+# dataset = feature_set.dataset(target='close', window=prediction_days)
+batch_size = 32
+
+# Trained models are kept with their scaler, later runs and the live loop load them
+model_registry = ModelRegistry(path='models')
+model_name = 'lstm_close'
+retrain = False
+
+if retrain or model_registry.latest(name=model_name) is None:
+
+  # build model
+  model = Sequential()
 
-for x in range(prediction_days, len(scaled_data)):
-  x_train.append(scaled_data[x-prediction_days:x, 0])
-  y_train.append(scaled_data[x, 0])
+  model.add(LSTM(units=50, return_sequences=True, input_shape=dataset.shape[1:]))
+  model.add(Dropout(0.2))
+  model.add(LSTM(units=50, return_sequences=True))
+  model.add(Dropout(0.2))
+  model.add(LSTM(units=50))
+  model.add(Dropout(0.2))
+  model.add(Dense(units=1)) # Prediction of the next closing
 
-x_train, y_train = np.array(x_train), np.array(y_train)
-x_train = np.reshape(x_train, (x_train.shape[0], x_train.shape[1], 1))
+  model.compile(optimizer='adam', loss='mean_squared_error')
+  model.fit(dataset.batches(batch_size=batch_size, repeat=True), steps_per_epoch=dataset.steps(batch_size=batch_size), epochs=25)
 
-# build model
-model = Sequential()
+  model_registry.save(name=model_name, model=model, scaler=dataset.scaler(), metadata={'period': period, 'instrument_ids': [1]})
 
-model.add(LSTM(units=50, return_sequences=True, input_shape=(x_train.shape[1], 1)))
-model.add(Dropout(0.2))
-model.add(LSTM(units=50, return_sequences=True))
-model.add(Dropout(0.2))
-model.add(LSTM(units=50))
-model.add(Dropout(0.2))
-model.add(Dense(units=1)) # Prediction of the next closing
+else:
+  model, model_meta = model_registry.load(name=model_name)
 
-model.compile(optimizer='adam', loss='mean_squared_error')
-model.fit(x_train, y_train, epochs=25, batch_size=32)
+  # Score with the scaler of the training run, the min and max of these candles differ, and so may the features
+  dataset = WindowDataset.from_scaler(stock_frame=stock_frame, scaler=model_meta['scaler'],
+                                      indicator_client=Indicators(price_data_frame=stock_frame))
 
 # Test the model accuracy on existing data
 test_start = dt.datetime(2020,1,1)
@@ -80,23 +94,12 @@ test_end = dt.datetime.now()
 test_data = data
 actual_prices = test_data['close'].values
 
-total_dataset = pd.concat((data['close'], test_data['close']), axis=0)
-
-model_inputs = total_dataset[len(total_dataset) - len(test_data) - prediction_days:].values
-model_inputs = model_inputs.reshape(-1, 1)
-model_inputs = scaler.transform(model_inputs)
-
 # make prediction on test data
-x_test = []
-
-for x in range(prediction_days, len(model_inputs)):
-  x_test.append(model_inputs[x-prediction_days:x, 0])
-
-x_test = np.array(x_test)
-x_test = np.reshape(x_test, (x_test.shape[0], x_test.shape[1], 1))
+predicted_prices = model.predict(dataset.batches(batch_size=batch_size, shuffle=False, targets=False), steps=dataset.steps(batch_size=batch_size))
+predicted_prices = dataset.inverse_transform(predicted_prices)
 
-predicted_prices = model.predict(x_test)
-predicted_prices = scaler.inverse_transform(predicted_prices)
+# the first window predicts the close after the window bars
+actual_prices = actual_prices[dataset.shape[1]:]
 
 # plot the test predictions
 plt.plot(actual_prices, color='black', label=f"Actual {currency} Price")
@@ -108,10 +111,8 @@ plt.legend()
 plt.show()
 
 # predict the next close price
-real_data = [model_inputs[len(model_inputs) + 1 - prediction_days:len(model_inputs+1), 0]]
-real_data = np.array(real_data)
-real_data = np.reshape(real_data, (real_data.shape[0], real_data.shape[1], 1))
+real_data = dataset.last_window(instrument=dataset.instruments[0])
 
 prediction = model.predict(real_data)
-prediction = scaler.inverse_transform(prediction)
-print(f"Prediction: {prediction}")
\ No newline at end of file
+prediction = dataset.inverse_transform(prediction)
+print(f"Prediction: {prediction}")
@@ -0,0 +1,521 @@
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from pyrobot.shared_arrays import SharedArrays
+from pyrobot.shared_arrays import attach
+
+# Signal codes used by the array kernels
+NO_SIGNAL = 0
+BUY = 1
+SELL = 2
+OTHER = 3
+
+NO_STOP = 0
+STOP = 1
+BUY_STOP = 2
+SELL_STOP = 3
+OTHER_STOP = 4
+
+SIDES = {BUY: 'buy', SELL: 'sell'}
+
+def encode_signals(values: np.ndarray) -> np.ndarray:
+  """Encodes the `signal` column ('-', 'buy', 'sell') into int8 codes."""
+
+  values = np.asarray(values, dtype=object)
+  codes = np.full(len(values), OTHER, dtype=np.int8)
+  codes[values == '-'] = NO_SIGNAL
+  codes[values == 'buy'] = BUY
+  codes[values == 'sell'] = SELL
+
+  return codes
+
+def encode_stop_signals(values: np.ndarray) -> np.ndarray:
+  """Encodes the `stop_signal` column ('-', 'stop', 'buy_stop', 'sell_stop') into int8 codes."""
+
+  values = np.asarray(values, dtype=object)
+  codes = np.full(len(values), OTHER_STOP, dtype=np.int8)
+  codes[values == '-'] = NO_STOP
+  codes[values == 'stop'] = STOP
+  codes[values == 'buy_stop'] = BUY_STOP
+  codes[values == 'sell_stop'] = SELL_STOP
+
+  return codes
+
+def to_prices(values: pd.Series) -> np.ndarray:
+  """Converts a price column that may hold '-' placeholders into float64 (NaN for '-')."""
+
+  return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+
+def prepare_new_backtest_arrays(symbol_groups, warmup: int = 14) -> Tuple[Dict[str, np.ndarray], List[Tuple[str, int, int]], np.ndarray]:
+  """Builds the concatenated arrays used by `new_backtest_symbol`.
+
+  Every group gets its signals moved to the next row and the first `warmup`
+  rows removed, exactly like `Strategies.new_backtest_strategy` does.
+
+  Returns:
+  ----
+  {Tuple} -- The arrays, the `(symbol, start, stop)` slice of each symbol and
+      the candle time of every row.
+  """
+
+  columns = {name: [] for name in ['open', 'high', 'low', 'signal', 'stop_signal', 'stop_loss', 'take_profit', 'atr']}
+  times = []
+  tasks = []
+  start = 0
+
+  for symbol, group in symbol_groups:
+
+    signal = group['signal'].shift(1)
+    stop_loss = to_prices(group['stop_loss'].shift(1)) if 'stop_loss' in group else np.zeros(len(group))
+    take_profit = to_prices(group['take_profit'].shift(1)) if 'take_profit' in group else np.zeros(len(group))
+    stop_signal = group['stop_signal'].shift(1) if 'stop_signal' in group else pd.Series('-', index=group.index)
+    atr = group['atr'].shift(1).to_numpy(dtype=np.float64) if 'atr' in group else np.zeros(len(group))
+
+    # Remove the first rows due to no signal
+    rows = slice(warmup, None)
+
+    columns['open'].append(group['open'].to_numpy(dtype=np.float64)[rows])
+    columns['high'].append(group['high'].to_numpy(dtype=np.float64)[rows])
+    columns['low'].append(group['low'].to_numpy(dtype=np.float64)[rows])
+    columns['signal'].append(encode_signals(signal.to_numpy())[rows])
+    columns['stop_signal'].append(encode_stop_signals(stop_signal.to_numpy())[rows])
+    columns['stop_loss'].append(stop_loss[rows])
+    columns['take_profit'].append(take_profit[rows])
+    columns['atr'].append(atr[rows])
+    times.append(group.index.get_level_values(1).to_numpy()[rows])
+
+    stop = start + len(columns['open'][-1])
+    tasks.append((symbol, start, stop))
+    start = stop
+
+  arrays = {}
+  for name, parts in columns.items():
+    dtype = np.int8 if name in ('signal', 'stop_signal') else np.float64
+    arrays[name] = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+  times = np.concatenate(times) if times else np.empty(0, dtype=object)
+
+  return arrays, tasks, times
+
+def new_backtest_symbol(arrays: Dict[str, np.ndarray], start: int, stop: int, trading_budget: float, leverage: float,
+                        multiple_trade: bool, earn_ratio: float, loss_ratio: float, verbose: bool = False) -> Dict[str, Any]:
+  """Simulates the positions of one symbol, see `Strategies.new_backtest_strategy`.
+
+  Candle times are represented by their row number, the caller maps them back
+  to the `fromdate` of the frame.
+  """
+
+  opens        = arrays['open'][start:stop].tolist()
+  highs        = arrays['high'][start:stop].tolist()
+  lows         = arrays['low'][start:stop].tolist()
+  signals      = arrays['signal'][start:stop].tolist()
+  stop_signals = arrays['stop_signal'][start:stop].tolist()
+  stop_losses  = arrays['stop_loss'][start:stop].tolist()
+  take_profits = arrays['take_profit'][start:stop].tolist()
+  atrs         = arrays['atr'][start:stop].tolist()
+
+  # Create result dict of this symbol
+  result = {}
+  result['open'] = 1
+  result['miss'] = 0
+  result['multi'] = 0
+  result['highest'] = 0
+  result['win'] = 0
+  result['loss'] = 0
+  result['profit/loss'] = 0
+  result['open/close'] = 0
+  result['earn'] = 0
+  result['lost'] = 0
+  result['win/loss'] = 0
+  result['remain'] = 0
+
+  # Closed trades: (entry row, exit row, side, entry price, exit price, units, pnl, equity)
+  trades = []
+
+  # Printed lines: (entry row, exit row, side, pnl)
+  log = []
+
+  # Create positions slot
+  positions = []
+  ongoing_trading_budget = trading_budget
+
+  # For each row / candle
+  for i in range(stop - start):
+
+    signal = signals[i]
+
+    # Skip this candle is no signal and opened positions
+    if signal == NO_SIGNAL and not positions:
+      continue
+
+    open_trade = False
+
+    # Check signal
+    if signal != NO_SIGNAL:
+
+      open_trade = True
+
+      # Check able multiple trade and have opened position
+      if not multiple_trade and len(positions) > 0:
+
+        open_trade = False
+        result['miss'] += 1
+
+    # If positions not empty
+    if positions:
+
+      current_high = highs[i]
+      current_low  = lows[i]
+
+      # Get the highest record of opened positions number
+      if len(positions) > result['highest']:
+        result['highest'] = len(positions)
+
+      # For each position opened
+      for position in positions:
+
+        # Check conditions
+        win = False
+        loss = False
+        profit_loss = 0
+        exit_price = 0
+
+        # Win
+        if current_low < position['tp'] < current_high:
+          result['profit/loss']  += abs((position['open'] - position['tp']) * position['units_1'])
+          ongoing_trading_budget += abs((position['open'] - position['tp']) * position['units_2'])
+          result['win'] += 1
+          result['earn'] += abs((position['open'] - position['tp']) * position['units_1'])
+          profit_loss = abs((position['open'] - position['tp']) * position['units_1'])
+          exit_price = position['tp']
+          win = True
+
+        # Loss
+        if current_low < position['sl'] < current_high:
+          result['profit/loss']  -= abs((position['open'] - position['sl']) * position['units_1'])
+          ongoing_trading_budget -= abs((position['open'] - position['sl']) * position['units_2'])
+          result['loss'] += 1
+          result['lost'] -= abs((position['open'] - position['sl']) * position['units_1'])
+          profit_loss = -abs((position['open'] - position['sl']) * position['units_1'])
+          exit_price = position['sl']
+          loss = True
+
+        # Both win and loss met
+        if win & loss:
+          result['win/loss'] += 1
+
+        # Win or loss met
+        if win | loss:
+
+          if verbose:
+            log.append((position['row'], start + i, position['action'], profit_loss))
+
+          trades.append((position['row'], start + i, position['action'], position['open'], exit_price,
+                         position['units_1'], profit_loss, ongoing_trading_budget))
+
+          # Check does the position open and close in the same candle
+          if position['row'] == start + i:
+            result['open/close'] += 1
+
+          # Remove (close) the position in positions
+          positions.remove(position)
+
+    # Check stop signal
+    stop_signal = stop_signals[i]
+    if stop_signal != NO_STOP and positions:
+
+      current_open = opens[i]
+
+      # For each position opened
+      for position in positions:
+
+        closed = False
+        profit_loss = 0
+
+        if position['action'] == BUY and (stop_signal == BUY_STOP or stop_signal == STOP):
+
+          profit_loss = (current_open - position['open']) * position['units_1']
+          ongoing_trading_budget += (current_open - position['open']) * position['units_2']
+          result['profit/loss'] += profit_loss
+          closed = True
+
+        if position['action'] == SELL and (stop_signal == SELL_STOP or stop_signal == STOP):
+
+          profit_loss = (position['open'] - current_open) * position['units_1']
+          ongoing_trading_budget += (position['open'] - current_open) * position['units_2']
+          result['profit/loss'] += profit_loss
+          closed = True
+
+        if profit_loss > 0:
+          result['earn'] += profit_loss
+        else:
+          result['lost'] += profit_loss
+
+        if verbose:
+          log.append((position['row'], start + i, position['action'], profit_loss))
+
+        # Remove (close) the position in positions
+        if closed:
+
+          trades.append((position['row'], start + i, position['action'], position['open'], current_open,
+                         position['units_1'], profit_loss, ongoing_trading_budget))
+
+          # Check does the position open and close in the same candle
+          if position['row'] == start + i:
+            result['open/close'] += 1
+
+          # Check profit loss
+          if profit_loss > 0:
+            result['win'] += 1
+          else:
+            result['loss'] += 1
+          positions.remove(position)
+
+    # Open position
+    if open_trade:
+
+      # Create position
+      position = {}
+      position['row'] = start + i
+      position['action'] = signal
+      position['open'] = opens[i]
+      position['units_1'] = trading_budget * leverage / opens[i]
+      position['units_2'] = ongoing_trading_budget * leverage / opens[i]
+
+      take_profit = take_profits[i]
+      stop_loss = stop_losses[i]
+      atr = atrs[i]
+
+      # Set take profit and stop loss
+      if position['action'] == BUY:
+        if take_profit == 0 and atr:
+          take_profit = opens[i] + (atr * earn_ratio)
+        if stop_loss == 0 and atr:
+          stop_loss = opens[i] - (atr * loss_ratio)
+      else:
+        if take_profit == 0 and atr:
+          take_profit = opens[i] - (atr * earn_ratio)
+        if stop_loss == 0 and atr:
+          stop_loss = opens[i] + (atr * loss_ratio)
+
+      position['tp'] = float(take_profit)
+      position['sl'] = float(stop_loss)
+
+      # Add position to positions
+      positions.append(position)
+      result['open'] += 1
+
+      # Position opened when there are other opened positions
+      if len(positions) > 1:
+        result['multi'] += 1
+
+  # The remain positions havent close yet
+  result['remain'] += int(len(positions))
+
+  return {
+    'result': result,
+    'equity': ongoing_trading_budget,
+    'trades': trades,
+    'log': log,
+  }
+
+def prepare_grid_backtest_arrays(symbol_groups) -> Tuple[Dict[str, np.ndarray], List[Tuple[str, int, int]]]:
+  """Builds the concatenated arrays used by `grid_backtest_symbol`."""
+
+  columns = {name: [] for name in ['open', 'high', 'low', 'signal', 'atr']}
+  tasks = []
+  start = 0
+
+  for symbol, group in symbol_groups:
+
+    columns['open'].append(group['open'].to_numpy(dtype=np.float64))
+    columns['high'].append(group['high'].to_numpy(dtype=np.float64))
+    columns['low'].append(group['low'].to_numpy(dtype=np.float64))
+    columns['signal'].append(encode_signals(group['signal'].to_numpy()))
+    columns['atr'].append(group['atr'].to_numpy(dtype=np.float64) if 'atr' in group else np.zeros(len(group)))
+
+    stop = start + len(group)
+    tasks.append((symbol, start, stop))
+    start = stop
+
+  arrays = {}
+  for name, parts in columns.items():
+    dtype = np.int8 if name == 'signal' else np.float64
+    arrays[name] = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+  return arrays, tasks
+
+def grid_backtest_symbol(arrays: Dict[str, np.ndarray], start: int, stop: int, multiple_trade: bool, atr: bool) -> Dict[Tuple[int, int], Dict[str, int]]:
+  """Counts the wins and losses of one symbol for every earn / loss ratio, see `Strategies.backtest_strategy`."""
+
+  opens   = arrays['open'][start:stop].tolist()
+  highs   = arrays['high'][start:stop].tolist()
+  lows    = arrays['low'][start:stop].tolist()
+  signals = arrays['signal'][start:stop].tolist()
+  atrs    = arrays['atr'][start:stop].tolist()
+
+  results = {}
+
+  # For each earn pct
+  for i in range(1, 10): # from 1.001 to 1.009
+
+    # For each loss pct
+    for j in range(1, 10):
+
+      # Set profit and loss percentage
+      if atr:
+        earn_ratio = 1 + ((i - 1))
+        loss_ratio = 1 + ((j - 1))
+      else:
+        earn_ratio = 1 + (i / 1000)
+        loss_ratio = 1 + (j / 1000)
+
+      # Create result dict
+      result = {}
+      result['open'] = 0
+      result['miss'] = 0
+      result['win'] = 0
+      result['loss'] = 0
+      result['open/close'] = 0
+      result['win/loss'] = 0
+      result['remain'] = 0
+
+      positions = []
+
+      # For each row / candle
+      for k in range(stop - start):
+
+        # Check signal
+        if signals[k] != NO_SIGNAL:
+
+          open_trade = False
+
+          # Check able to open multiple positions
+          if multiple_trade:
+            open_trade = True
+          else:
+
+            # Check has opened position anot
+            if len(positions) == 0:
+              open_trade = True
+            else:
+              result['miss'] += 1
+
+          # If able to open position
+          if open_trade:
+
+            # Create position
+            position = {}
+            position['row'] = k
+
+            # Set take profit and stop loss
+            if atr:
+              if signals[k] == BUY:
+                position['tp'] = opens[k] + (atrs[k] * earn_ratio)
+                position['sl'] = opens[k] - (atrs[k] * loss_ratio)
+              else:
+                position['tp'] = opens[k] - (atrs[k] * earn_ratio)
+                position['sl'] = opens[k] + (atrs[k] * loss_ratio)
+
+            else:
+              if signals[k] == BUY:
+                position['tp'] = opens[k] * earn_ratio
+                position['sl'] = opens[k] / loss_ratio
+              else:
+                position['tp'] = opens[k] / earn_ratio
+                position['sl'] = opens[k] * loss_ratio
+
+            # Add position to positions
+            positions.append(position)
+            result['open'] += 1
+
+        # Check positions met tp and ls
+        if positions:
+
+          # For each position opened
+          for position in positions:
+
+            # Conditions
+            win = False
+            loss = False
+
+            # Win
+            if lows[k] < position['tp'] < highs[k]:
+              result['win'] += 1
+              win = True
+
+            # Loss
+            if lows[k] < position['sl'] < highs[k]:
+              result['loss'] += 1
+              loss = True
+
+            # Win or loss met
+            if win | loss:
+
+              # Check does the position open and close in the same candle
+              if position['row'] == k:
+                result['open/close'] += 1
+
+              # Remove (close) the position in positions
+              positions.remove(position)
+
+            # Both win and loss met
+            if win & loss:
+              result['win/loss'] += 1
+
+      # The remain positions havent close yet
+      result['remain'] += int(len(positions))
+
+      results[(i, j)] = result
+
+  return results
+
+KERNELS = {
+  'new_backtest_symbol': new_backtest_symbol,
+  'grid_backtest_symbol': grid_backtest_symbol,
+}
+
+def _run_shard(kernel: str, spec: tuple, shard: List[Tuple[str, int, int]], params: dict) -> List[Any]:
+
+  shm, arrays = attach(spec)
+
+  try:
+    return [KERNELS[kernel](arrays, start, stop, **params) for symbol, start, stop in shard]
+  finally:
+    del arrays
+    shm.close()
+
+def run_symbols(kernel: str, arrays: Dict[str, np.ndarray], tasks: List[Tuple[str, int, int]], workers: int = 1, **params) -> List[Any]:
+  """Runs a symbol kernel over every `(symbol, start, stop)` task.
+
+  With `workers > 1` the tasks are sharded across a process pool and the
+  arrays are handed over through shared memory. The results always come
+  back in the order of `tasks`, so the output matches the serial run.
+
+  Scripts that use `workers > 1` must guard their entry point with
+  `if __name__ == '__main__':` on platforms that spawn processes (Windows).
+  """
+
+  if workers is None or workers <= 1 or len(tasks) <= 1:
+    return [KERNELS[kernel](arrays, start, stop, **params) for symbol, start, stop in tasks]
+
+  # Several contiguous shards per worker to balance uneven symbols
+  shard_count = min(len(tasks), workers * 4)
+  shards = [list(shard) for shard in np.array_split(np.arange(len(tasks)), shard_count)]
+  shards = [[tasks[index] for index in shard] for shard in shards if len(shard)]
+
+  with SharedArrays(arrays) as shared:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+      futures = [executor.submit(_run_shard, kernel, shared.spec, shard, params) for shard in shards]
+      results = []
+      for future in futures:
+        results.extend(future.result())
+
+  return results
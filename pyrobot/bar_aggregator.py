@@ -0,0 +1,302 @@
+import time
+import socket
+import threading
+import numpy as np
+
+from collections import deque
+from datetime import datetime
+from datetime import timezone
+
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+# Bar length in seconds of the Robot periods
+PERIOD_SECONDS = {
+  '1M': 60,
+  '5M': 5 * 60,
+  '10M': 10 * 60,
+  '15M': 15 * 60,
+  '30M': 30 * 60,
+  '1H': 3600,
+  '4H': 4 * 3600,
+  '1D': 24 * 3600,
+  '1W': 7 * 24 * 3600,
+}
+
+# 1970-01-01 is a Thursday, weekly bars start on Monday
+WEEK_OFFSET = 4 * 24 * 3600
+
+class BarAggregator():
+
+  """
+  Aggregates ticks into OHLC bars of one period.
+
+  Every tick updates the forming bar of its symbol in O(1), a tick of a
+  later bar closes the forming bar. Closed bars are served in the candle
+  format of `Robot.get_latest_bar`, and so are the forming bars for the
+  strategies which evaluate within the bar.
+  """
+
+  def __init__(self, period: str = '15M', max_closed_bars: int = 10000, close_delay: float = 2.0) -> None:
+    """Initalizes the bar aggregator.
+
+    Arguments:
+    ----
+    period {str} -- The bar period, one of the `Robot` periods. (default: {'15M'})
+
+    max_closed_bars {int} -- Maximum number of closed bars kept until they are popped. (default: {10000})
+
+    close_delay {float} -- Seconds after the end of a bar the late ticks are waited for, before the
+        bars of the symbols without a tick in the new bar are closed. (default: {2.0})
+    """
+
+    if period not in PERIOD_SECONDS:
+      raise ValueError("Period allowed: {periods}".format(periods=', '.join(PERIOD_SECONDS)))
+
+    self._period = period
+    self._seconds = PERIOD_SECONDS[period]
+    self._offset = WEEK_OFFSET if period == '1W' else 0
+    self._close_delay = close_delay
+
+    # symbol ==> [bar_start, open, high, low, close, volume]
+    self._forming: Dict[str, list] = {}
+
+    # symbol ==> bar_start of its last closed bar, the later ticks of it are dropped
+    self._closed_until: Dict[str, int] = {}
+    self._closed = deque(maxlen=max_closed_bars)
+
+    self._condition = threading.Condition()
+    self._ticks = 0
+    self._served_ticks = 0
+    self._last_tick_time: float = None
+    self._latencies = deque(maxlen=10000)
+
+  @property
+  def period(self) -> str:
+    return self._period
+
+  @property
+  def ticks(self) -> int:
+    return self._ticks
+
+  @property
+  def close_delay(self) -> float:
+    return self._close_delay
+
+  def add_tick(self, symbol: str, price: float, timestamp: float, volume: float = 0.0) -> None:
+    """Adds one tick.
+
+    Arguments:
+    ----
+    symbol {str} -- The StockFrame symbol, for example `18 - gold`.
+
+    price {float} -- The traded or quoted price.
+
+    timestamp {float} -- Seconds since epoch, UTC.
+
+    volume {float} -- The traded volume. (default: {0.0})
+    """
+
+    bar_start = int(timestamp - (timestamp - self._offset) % self._seconds)
+
+    with self._condition:
+
+      bar = self._forming.get(symbol)
+
+      # Late ticks of a closed bar are dropped, even once `close_bars` closed it
+      if bar_start <= self._closed_until.get(symbol, -1):
+        pass
+
+      elif bar is None or bar_start > bar[0]:
+
+        # The tick opens a new bar, so the forming one is closed
+        if bar is not None:
+          self._close(symbol=symbol, bar=bar)
+
+        self._forming[symbol] = [bar_start, price, price, price, price, volume]
+
+      elif bar_start == bar[0]:
+        if price > bar[2]:
+          bar[2] = price
+        if price < bar[3]:
+          bar[3] = price
+        bar[4] = price
+        bar[5] += volume
+
+      self._ticks += 1
+      self._last_tick_time = time.perf_counter()
+      self._condition.notify_all()
+
+  def close_bars(self, timestamp: float) -> None:
+    """Closes the forming bars which ended before `timestamp`, for symbols without ticks in the new bar."""
+
+    bar_start = int(timestamp - (timestamp - self._offset) % self._seconds)
+
+    with self._condition:
+      for symbol, bar in list(self._forming.items()):
+        if bar[0] < bar_start:
+          self._close(symbol=symbol, bar=bar)
+          del self._forming[symbol]
+
+      self._condition.notify_all()
+
+  def seconds_to_close(self, timestamp: float = None) -> float:
+    """Returns the seconds until the bar forming at `timestamp` (default now) ends, plus `close_delay`."""
+
+    if timestamp is None:
+      timestamp = time.time()
+
+    bar_start = int(timestamp - (timestamp - self._offset) % self._seconds)
+
+    return bar_start + self._seconds + self._close_delay - timestamp
+
+  def pop_closed_bars(self) -> List[dict]:
+    """Returns the bars closed since the last call."""
+
+    with self._condition:
+      bars = list(self._closed)
+      self._closed.clear()
+
+    return bars
+
+  def forming_bars(self) -> List[dict]:
+    """Returns the bars still forming, one per symbol."""
+
+    with self._condition:
+      self._served_ticks = self._ticks
+      return [self._to_candle(symbol=symbol, bar=bar) for symbol, bar in self._forming.items()]
+
+  def wait(self, intrabar: bool = False, timeout: float = None) -> bool:
+    """Waits for a closed bar, or when `intrabar` is set for a tick after the last `forming_bars` call.
+
+    Returns:
+    ----
+    {bool} -- `False` if the timeout passed first.
+    """
+
+    with self._condition:
+
+      if intrabar:
+        return self._condition.wait_for(lambda: self._ticks != self._served_ticks, timeout=timeout)
+
+      return self._condition.wait_for(lambda: len(self._closed) > 0, timeout=timeout)
+
+  def record_signal_latency(self) -> float:
+    """Records the time from the last tick, call it once the signals of the tick are ready.
+
+    Returns:
+    ----
+    {float} -- The latency in seconds.
+    """
+
+    if self._last_tick_time is None:
+      return 0.0
+
+    latency = time.perf_counter() - self._last_tick_time
+    self._latencies.append(latency)
+
+    return latency
+
+  def statistics(self) -> Dict[str, float]:
+    """Returns the tick count and the last tick to signals latencies in milliseconds."""
+
+    latencies = np.array(self._latencies, dtype=np.float64) * 1000
+
+    statistics = {'ticks': self._ticks, 'signals': len(latencies)}
+
+    if len(latencies):
+      statistics['latency_p50'] = float(np.percentile(latencies, 50))
+      statistics['latency_p95'] = float(np.percentile(latencies, 95))
+      statistics['latency_max'] = float(latencies.max())
+    else:
+      statistics['latency_p50'] = statistics['latency_p95'] = statistics['latency_max'] = 0.0
+
+    return statistics
+
+  def consume(self, ticks: Iterator[Tuple[str, float, float, float]]) -> threading.Thread:
+    """Adds the ticks of a feed in a background thread.
+
+    Arguments:
+    ----
+    ticks {Iterator[Tuple[str, float, float, float]]} -- (symbol, price, timestamp, volume) ticks,
+        for example `read_tick_file` or `read_tick_socket`.
+
+    Returns:
+    ----
+    {threading.Thread} -- The feed thread.
+    """
+
+    def run():
+      for symbol, price, timestamp, volume in ticks:
+        self.add_tick(symbol=symbol, price=price, timestamp=timestamp, volume=volume)
+
+    thread = threading.Thread(target=run, name='tick-feed', daemon=True)
+    thread.start()
+
+    return thread
+
+  def _close(self, symbol: str, bar: list) -> None:
+
+    self._closed.append(self._to_candle(symbol=symbol, bar=bar))
+    self._closed_until[symbol] = bar[0]
+
+  def _to_candle(self, symbol: str, bar: list) -> dict:
+
+    return {
+      'instrumentid': symbol,
+      'fromdate': datetime.fromtimestamp(bar[0], tz=timezone.utc).strftime('%Y-%m-%dt%H:%M:%Sz'),
+      'open': bar[1],
+      'high': bar[2],
+      'low': bar[3],
+      'close': bar[4],
+      'volume': bar[5],
+    }
+
+
+def parse_tick(line: str) -> Tuple[str, float, float, float]:
+  """Parses a `symbol,timestamp,price[,volume]` line, for example `18 - gold,1624516200.5,1780.12`."""
+
+  fields = line.strip().split(',')
+
+  if len(fields) < 3:
+    raise ValueError("Tick line must be symbol,timestamp,price[,volume], got {line}".format(line=line.strip()))
+
+  volume = float(fields[3]) if len(fields) > 3 else 0.0
+  return fields[0], float(fields[2]), float(fields[1]), volume
+
+def read_tick_file(path: str, speed: float = None) -> Iterator[Tuple[str, float, float, float]]:
+  """Yields the ticks of a file, one `symbol,timestamp,price[,volume]` line per tick.
+
+  Arguments:
+  ----
+  path {str} -- The tick file.
+
+  speed {float} -- Yields the ticks as they came, `speed` times faster, like a live feed. (default: {None, at once})
+  """
+
+  started = None
+
+  with open(path, 'r') as tick_file:
+    for line in tick_file:
+      if line.strip():
+        tick = parse_tick(line)
+
+        if speed is not None:
+          if started is None:
+            started = (tick[2], time.perf_counter())
+          delay = (tick[2] - started[0]) / speed - (time.perf_counter() - started[1])
+          if delay > 0:
+            time.sleep(delay)
+
+        yield tick
+
+def read_tick_socket(host: str = '127.0.0.1', port: int = 9009) -> Iterator[Tuple[str, float, float, float]]:
+  """Yields the ticks sent to a local TCP socket, one `symbol,timestamp,price[,volume]` line per tick."""
+
+  with socket.create_connection((host, port)) as connection:
+    with connection.makefile('r') as lines:
+      for line in lines:
+        if line.strip():
+          yield parse_tick(line)
@@ -0,0 +1,71 @@
+from abc import ABC
+from abc import abstractmethod
+
+from typing import List
+
+from pyrobot.stock_frame import StockFrame
+
+class Broker(ABC):
+
+  """
+  Interface of the brokers `Robot.execute_signals` trades through.
+
+  `EtoroPrototype` drives the real eToro web platform, `PaperBroker` fills
+  the orders in-process against the StockFrame. A broker missing one of
+  the abstract methods fails when it is created, not at its first order.
+  """
+
+  # Whether the methods can be called from several threads at once
+  thread_safe = False
+
+  def set_stock_frame(self, stock_frame: StockFrame) -> None:
+    """Called by `Robot.create_stock_frame`, brokers that price orders from the StockFrame keep it."""
+
+    pass
+
+  @abstractmethod
+  def open_position(
+    self,
+    symbol: str,
+    buy_or_sell: str,
+    amount: float = None,
+    leverage: str = None,
+    stop_loss: float = None,
+    take_profit: float = None,
+  ):
+    """Opens a position.
+
+    Arguments:
+    ----
+    symbol {str} -- The symbol name, for example `GOLD`.
+
+    buy_or_sell {str} -- `buy` or `sell`.
+
+    amount {float} -- The amount to trade, defaults to the allocated amount split
+        by the trading size. (default: {None})
+
+    leverage {str} -- The leverage, for example `x5`. (default: {None})
+
+    stop_loss {float} -- The stop loss price. (default: {None})
+
+    take_profit {float} -- The take profit price. (default: {None})
+    """
+
+    pass
+
+  @abstractmethod
+  def close_positions(self, symbols: List[str]):
+    """Closes all the positions of the symbols.
+
+    Arguments:
+    ----
+    symbols {List[str]} -- The StockFrame symbols, for example `18 - gold`.
+    """
+
+    pass
+
+  @abstractmethod
+  def print_history_records(self) -> None:
+    """Prints the statistics of the positions opened since the system started."""
+
+    pass
@@ -0,0 +1,228 @@
+import re
+import json
+import warnings
+import numpy as np
+
+from typing import Dict
+from typing import List
+
+# Start of a `"Candles": [` array, the last one holds the candle objects
+CANDLES_ARRAY = re.compile(rb'"candles"\s*:\s*\[', re.IGNORECASE)
+
+# The keys of the candle objects
+KEYS = re.compile(rb'"(\w+)"\s*:')
+
+# Quotes, braces, colons and the `t` / `z` of the dates, as a lookup table by byte value
+SEPARATORS = np.zeros(256, dtype=bool)
+SEPARATORS[np.frombuffer(b'"{}:tz', dtype=np.uint8)] = True
+
+DIGITS = np.zeros(256, dtype=bool)
+DIGITS[np.frombuffer(b'0123456789', dtype=np.uint8)] = True
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def decode_candles(body: bytes, instrument_id: int = None) -> Dict[str, np.ndarray]:
+  """Decodes the body of the eToro candles end-point into typed arrays.
+
+  Overview:
+  ----
+  The keys and separators of the candle objects are dropped from the raw
+  body with byte masks and numpy parses the remaining numbers, so no object
+  is built per candle. Bodies which do not line up are decoded with `json`.
+
+  Arguments:
+  ----
+  body {bytes} -- The raw response body, for example `requests.Response.content`.
+
+  instrument_id {int} -- The requested instrument, used when the candles do not
+      carry their instrument ID. (default: {None})
+
+  Returns:
+  ----
+  {Dict[str, np.ndarray]} -- The `instrumentid` (int32), `timestamp` (int64 seconds
+      since epoch, UTC) and `open`, `high`, `low`, `close`, `volume` (float64) columns.
+  """
+
+  starts = list(CANDLES_ARRAY.finditer(body))
+  if not starts:
+    return _decode_json(body=body, instrument_id=instrument_id)
+
+  # The candle objects hold no arrays, so the first `]` closes the candles array
+  start = starts[-1].end()
+  end = body.find(b']', start)
+  candles = body[start:end].lower()
+
+  if not candles.strip():
+    return empty_candles()
+
+  # Field order of the candles, taken from the first one
+  keys = [key.decode() for key in KEYS.findall(candles, 0, candles.find(b'}'))]
+  if 'fromdate' not in keys or not {'open', 'high', 'low', 'close'}.issubset(keys):
+    return _decode_json(body=body, instrument_id=instrument_id)
+
+  numbers = _strip_to_numbers(candles=candles)
+  if numbers is None:
+    return _decode_json(body=body, instrument_id=instrument_id)
+
+  try:
+    with warnings.catch_warnings():
+      warnings.simplefilter('error')
+      values = np.fromstring(numbers, dtype=np.float64, sep=',')
+  except (ValueError, DeprecationWarning):
+    return _decode_json(body=body, instrument_id=instrument_id)
+
+  # Candles with missing or extra fields do not line up
+  if len(values) % len(keys) or numbers.count(b',') + 1 != len(values):
+    return _decode_json(body=body, instrument_id=instrument_id)
+
+  values = values.reshape(-1, len(keys))
+  column = lambda name: values[:, keys.index(name)]
+
+  columns = {}
+
+  if 'instrumentid' in keys:
+    columns['instrumentid'] = column('instrumentid').astype(np.int32)
+  else:
+    columns['instrumentid'] = np.full(len(values), instrument_id if instrument_id is not None else -1, dtype=np.int32)
+
+  columns['timestamp'] = _from_digits(column('fromdate').astype(np.int64))
+
+  for name in PRICE_COLUMNS:
+    columns[name] = np.ascontiguousarray(column(name)) if name in keys else np.zeros(len(values), dtype=np.float64)
+
+  return columns
+
+def _strip_to_numbers(candles: bytes) -> bytes:
+  """Leaves only the comma separated numbers of the candle objects, `"2021-06-24t06:30:00z"` becomes `20210624063000`."""
+
+  chars = np.frombuffer(candles, dtype=np.uint8)
+
+  quotes = np.flatnonzero(chars == ord('"'))
+  if len(quotes) % 2:
+    return None
+
+  # Quoted strings not starting with a digit are keys, the others are dates
+  starts, ends = quotes[0::2], quotes[1::2] + 1
+  is_key = ~DIGITS[chars[starts + 1]]
+
+  depth = np.zeros(len(chars) + 1, dtype=np.int8)
+  depth[starts[is_key]] = 1
+  depth[ends[is_key]] = -1
+
+  drop = np.cumsum(depth[:-1], dtype=np.int8).view(bool)
+  drop |= SEPARATORS[chars]
+
+  # The minus signs right after a digit are date separators
+  minus = np.flatnonzero(chars == ord('-'))
+  drop[minus[DIGITS[chars[minus - 1]]]] = True
+
+  return chars[~drop].tobytes()
+
+def concat_candles(candles: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+  """Joins the decoded candles of several requests."""
+
+  if not candles:
+    return empty_candles()
+
+  return {name: np.concatenate([columns[name] for columns in candles]) for name in candles[0]}
+
+def slice_candles(candles: Dict[str, np.ndarray], index: slice) -> Dict[str, np.ndarray]:
+  return {name: column[index] for name, column in candles.items()}
+
+def empty_candles() -> Dict[str, np.ndarray]:
+
+  columns = {
+    'instrumentid': np.empty(0, dtype=np.int32),
+    'timestamp': np.empty(0, dtype=np.int64),
+  }
+
+  for name in PRICE_COLUMNS:
+    columns[name] = np.empty(0, dtype=np.float64)
+
+  return columns
+
+def to_frame_data(candles: Dict[str, np.ndarray], symbols: Dict[int, str]) -> Dict[str, np.ndarray]:
+  """Converts decoded candles into the columns `StockFrame` is created from.
+
+  Arguments:
+  ----
+  candles {Dict[str, np.ndarray]} -- The decoded candles.
+
+  symbols {Dict[int, str]} -- The symbol of each instrument ID, for example `{18: 'gold'}`.
+
+  Returns:
+  ----
+  {Dict[str, np.ndarray]} -- The `instrumentid` labels (`18 - gold`), the `fromdate`
+      strings (`2021-06-24t06:30:00z`) and the price columns.
+  """
+
+  # One label object per instrument, shared by all of its candles
+  instrument_ids, codes = np.unique(candles['instrumentid'], return_inverse=True)
+  labels = np.array(
+    [str(instrument_id) + ' - ' + symbols.get(int(instrument_id), '') for instrument_id in instrument_ids],
+    dtype=object
+  )
+
+  data = {
+    'instrumentid': labels[codes],
+    'fromdate': _to_fromdates(candles['timestamp']),
+  }
+
+  for name in PRICE_COLUMNS:
+    data[name] = candles[name]
+
+  return data
+
+def _from_digits(dates: np.ndarray) -> np.ndarray:
+  """Converts `YYYYMMDDHHMMSS` integers into seconds since epoch."""
+
+  date, time = np.divmod(dates, 1000000)
+  year, month_day = np.divmod(date, 10000)
+  month, day = np.divmod(month_day, 100)
+  hour, minute_second = np.divmod(time, 10000)
+  minute, second = np.divmod(minute_second, 100)
+
+  return _days_from_civil(year=year, month=month, day=day) * 86400 + hour * 3600 + minute * 60 + second
+
+def _days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+  """Days since 1970-01-01 of the proleptic Gregorian dates (H. Hinnant's algorithm)."""
+
+  year = year - (month <= 2)
+  era = np.floor_divide(year, 400)
+  year_of_era = year - era * 400
+  day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+  day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+
+  return era * 146097 + day_of_era - 719468
+
+def _to_fromdates(timestamps: np.ndarray) -> np.ndarray:
+
+  # `2021-06-24T06:30:00` ==> `2021-06-24t06:30:00z`, edited as code points to skip the per string calls
+  dates = np.datetime_as_string(timestamps.astype('datetime64[s]'), unit='s').astype('U19')
+  if not len(dates):
+    return dates.astype(object)
+
+  points = np.empty((len(dates), 20), dtype=np.uint32)
+  points[:, :19] = dates.view(np.uint32).reshape(-1, 19)
+  points[:, 10] = ord('t')
+  points[:, 19] = ord('z')
+
+  return points.view('U20').ravel().astype(object)
+
+def _decode_json(body: bytes, instrument_id: int = None) -> Dict[str, np.ndarray]:
+
+  payload = json.loads(body.lower())
+  candles = payload['candles'][0]['candles'] if payload.get('candles') else []
+
+  if not candles:
+    return empty_candles()
+
+  columns = {
+    'instrumentid': np.array([candle.get('instrumentid', instrument_id) for candle in candles], dtype=np.int32),
+    'timestamp': np.array([candle['fromdate'].rstrip('z').replace('t', 'T') for candle in candles], dtype='datetime64[ms]').astype('datetime64[s]').astype(np.int64),
+  }
+
+  for name in PRICE_COLUMNS:
+    columns[name] = np.array([candle.get(name, 0) for candle in candles], dtype=np.float64)
+
+  return columns
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+import pandas as pd
+
+from typing import Any
+from typing import Dict
+from typing import List
+
+from pyrobot.stock_frame import StockFrame
+from pyrobot.file_utils import atomic_write
+
+# Bump when the layout of the saved files changes, older checkpoints are then not loaded
+CHECKPOINT_VERSION = 2
+
+class Checkpoint():
+
+  """
+  Crash-safe checkpoint of a StockFrame and its registered indicators.
+
+  The numeric columns of a dtype are written to one `.npy` file in the
+  (columns, rows) layout of the pandas blocks, so the loaded frame is built
+  on the memory mapped arrays without copying them. Object columns are
+  written as codes plus a JSON table of the values. Each save goes to a new
+  generation folder and the JSON meta file naming the current generation
+  is replaced atomically last, so a crash while saving leaves the previous
+  checkpoint intact.
+  """
+
+  meta_file = 'checkpoint.json'
+
+  def __init__(self, path: str = '.checkpoint', interval: float = 300.0) -> None:
+    """Initalizes the checkpoint.
+
+    Arguments:
+    ----
+    path {str} -- Folder of the checkpoint. (default: {'.checkpoint'})
+
+    interval {float} -- Minimum seconds between two saves of `save(force=False)`. (default: {300.0})
+    """
+
+    self._path = path
+    self._interval = interval
+    self._last_saved: float = None
+
+  @property
+  def exists(self) -> bool:
+    return os.path.exists(os.path.join(self._path, self.meta_file))
+
+  def save(self, stock_frame: StockFrame, indicator_client=None, strategies=None, force: bool = True) -> bool:
+    """Saves the StockFrame and the indicators registered on the indicator client.
+
+    Arguments:
+    ----
+    stock_frame {pyrobot.StockFrame} -- The StockFrame.
+
+    indicator_client {pyrobot.Indicators} -- The indicators to restore on resume. (default: {None})
+
+    strategies {pyrobot.Strategies} -- The strategies owning the registered strategy functions. (default: {None})
+
+    force {bool} -- Save even if `interval` seconds did not pass since the last save. (default: {True})
+
+    Returns:
+    ----
+    {bool} -- `True` if the checkpoint was saved.
+    """
+
+    if not force and self._last_saved is not None and time.monotonic() - self._last_saved < self._interval:
+      return False
+
+    os.makedirs(self._path, exist_ok=True)
+
+    previous = self._read_meta()
+    generation = previous['generation'] + 1 if previous else 0
+    folder = os.path.join(self._path, 'g{}'.format(generation))
+
+    if os.path.exists(folder):
+      shutil.rmtree(folder)
+    os.makedirs(folder)
+
+    frame = stock_frame.frame
+
+    meta = {
+      'version': CHECKPOINT_VERSION,
+      'generation': generation,
+      'saved': time.time(),
+      'period': stock_frame.period,
+      'rows': len(frame),
+      'index': [],
+      'columns': [],
+      'indicators': self._indicators_meta(indicator_client=indicator_client, strategies=strategies),
+      'strategy_name': getattr(strategies, '_strategy_name', None),
+    }
+
+    # Index levels, e.g. '18 - gold' and '2021-06-24t06:30:00z'
+    for number, name in enumerate(frame.index.names):
+      codes, values = pd.factorize(frame.index.get_level_values(number))
+      np.save(os.path.join(folder, 'index_{}.npy'.format(number)), codes.astype(np.int32))
+      meta['index'].append({'name': name, 'values': self._to_json(values)})
+
+    blocks: Dict[np.dtype, List[str]] = {}
+
+    for number, name in enumerate(frame.columns):
+      column = frame[name]
+
+      if column.dtype == object:
+        codes, values = pd.factorize(column)
+        np.save(os.path.join(folder, 'column_{}.npy'.format(number)), codes.astype(np.int32))
+        meta['columns'].append({'name': name, 'kind': 'object', 'number': number, 'values': self._to_json(values)})
+      else:
+        blocks.setdefault(column.dtype, []).append(name)
+
+    # One (columns, rows) array per dtype, a row of the file is a column of the frame
+    for number, (dtype, names) in enumerate(blocks.items()):
+      np.save(os.path.join(folder, 'block_{}.npy'.format(number)), np.ascontiguousarray(frame[names].to_numpy(dtype=dtype).T))
+      meta['columns'].append({'names': names, 'kind': 'block', 'number': number})
+
+    # Point the checkpoint to the new generation, the old one stays valid until then
+    with atomic_write(os.path.join(self._path, self.meta_file), durable=True) as meta_file:
+      json.dump(meta, meta_file)
+
+    # Remove the older generations
+    for name in os.listdir(self._path):
+      if name.startswith('g') and name != 'g{}'.format(generation) and os.path.isdir(os.path.join(self._path, name)):
+        shutil.rmtree(os.path.join(self._path, name), ignore_errors=True)
+
+    self._last_saved = time.monotonic()
+    return True
+
+  def load(self) -> StockFrame:
+    """Maps the saved arrays and returns the StockFrame, or `None` if there is no checkpoint.
+
+    The numeric columns stay memory mapped copy-on-write, their pages are read
+    when the frame reads them and the file is never written. The numeric
+    columns come first, then the object columns.
+    """
+
+    meta = self._read_meta()
+    if meta is None:
+      return None
+
+    if meta.get('version') != CHECKPOINT_VERSION:
+      print("Unable to load the checkpoint, it was saved in an older layout.")
+      return None
+
+    folder = os.path.join(self._path, 'g{}'.format(meta['generation']))
+
+    codes = [np.load(os.path.join(folder, 'index_{}.npy'.format(number)), mmap_mode='c') for number in range(len(meta['index']))]
+    index = pd.MultiIndex(
+      levels=[level['values'] for level in meta['index']],
+      codes=codes,
+      names=[level['name'] for level in meta['index']],
+      verify_integrity=False
+    )
+
+    frame = None
+    objects = []
+
+    for column in meta['columns']:
+
+      if column['kind'] == 'object':
+        objects.append(column)
+        continue
+
+      values = np.load(os.path.join(folder, 'block_{}.npy'.format(column['number'])), mmap_mode='c')
+
+      # The transposed view is the pandas block itself, so the first one is not copied
+      if frame is None:
+        frame = pd.DataFrame(data=values.T, index=index, columns=column['names'], copy=False)
+      else:
+        for name, row in zip(column['names'], values):
+          frame[name] = row
+
+    if frame is None:
+      frame = pd.DataFrame(index=index)
+
+    for column in objects:
+      codes = np.load(os.path.join(folder, 'column_{}.npy'.format(column['number'])), mmap_mode='r')
+
+      # Code -1 = missing value
+      table = np.asarray(column['values'] + [np.nan], dtype=object)
+      frame[column['name']] = table[codes]
+
+    return StockFrame.from_frame(frame=frame, period=meta['period'])
+
+  def restore_indicators(self, indicator_client, strategies=None) -> List[str]:
+    """Registers the saved indicators of the loaded frame, its columns already hold their values.
+
+    Nothing is computed, the next `refresh` updates the indicators with the bars added since.
+
+    Arguments:
+    ----
+    indicator_client {pyrobot.Indicators} -- The indicators of the loaded StockFrame.
+
+    strategies {pyrobot.Strategies} -- The strategies owning the registered strategy functions. (default: {None})
+
+    Returns:
+    ----
+    {List[str]} -- The restored indicator columns.
+    """
+
+    meta = self._read_meta()
+    if meta is None or meta.get('version') != CHECKPOINT_VERSION:
+      return []
+
+    owners = {'indicators': indicator_client, 'strategies': strategies}
+    restored = []
+
+    for indicator in meta['indicators']:
+
+      owner = owners.get(indicator['owner'])
+      if owner is None or not hasattr(owner, indicator['func']):
+        print("Unable to restore the {column} indicator, {func} is missing.".format(column=indicator['column'], func=indicator['func']))
+        continue
+
+      indicator_client._current_indicators[indicator['column']] = {
+        'args': indicator['args'],
+        'func': getattr(owner, indicator['func'])
+      }
+      restored.append(indicator['column'])
+
+    if strategies is not None and meta.get('strategy_name'):
+      strategies._strategy_name = meta['strategy_name']
+
+    return restored
+
+  def _indicators_meta(self, indicator_client, strategies) -> List[Dict[str, Any]]:
+
+    if indicator_client is None:
+      return []
+
+    indicators = []
+
+    for column, indicator in indicator_client._current_indicators.items():
+
+      func = indicator['func']
+      owner = getattr(func, '__self__', None)
+
+      if owner is indicator_client:
+        owner_name = 'indicators'
+      elif strategies is not None and owner is strategies:
+        owner_name = 'strategies'
+      else:
+        print("Unable to checkpoint the {column} indicator, its function is not an Indicators or Strategies method.".format(column=column))
+        continue
+
+      indicators.append({'column': column, 'owner': owner_name, 'func': func.__name__, 'args': indicator['args']})
+
+    return indicators
+
+  def _read_meta(self) -> dict:
+
+    try:
+      with open(os.path.join(self._path, self.meta_file), 'r') as meta_file:
+        return json.load(meta_file)
+    except (OSError, ValueError):
+      return None
+
+  def _to_json(self, values) -> list:
+
+    # numpy scalars ==> Python scalars, JSON keeps strings, numbers and booleans apart
+    return [value.item() if isinstance(value, np.generic) else value for value in np.asarray(values, dtype=object)]
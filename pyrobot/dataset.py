@@ -0,0 +1,297 @@
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from pyrobot.stock_frame import StockFrame
+
+class WindowDataset():
+
+  """
+  Sliding training windows over the instruments of a StockFrame.
+
+  The feature columns are copied once into one scaled float array, the
+  windows are strided views on it (`sliding_window_view`), so a window of
+  160 bars costs no memory until a mini-batch gathers it. Windows never
+  cross two instruments, and windows touching a NaN (e.g. indicator
+  warm-up) are left out.
+  """
+
+  def __init__(self, stock_frame: StockFrame, features: List[str] = ['close'], target: str = 'close', window: int = 160,
+               horizon: int = 1, scale: bool = True, dtype: type = np.float32) -> None:
+    """Initalizes the dataset.
+
+    Arguments:
+    ----
+    stock_frame {pyrobot.StockFrame} -- The StockFrame, one instrument after the other.
+
+    features {List[str]} -- The input columns. (default: {['close']})
+
+    target {str} -- The column predicted, it must be one of the features. (default: {'close'})
+
+    window {int} -- Bars per window. (default: {160})
+
+    horizon {int} -- The target is `horizon` bars after the last bar of the window. (default: {1})
+
+    scale {bool} -- Min-max scale every feature to [0, 1]. (default: {True})
+
+    dtype {type} -- The array type. (default: {np.float32})
+    """
+
+    if target not in features:
+      raise ValueError("The target {target} must be one of the features {features}".format(target=target, features=features))
+
+    frame = stock_frame.frame
+
+    self._features = list(features)
+    self._target = self._features.index(target)
+    self._window = window
+    self._horizon = horizon
+    self._steps = []
+
+    # The only copy of the series
+    self._values = frame[self._features].to_numpy(dtype=dtype)
+
+    self._min = np.nanmin(self._values, axis=0)
+    self._max = np.nanmax(self._values, axis=0)
+
+    if scale:
+      self._values -= self._min
+      self._values /= np.where(self._max > self._min, self._max - self._min, 1)
+    else:
+      self._min = np.zeros_like(self._min)
+      self._max = np.ones_like(self._max)
+
+    # Rows of every instrument, the frame is sorted by instrument
+    labels = frame.index.get_level_values(0)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)]
+
+    self._index(
+      instruments=[labels[start] for start in starts],
+      series=[self._values[start:end] for start, end in zip(starts, ends)]
+    )
+
+  @classmethod
+  def from_arrays(cls, arrays: Dict[str, np.ndarray], features: List[str], target: str = 'close', window: int = 160,
+                  horizon: int = 1, offset: List[float] = None, scale: List[float] = None,
+                  steps: List[Tuple[str, dict]] = None) -> 'WindowDataset':
+    """Creates the dataset over already scaled (bars, features) arrays, one per instrument, e.g. a `FeatureSet`.
+
+    Arguments:
+    ----
+    offset {List[float]} -- The feature values scaled to 0, for `inverse_transform`. (default: {0})
+
+    scale {List[float]} -- The feature spreads scaled to 1, for `inverse_transform`. (default: {1})
+
+    steps {List[Tuple[str, dict]]} -- The `Indicators` calls the features come from. (default: {None})
+    """
+
+    if target not in features:
+      raise ValueError("The target {target} must be one of the features {features}".format(target=target, features=features))
+
+    dataset = cls.__new__(cls)
+    dataset._features = list(features)
+    dataset._target = dataset._features.index(target)
+    dataset._window = window
+    dataset._horizon = horizon
+    dataset._steps = list(steps or [])
+    dataset._min = np.zeros(len(features)) if offset is None else np.asarray(offset, dtype=np.float64)
+    dataset._max = dataset._min + (np.ones(len(features)) if scale is None else np.asarray(scale, dtype=np.float64))
+
+    dataset._index(instruments=list(arrays), series=list(arrays.values()))
+
+    return dataset
+
+  @classmethod
+  def from_scaler(cls, stock_frame: StockFrame, scaler: Dict[str, Any], indicator_client=None,
+                  dtype: type = np.float32) -> 'WindowDataset':
+    """Creates the dataset over a StockFrame scaled with a saved scaler, e.g. of a `ModelRegistry` model,
+    instead of fitting one on its candles.
+
+    Arguments:
+    ----
+    stock_frame {pyrobot.StockFrame} -- The StockFrame, one instrument after the other.
+
+    scaler {Dict[str, Any]} -- The `scaler()` saved with the model.
+
+    indicator_client {pyrobot.Indicators} -- Adds the indicators the features come from, needed when
+        the scaler has `steps`. (default: {None})
+
+    dtype {type} -- The array type. (default: {np.float32})
+    """
+
+    if indicator_client is not None:
+      for step_name, args in scaler.get('steps', []):
+        getattr(indicator_client, step_name)(**args)
+
+    frame = stock_frame.frame
+    values = (frame[scaler['features']].to_numpy(dtype=np.float64) - scaler['offset']) / scaler['scale']
+
+    labels = frame.index.get_level_values(0)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)]
+
+    return cls.from_arrays(
+      arrays={labels[start]: values[start:end].astype(dtype) for start, end in zip(starts, ends)},
+      features=scaler['features'],
+      target=scaler['target'],
+      window=scaler['window'],
+      horizon=scaler['horizon'],
+      offset=scaler['offset'],
+      scale=scaler['scale'],
+      steps=[tuple(step) for step in scaler.get('steps', [])]
+    )
+
+  def _index(self, instruments: List[str], series: List[np.ndarray]) -> None:
+
+    window = self._window
+    horizon = self._horizon
+
+    self._instruments: List[str] = []
+    self._series: List[np.ndarray] = []
+    self._windows: List[np.ndarray] = []
+    self._targets: List[np.ndarray] = []
+    samples = []
+
+    for instrument, values in zip(instruments, series):
+
+      if len(values) < window + horizon:
+        continue
+
+      # (bars - window + 1, features, window) ==> (bars - window + 1, window, features), both views
+      windows = sliding_window_view(values, window_shape=window, axis=0).transpose(0, 2, 1)[:len(values) - window - horizon + 1]
+      targets = values[window + horizon - 1:, self._target]
+
+      # Drop the windows and targets touching a NaN
+      nan_rows = np.r_[0, np.cumsum(np.isnan(values).any(axis=1))]
+      valid = (nan_rows[window:len(values) - horizon + 1] - nan_rows[:len(values) - window - horizon + 1] == 0) & ~np.isnan(targets)
+
+      self._instruments.append(instrument)
+      self._series.append(values)
+      self._windows.append(windows)
+      self._targets.append(targets)
+      samples.append(np.stack([np.full(valid.sum(), len(self._windows) - 1), np.flatnonzero(valid)], axis=1))
+
+    # (instrument, window) of every sample
+    self._samples = np.concatenate(samples) if samples else np.empty((0, 2), dtype=np.int64)
+
+  def __len__(self) -> int:
+    return len(self._samples)
+
+  def __getitem__(self, index: int) -> Tuple[np.ndarray, float]:
+
+    instrument, position = self._samples[index]
+    return self._windows[instrument][position], self._targets[instrument][position]
+
+  @property
+  def instruments(self) -> List[str]:
+    return self._instruments
+
+  @property
+  def shape(self) -> Tuple[int, int, int]:
+    """The shape of the inputs, (samples, window, features)."""
+
+    return len(self), self._window, len(self._features)
+
+  def steps(self, batch_size: int = 32) -> int:
+    """Returns the number of batches per epoch."""
+
+    return int(np.ceil(len(self) / batch_size))
+
+  def batches(self, batch_size: int = 32, shuffle: bool = True, repeat: bool = False, targets: bool = True,
+              seed: int = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yields mini-batches, only a batch of windows is copied at once.
+
+    Arguments:
+    ----
+    batch_size {int} -- Windows per batch. (default: {32})
+
+    shuffle {bool} -- Shuffle the windows every epoch. (default: {True})
+
+    repeat {bool} -- Start over after the last batch, e.g. for `model.fit(..., steps_per_epoch=dataset.steps())`. (default: {False})
+
+    targets {bool} -- Yield `(inputs, targets)`, or else the inputs only, e.g. for `model.predict`. (default: {True})
+
+    seed {int} -- The shuffle seed. (default: {None})
+
+    Yields:
+    ----
+    {Tuple[np.ndarray, np.ndarray]} -- The (batch, window, features) inputs and the (batch,) targets.
+    """
+
+    random = np.random.default_rng(seed)
+
+    while True:
+
+      order = random.permutation(len(self)) if shuffle else np.arange(len(self))
+
+      for start in range(0, len(order), batch_size):
+
+        samples = self._samples[order[start:start + batch_size]]
+
+        inputs = np.empty((len(samples), self._window, len(self._features)), dtype=self._series[0].dtype)
+        outputs = np.empty(len(samples), dtype=self._series[0].dtype)
+
+        # Gather per instrument, fancy indexing the strided view copies the batch only
+        for instrument in np.unique(samples[:, 0]):
+          rows = samples[:, 0] == instrument
+          inputs[rows] = self._windows[instrument][samples[rows, 1]]
+          outputs[rows] = self._targets[instrument][samples[rows, 1]]
+
+        yield (inputs, outputs) if targets else inputs
+
+      if not repeat:
+        return
+
+  def windows(self, instrument: str) -> np.ndarray:
+    """Returns every window of an instrument as a (windows, window, features) view."""
+
+    return self._windows[self._instruments.index(instrument)]
+
+  def last_window(self, instrument: str) -> np.ndarray:
+    """Returns the latest `window` bars of an instrument as a (1, window, features) view, to predict the next bar."""
+
+    # The training windows stop `horizon` bars before the end, they need a target
+    return self._series[self._instruments.index(instrument)][-self._window:][np.newaxis]
+
+  def inverse_transform(self, values: np.ndarray, feature: str = None) -> np.ndarray:
+    """Scales values of a feature back to prices. (default: {the target})"""
+
+    column = self._target if feature is None else self._features.index(feature)
+
+    return np.asarray(values) * (self._max[column] - self._min[column]) + self._min[column]
+
+  def transform(self, values: np.ndarray, feature: str = None) -> np.ndarray:
+    """Scales prices of a feature like the dataset. (default: {the target})"""
+
+    column = self._target if feature is None else self._features.index(feature)
+    spread = self._max[column] - self._min[column]
+
+    return (np.asarray(values) - self._min[column]) / (spread if spread > 0 else 1)
+
+  def scaler(self) -> Dict[str, Any]:
+    """Returns what scoring live bars like this dataset needs, saved with the model by the `ModelRegistry`."""
+
+    return {
+      'features': self._features,
+      'target': self._features[self._target],
+      'window': self._window,
+      'horizon': self._horizon,
+      'offset': self._min.tolist(),
+      'scale': np.where(self._max > self._min, self._max - self._min, 1).tolist(),
+      'steps': self._steps,
+    }
+
+  def memory(self) -> Dict[str, int]:
+    """Returns the bytes held by the series, and what the windows would take as copies."""
+
+    return {
+      'series': sum(values.nbytes for values in self._series),
+      'windows_copied': len(self) * self._window * len(self._features) * (self._series[0].itemsize if self._series else 0),
+    }
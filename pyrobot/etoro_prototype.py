@@ -2,6 +2,8 @@ import os
 import ast
 import time
 import json
+import functools
+import threading
 import pprint
 import requests
 import pandas as pd
@@ -18,9 +20,23 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
-class EtoroPrototype():
+from pyrobot.broker import Broker
+from pyrobot.position_book import PositionBook
 
-  def __init__(self, email: str, password: str, mode: str = 'real', multiple_trade: bool = True, allocate_amount: float = 0, trading_size: int = 1):
+def driver_lock(func):
+  """Runs the method while holding the browser, the position book reconciles from another thread."""
+
+  @functools.wraps(func)
+  def wrapper(self, *args, **kwargs):
+    with self._driver_lock:
+      return func(self, *args, **kwargs)
+
+  return wrapper
+
+class EtoroPrototype(Broker):
+
+  def __init__(self, email: str, password: str, mode: str = 'real', multiple_trade: bool = True, allocate_amount: float = 0, trading_size: int = 1,
+               reconcile_interval: float = 60):
 
     self._system_start_time = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
     self.email = email
@@ -36,6 +52,7 @@ class EtoroPrototype():
     self._trading_size = trading_size
 
     self.portfolio_records = []
+    self._driver_lock = threading.RLock()
 
     self._statistics = {}
     self._statistics['open'] = 0
@@ -79,6 +96,8 @@ class EtoroPrototype():
     self.switch_to_x_portfolio(mode=self.mode)
     print('Getting traded amount ...')
     self._traded_amount = self.get_total_allocated_amount()
+    print('Getting opened positions ...')
+    self.position_book = PositionBook(fetch_positions=self.get_portfolio_records, interval=reconcile_interval).start()
   
   def go_to(self, url: str):
     driver = self.driver
@@ -114,6 +133,7 @@ class EtoroPrototype():
 
   def close_browser(self):
     driver = self.driver
+    self.position_book.stop()
     driver.quit()
 
   def is_logged(self):
@@ -178,6 +198,7 @@ class EtoroPrototype():
 
     self.wait_page_loaded()
   
+  @driver_lock
   def update_portfolio_records(self):
 
     driver = self.driver
@@ -186,6 +207,13 @@ class EtoroPrototype():
 
     self.portfolio_records = [elem.text.lower() for elem in driver.find_elements_by_class_name("table-first-name")]
 
+  def get_portfolio_records(self) -> List[str]:
+
+    self.update_portfolio_records()
+
+    return self.portfolio_records
+
+  @driver_lock
   def open_position(
     self, 
     symbol: str, 
@@ -210,17 +238,14 @@ class EtoroPrototype():
     # # Not able multiple trade
     # else: 
   
-    # Update portfolio records
-    self.update_portfolio_records()
-
     # Check the trading size over the opened positions anot
-    if (len(self.portfolio_records) - 0) >= self._trading_size:
+    if len(self.position_book) >= self._trading_size:
       self._statistics['limit'] += 1
       print("Unable to open '{symbol}' position due to reach the trading size limit.".format(symbol = symbol.upper()))
       return
 
     # Check if the symbol opened position
-    if symbol in self.portfolio_records:
+    if symbol in self.position_book:
       self._statistics['repeat'] += 1
       print("{symbol} has opened position.".format(symbol = symbol.upper()))
       return
@@ -382,6 +407,7 @@ class EtoroPrototype():
     # Check notification
     driver.find_element_by_class_name("status-notification-wrapper")
     self._statistics['open'] += 1
+    self.position_book.add(symbol)
     print("-" * 50)
     print('{buy_or_sell} {symbol} position opened successful!'.format(
       buy_or_sell = buy_or_sell.capitalize(),
@@ -392,18 +418,16 @@ class EtoroPrototype():
     
     time.sleep(1)
   
+  @driver_lock
   def close_positions(self, symbols: List[str]):
 
     driver = self.driver
 
-    # Get current opened positions symbol
-    self.update_portfolio_records()
-
     for symbol in symbols:
 
       symbol = symbol.split(' - ')[1]
 
-      if not symbol in self.portfolio_records:
+      if not symbol in self.position_book:
         print("No '{}' position opened!".format(symbol.upper()))
         continue
 
@@ -433,8 +457,10 @@ class EtoroPrototype():
 
         time.sleep(1)
 
+      self.position_book.remove(symbol)
       print('All {} positions closed successful!'.format(symbol.upper()))
   
+  @driver_lock
   def print_history_records(self) -> None:
 
     driver = self.driver
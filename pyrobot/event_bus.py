@@ -0,0 +1,216 @@
+import time
+import asyncio
+import inspect
+
+from dataclasses import dataclass
+from dataclasses import field
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+@dataclass
+class Event():
+  topic: str
+  payload: Any
+  created: float = field(default_factory=time.perf_counter)
+
+
+class Subscription():
+
+  """One subscriber of a topic, with its own bounded queue and worker task."""
+
+  def __init__(self, topic: str, handler: Callable, name: str, queue_size: int, policy: str, threaded: bool) -> None:
+
+    if policy not in ('block', 'drop_oldest'):
+      raise ValueError("Policy allowed: block, drop_oldest, got {policy}".format(policy=policy))
+
+    self.topic = topic
+    self.handler = handler
+    self.name = name
+    self.policy = policy
+    self.threaded = threaded
+    self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    self.task: asyncio.Task = None
+    self.pending = 0
+
+    self.statistics = {'delivered': 0, 'handled': 0, 'dropped': 0, 'error': 0, 'max_depth': 0, 'max_latency': 0.0}
+
+  async def put(self, event: Event) -> None:
+
+    if self.policy == 'drop_oldest' and self.queue.full():
+      self.queue.get_nowait()
+      self.queue.task_done()
+      self.pending -= 1
+      self.statistics['dropped'] += 1
+
+    # Blocks the publisher while the queue is full, that is the backpressure
+    self.pending += 1
+    await self.queue.put(event)
+
+    self.statistics['delivered'] += 1
+    self.statistics['max_depth'] = max(self.statistics['max_depth'], self.queue.qsize())
+
+  async def run(self) -> None:
+
+    while True:
+
+      event = await self.queue.get()
+
+      try:
+        if inspect.iscoroutinefunction(self.handler):
+          await self.handler(event)
+        elif self.threaded:
+          # Keep blocking handlers off the event loop, so the other subscribers go on
+          await asyncio.to_thread(self.handler, event)
+        else:
+          self.handler(event)
+
+        self.statistics['handled'] += 1
+        self.statistics['max_latency'] = max(self.statistics['max_latency'], time.perf_counter() - event.created)
+
+      except Exception as error:
+        self.statistics['error'] += 1
+        print("Subscriber {name} failed on {topic} due to ==> {error}".format(name=self.name, topic=event.topic, error=error))
+
+      finally:
+        self.pending -= 1
+        self.queue.task_done()
+
+
+class EventBus():
+
+  """
+  In-process asyncio publish / subscribe bus.
+
+  Every subscription has its own bounded queue drained by its own task, so
+  a slow subscriber only fills its own queue. When the queue is full the
+  `block` policy makes the publisher wait (backpressure) while the
+  `drop_oldest` policy drops the oldest waiting event, which suits
+  notifications where only the latest event matters.
+  """
+
+  def __init__(self, queue_size: int = 100) -> None:
+    """Initalizes the event bus.
+
+    Arguments:
+    ----
+    queue_size {int} -- Default maximum number of waiting events per subscription. (default: {100})
+    """
+
+    self._queue_size = queue_size
+    self._subscriptions: Dict[str, List[Subscription]] = {}
+    self._started = False
+
+  def subscribe(self, topic: str, handler: Callable, name: str = None, queue_size: int = None,
+                policy: str = 'block', threaded: bool = True) -> Subscription:
+    """Subscribes a handler to a topic.
+
+    Arguments:
+    ----
+    topic {str} -- The topic, for example `bar`.
+
+    handler {Callable} -- Called with every `Event` of the topic, either a coroutine function or a function.
+
+    name {str} -- Name used in the statistics. (default: {handler name})
+
+    queue_size {int} -- Maximum number of waiting events. (default: {the bus queue size})
+
+    policy {str} -- `block` or `drop_oldest` once the queue is full. (default: {'block'})
+
+    threaded {bool} -- Run a plain function handler in a worker thread. (default: {True})
+
+    Returns:
+    ----
+    {Subscription} -- The subscription.
+    """
+
+    subscription = Subscription(
+      topic=topic,
+      handler=handler,
+      name=name or getattr(handler, '__name__', topic),
+      queue_size=queue_size or self._queue_size,
+      policy=policy,
+      threaded=threaded
+    )
+
+    self._subscriptions.setdefault(topic, []).append(subscription)
+
+    if self._started:
+      subscription.task = asyncio.create_task(subscription.run())
+
+    return subscription
+
+  async def publish(self, topic: str, payload: Any) -> Event:
+
+    event = Event(topic=topic, payload=payload)
+
+    for subscription in self._subscriptions.get(topic, []):
+      await subscription.put(event)
+
+    return event
+
+  async def start(self) -> 'EventBus':
+
+    for subscriptions in self._subscriptions.values():
+      for subscription in subscriptions:
+        if subscription.task is None:
+          subscription.task = asyncio.create_task(subscription.run())
+
+    self._started = True
+    return self
+
+  async def join(self) -> None:
+    """Waits until every published event is handled, including the events published by handlers."""
+
+    while any(subscription.pending for subscription in self.subscriptions):
+      for subscription in self.subscriptions:
+        await subscription.queue.join()
+
+  async def stop(self) -> None:
+    """Handles the waiting events, then stops the subscriber tasks."""
+
+    await self.join()
+
+    for subscription in self.subscriptions:
+      if subscription.task is not None:
+        subscription.task.cancel()
+
+    await asyncio.gather(*[subscription.task for subscription in self.subscriptions if subscription.task], return_exceptions=True)
+
+    for subscription in self.subscriptions:
+      subscription.task = None
+
+    self._started = False
+
+  @property
+  def subscriptions(self) -> List[Subscription]:
+    return [subscription for subscriptions in self._subscriptions.values() for subscription in subscriptions]
+
+  def statistics(self) -> Dict[str, dict]:
+    return {subscription.name: dict(subscription.statistics) for subscription in self.subscriptions}
+
+  def print_statistics(self) -> None:
+
+    print("=" * 100)
+    print('Event Bus')
+    print("=" * 100)
+    print('{:<20}{:<12}{:>10}{:>10}{:>10}{:>10}{:>10}{:>16}'.format(
+      'Subscriber', 'Topic', 'Delivered', 'Handled', 'Dropped', 'Error', 'Depth', 'Latency (ms)'))
+    print("-" * 100)
+
+    for subscription in self.subscriptions:
+      statistics = subscription.statistics
+      print('{:<20}{:<12}{:>10}{:>10}{:>10}{:>10}{:>10}{:>16}'.format(
+        subscription.name,
+        subscription.topic,
+        statistics['delivered'],
+        statistics['handled'],
+        statistics['dropped'],
+        statistics['error'],
+        statistics['max_depth'],
+        round(statistics['max_latency'] * 1000, 3)
+      ))
+
+    print("-" * 100)
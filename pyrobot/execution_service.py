@@ -0,0 +1,398 @@
+import time
+import queue
+import functools
+import threading
+import concurrent.futures
+import numpy as np
+import pandas as pd
+
+from collections import OrderedDict
+from collections import deque
+
+from typing import Dict
+from typing import List
+from typing import Union
+
+from pyrobot.broker import Broker
+
+# Put in a lane to wake it up when held orders are released
+_WAKE = object()
+
+class ExecutionService():
+
+  """
+  Executes the strategy signals through a broker in the background.
+
+  Every symbol is assigned to one lane (a worker thread with a bounded
+  queue), so the orders of a symbol run in order, closes before opens,
+  while different symbols run concurrently. Duplicate signals of the same
+  bar are dropped and orders waiting longer than `order_timeout` expire.
+  A broker call taking longer than `call_timeout` is left running on its
+  own thread, so a hung call does not hold up the other symbols of its
+  lane. The later orders of its symbol are held back until it finishes,
+  and its order is reported once it does.
+  Brokers that are not `thread_safe` are called one order at a time, a
+  hung call then holds back the orders of every symbol.
+  """
+
+  def __init__(self, broker: Broker, lanes: int = 4, queue_size: int = 100, put_timeout: float = 1.0,
+               order_timeout: float = 60.0, call_timeout: float = 30.0, dedup_size: int = 10000) -> None:
+    """Initalizes the execution service.
+
+    Arguments:
+    ----
+    broker {pyrobot.Broker} -- The broker the orders are executed through.
+
+    lanes {int} -- Number of worker threads. (default: {4})
+
+    queue_size {int} -- Maximum number of waiting orders per lane. (default: {100})
+
+    put_timeout {float} -- Seconds to wait for room in a full lane before the order is rejected. (default: {1.0})
+
+    order_timeout {float} -- Seconds after which a waiting order is dropped as stale. (default: {60.0})
+
+    call_timeout {float} -- Seconds a broker call may take before the lane moves on to the other
+        symbols, `None` to wait as long as the call takes. (default: {30.0})
+
+    dedup_size {int} -- Number of recent orders remembered to drop duplicates. (default: {10000})
+    """
+
+    self._broker = broker
+    self._broker_lock = None if getattr(broker, 'thread_safe', False) else threading.Lock()
+
+    self._put_timeout = put_timeout
+    self._order_timeout = order_timeout
+    self._call_timeout = call_timeout
+    self._dedup_size = dedup_size
+    self._seen = OrderedDict()
+
+    self._queues = [queue.Queue(maxsize=queue_size) for lane in range(lanes)]
+    self._threads: List[threading.Thread] = []
+
+    # Orders released by a timed out call, run before the lane queue
+    self._ready = [deque() for lane in range(lanes)]
+
+    # Symbol, or `None` for every symbol of a broker not `thread_safe` ==> its timed out calls still running,
+    # and the orders waiting for them
+    self._hung: Dict[str, int] = {}
+    self._held: Dict[str, List[dict]] = {}
+    self._held_lock = threading.Lock()
+
+    self._pending = 0
+    self._pending_condition = threading.Condition()
+
+    self._stats_lock = threading.Lock()
+    self._latencies = deque(maxlen=10000)
+    self._statistics = {}
+    self._statistics['submitted'] = 0
+    self._statistics['executed'] = 0
+    self._statistics['duplicate'] = 0
+    self._statistics['rejected'] = 0
+    self._statistics['expired'] = 0
+    self._statistics['error'] = 0
+    self._statistics['timeout'] = 0
+
+  def start(self) -> 'ExecutionService':
+
+    for index in range(len(self._queues)):
+      thread = threading.Thread(target=self._run_lane, args=(index, f'execution-lane-{index}'), name=f'execution-lane-{index}', daemon=True)
+      thread.start()
+      self._threads.append(thread)
+
+    return self
+
+  def stop(self, timeout: float = None) -> None:
+    """Stops the lanes once the waiting orders, the held ones included, are executed."""
+
+    for lane in self._queues:
+      lane.put(None)
+
+    for thread in self._threads:
+      thread.join(timeout=timeout)
+
+    self._threads = []
+
+  def submit_signals(self, signals: Dict[str, pd.DataFrame]) -> int:
+    """Queues the orders of the `Strategies.get_strategy_signals` signals.
+
+    Returns:
+    ----
+    {int} -- The number of orders queued.
+    """
+
+    orders = OrderedDict()
+
+    # Closes first, so a symbol is closed before it is opened again
+    for action, frame in [('close', signals['close']), ('buy', signals['buys']), ('sell', signals['sells'])]:
+      for label, bar_time in frame.index: # index = '18 - gold', '2021-06-24t06:30:00z' ==> type tuple
+        orders.setdefault(label, []).append((action, bar_time))
+
+    queued = 0
+    for label, symbol_orders in orders.items():
+      for action, bar_time in symbol_orders:
+        if self.submit(symbol=label, action=action, bar_time=bar_time):
+          queued += 1
+
+    return queued
+
+  def submit(self, symbol: str, action: str, bar_time: str = None, **kwargs) -> bool:
+    """Queues one order.
+
+    Arguments:
+    ----
+    symbol {str} -- The StockFrame symbol, for example `18 - gold`.
+
+    action {str} -- `buy`, `sell` or `close`.
+
+    bar_time {str} -- The bar the signal comes from, used to drop duplicates. (default: {None})
+
+    Returns:
+    ----
+    {bool} -- `True` if the order was queued.
+    """
+
+    key = (symbol, action, bar_time)
+
+    with self._stats_lock:
+      if bar_time is not None and key in self._seen:
+        self._statistics['duplicate'] += 1
+        return False
+
+      self._seen[key] = True
+      while len(self._seen) > self._dedup_size:
+        self._seen.popitem(last=False)
+
+    order = {
+      'symbol': symbol,
+      'action': action,
+      'bar_time': bar_time,
+      'kwargs': kwargs,
+      'created': time.monotonic(),
+    }
+
+    # The same symbol always goes to the same lane
+    lane = self._queues[self._lane_index(symbol)]
+
+    with self._pending_condition:
+      self._pending += 1
+
+    try:
+      lane.put(order, timeout=self._put_timeout)
+    except queue.Full:
+      self._done()
+      with self._stats_lock:
+        self._statistics['rejected'] += 1
+      print("Unable to queue {action} {symbol} order due to the full queue.".format(action=action, symbol=symbol.upper()))
+      return False
+
+    with self._stats_lock:
+      self._statistics['submitted'] += 1
+
+    return True
+
+  def wait(self, timeout: float = None) -> bool:
+    """Waits until every queued order is executed.
+
+    Returns:
+    ----
+    {bool} -- `False` if the timeout passed first.
+    """
+
+    with self._pending_condition:
+      return self._pending_condition.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+  def print_history_records(self, timeout: float = None) -> None:
+    """Waits for the queued orders, then prints the broker statistics and the order latencies."""
+
+    self.wait(timeout=timeout)
+    self._call(self._broker.print_history_records)
+
+    statistics = self.statistics()
+
+    print("=" * 50)
+    print('Execution')
+    print("=" * 50)
+    print('Submitted:       {}'.format(statistics['submitted']))
+    print('Executed:        {}'.format(statistics['executed']))
+    print('Duplicate:       {}'.format(statistics['duplicate']))
+    print('Rejected:        {}'.format(statistics['rejected']))
+    print('Expired:         {}'.format(statistics['expired']))
+    print('Timed out:       {}'.format(statistics['timeout']))
+    print('Error occur:     {}'.format(statistics['error']))
+    print("-" * 50)
+    print('Latency p50:     {} ms'.format(round(statistics['latency_p50'], 3)))
+    print('Latency p95:     {} ms'.format(round(statistics['latency_p95'], 3)))
+    print('Latency max:     {} ms'.format(round(statistics['latency_max'], 3)))
+    print("-" * 50)
+
+  def statistics(self) -> Dict[str, float]:
+    """Returns the order counts and the submit to done latencies in milliseconds."""
+
+    with self._stats_lock:
+      statistics = dict(self._statistics)
+      latencies = np.array(self._latencies, dtype=np.float64) * 1000
+
+    if len(latencies):
+      statistics['latency_p50'] = float(np.percentile(latencies, 50))
+      statistics['latency_p95'] = float(np.percentile(latencies, 95))
+      statistics['latency_max'] = float(latencies.max())
+    else:
+      statistics['latency_p50'] = statistics['latency_p95'] = statistics['latency_max'] = 0.0
+
+    return statistics
+
+  def _call(self, func, **kwargs):
+
+    if self._broker_lock is None:
+      return func(**kwargs)
+
+    with self._broker_lock:
+      return func(**kwargs)
+
+  def _done(self) -> None:
+
+    with self._pending_condition:
+      self._pending -= 1
+      self._pending_condition.notify_all()
+
+  def _lane_index(self, symbol: str) -> int:
+
+    return hash(symbol) % len(self._queues)
+
+  def _hold_key(self, symbol: str) -> Union[str, None]:
+
+    # A hung call of a broker not `thread_safe` keeps the broker lock, every symbol waits for it
+    return symbol if self._broker_lock is None else None
+
+  def _run_lane(self, index: int, name: str) -> None:
+
+    lane = self._queues[index]
+    ready = self._ready[index]
+
+    # The broker calls run on a caller thread, the lane only waits `call_timeout` for them
+    caller = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+    stopping = False
+
+    while True:
+
+      # Together, so the released orders are not missed when stopping
+      with self._held_lock:
+        order = ready.popleft() if ready else None
+        if order is None and stopping and not self._held:
+          break
+
+      if order is None:
+        order = lane.get()
+        if order is None:
+          stopping = True
+          continue
+        if order is _WAKE:
+          continue
+
+      key = self._hold_key(order['symbol'])
+
+      with self._held_lock:
+        if key in self._held:
+          self._held[key].append(order)
+          continue
+
+      call = self._execute(order=order, caller=caller)
+
+      if call is None:
+        self._done()
+        continue
+
+      # The hung call keeps its thread and the later orders of its symbol wait for it, the next orders get a new thread
+      with self._held_lock:
+        self._hung[key] = self._hung.get(key, 0) + 1
+        self._held.setdefault(key, [])
+
+      call.add_done_callback(functools.partial(self._release, order, key))
+
+      caller.shutdown(wait=False)
+      caller = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    caller.shutdown(wait=False)
+
+  def _release(self, order: dict, key: Union[str, None], call: concurrent.futures.Future) -> None:
+    """Reports the timed out order once its call finished, and hands the held orders back to their lanes
+    once no call they wait for is running."""
+
+    self._report(order=order, call=call)
+
+    with self._held_lock:
+      self._hung[key] -= 1
+      if not self._hung[key]:
+        del self._hung[key]
+        for held_order in self._held.pop(key):
+          self._ready[self._lane_index(held_order['symbol'])].append(held_order)
+
+    self._done()
+
+    # The lanes may be waiting on their queue, or for the held orders to stop
+    for lane in self._queues:
+      try:
+        lane.put_nowait(_WAKE)
+      except queue.Full:
+        pass
+
+  def _execute(self, order: dict, caller: concurrent.futures.ThreadPoolExecutor) -> Union[concurrent.futures.Future, None]:
+    """Executes the order on the caller thread.
+
+    Returns:
+    ----
+    {Union[concurrent.futures.Future, None]} -- The broker call if it timed out, its order is not reported
+        yet, or `None` once the order is done.
+    """
+
+    # Drop stale orders
+    if time.monotonic() - order['created'] > self._order_timeout:
+      with self._stats_lock:
+        self._statistics['expired'] += 1
+      print("{action} {symbol} order expired.".format(action=order['action'].capitalize(), symbol=order['symbol'].upper()))
+      return None
+
+    if order['action'] == 'close':
+      call = caller.submit(self._call, self._broker.close_positions, symbols=[order['symbol']])
+    else:
+      call = caller.submit(
+        self._call,
+        self._broker.open_position,
+        symbol=order['symbol'].split(" - ")[1].upper(),
+        buy_or_sell=order['action'],
+        **order['kwargs']
+      )
+
+    concurrent.futures.wait([call], timeout=self._call_timeout)
+
+    if not call.done():
+      with self._stats_lock:
+        self._statistics['timeout'] += 1
+      print("The broker did not answer the {action} {symbol} order within {timeout} seconds, the next {symbol} orders wait for it.".format(
+        action=order['action'],
+        symbol=order['symbol'].upper(),
+        timeout=self._call_timeout)
+      )
+      return call
+
+    self._report(order=order, call=call)
+
+    return None
+
+  def _report(self, order: dict, call: concurrent.futures.Future) -> None:
+
+    error = call.exception()
+
+    if error is not None:
+      with self._stats_lock:
+        self._statistics['error'] += 1
+      print("Unable to execute {action} {symbol} order due to ==> {error}".format(
+        action=order['action'],
+        symbol=order['symbol'].upper(),
+        error=error)
+      )
+      return
+
+    with self._stats_lock:
+      self._statistics['executed'] += 1
+      self._latencies.append(time.monotonic() - order['created'])
@@ -0,0 +1,249 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from pyrobot.stock_frame import StockFrame
+from pyrobot.indicators import Indicators
+from pyrobot.dataset import WindowDataset
+from pyrobot.file_utils import atomic_folder
+
+# Bump when the way the features are built changes, so older cache entries are not reused
+FEATURES_VERSION = 1
+
+class FeatureSet():
+
+  """
+  The feature tensors of a `FeaturePipeline`, one contiguous (bars, features)
+  float array per instrument, memory mapped from the cache folder.
+  """
+
+  def __init__(self, path: str) -> None:
+    """Initalizes the feature set.
+
+    Arguments:
+    ----
+    path {str} -- The cache entry folder written by `FeaturePipeline.build`.
+    """
+
+    with open(os.path.join(path, 'meta.json'), 'r') as meta_file:
+      self._meta = json.load(meta_file)
+
+    self._path = path
+    self._features: Dict[str, np.ndarray] = {}
+    self._times: Dict[str, np.ndarray] = {}
+
+    for number, instrument in enumerate(self._meta['instruments']):
+      self._features[instrument] = np.load(os.path.join(path, 'features_{}.npy'.format(number)), mmap_mode='r')
+      self._times[instrument] = np.load(os.path.join(path, 'times_{}.npy'.format(number)), mmap_mode='r')
+
+  @property
+  def columns(self) -> List[str]:
+    return self._meta['columns']
+
+  @property
+  def instruments(self) -> List[str]:
+    return self._meta['instruments']
+
+  def features(self, instrument: str) -> np.ndarray:
+    """Returns the scaled (bars, features) array of an instrument."""
+
+    return self._features[instrument]
+
+  def times(self, instrument: str) -> np.ndarray:
+    """Returns the epoch seconds of the bars of an instrument."""
+
+    return self._times[instrument]
+
+  def transform(self, values: np.ndarray, column: str) -> np.ndarray:
+    """Scales values of a column like the features."""
+
+    number = self.columns.index(column)
+    return (np.asarray(values) - self._meta['mean'][number]) / self._meta['std'][number]
+
+  def inverse_transform(self, values: np.ndarray, column: str) -> np.ndarray:
+    """Scales feature values of a column back, e.g. predicted closes."""
+
+    number = self.columns.index(column)
+    return np.asarray(values) * self._meta['std'][number] + self._meta['mean'][number]
+
+  def dataset(self, target: str = 'close', window: int = 160, horizon: int = 1) -> WindowDataset:
+    """Returns the sliding windows over the features, `dataset.batches()` streams them to a trainer."""
+
+    return WindowDataset.from_arrays(
+      arrays=self._features,
+      features=self.columns,
+      target=target,
+      window=window,
+      horizon=horizon,
+      offset=self._meta['mean'],
+      scale=self._meta['std'],
+      steps=[tuple(step) for step in self._meta['steps']]
+    )
+
+
+class FeaturePipeline():
+
+  """
+  Materializes indicator features for ML models.
+
+  The pipeline runs a list of `Indicators` calls on a copy of the price
+  columns, trims the NaN warm-up of every instrument, standardizes the
+  columns with a scaler fitted on all the instruments and writes one
+  float32 tensor per instrument to the cache. The cache key is a digest
+  of the candles, the calls and the columns, so an experiment asking for
+  the same features again only maps the cached files.
+  """
+
+  price_columns = ['open', 'high', 'low', 'close', 'volume']
+
+  def __init__(self, steps: List[Tuple[str, Dict[str, Any]]], columns: List[str] = None, scale: bool = True,
+               path: str = '.feature_cache', dtype: type = np.float32) -> None:
+    """Initalizes the feature pipeline.
+
+    Arguments:
+    ----
+    steps {List[Tuple[str, Dict[str, Any]]]} -- The `Indicators` calls, e.g. `[('rsi', {'period': 14}), ('macd', {})]`.
+
+    columns {List[str]} -- The feature columns. (default: {the price columns and every column the steps add})
+
+    scale {bool} -- Standardize every column with the mean and the deviation of all instruments. (default: {True})
+
+    path {str} -- The cache folder. (default: {'.feature_cache'})
+
+    dtype {type} -- The feature type. (default: {np.float32})
+    """
+
+    for name, args in steps:
+      if not callable(getattr(Indicators, name, None)):
+        raise ValueError("Indicators has no {name} indicator".format(name=name))
+
+    self._steps = [(name, dict(args)) for name, args in steps]
+    self._columns = columns
+    self._scale = scale
+    self._path = path
+    self._dtype = np.dtype(dtype)
+
+    self.hits = 0
+    self.misses = 0
+
+  def key(self, stock_frame: StockFrame) -> str:
+    """Returns the cache key of the features of the StockFrame."""
+
+    frame = stock_frame.frame
+    columns = [column for column in self.price_columns if column in frame.columns]
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(pd.util.hash_pandas_object(frame[columns], index=True).to_numpy().tobytes())
+    digest.update(repr((FEATURES_VERSION, self._steps, self._columns, self._scale, self._dtype.str)).encode())
+
+    return digest.hexdigest()
+
+  def build(self, stock_frame: StockFrame) -> FeatureSet:
+    """Returns the features of the StockFrame, from the cache when they were built before.
+
+    Arguments:
+    ----
+    stock_frame {pyrobot.StockFrame} -- The candles, left unchanged.
+
+    Returns:
+    ----
+    {FeatureSet} -- The features.
+    """
+
+    folder = os.path.join(self._path, self.key(stock_frame=stock_frame))
+
+    if os.path.exists(os.path.join(folder, 'meta.json')):
+      self.hits += 1
+      return FeatureSet(path=folder)
+
+    self.misses += 1
+
+    frame = self._compute(stock_frame=stock_frame)
+    self._write(frame=frame, folder=folder)
+
+    return FeatureSet(path=folder)
+
+  def _compute(self, stock_frame: StockFrame) -> pd.DataFrame:
+
+    # The indicators add their columns to a copy, not to the caller's frame
+    price_columns = [column for column in self.price_columns if column in stock_frame.frame.columns]
+    feature_frame = StockFrame.from_frame(frame=stock_frame.frame[price_columns].copy(), period=stock_frame.period)
+
+    indicator_client = Indicators(price_data_frame=feature_frame)
+
+    for name, args in self._steps:
+      getattr(indicator_client, name)(**args)
+
+    frame = feature_frame.frame
+
+    if self._columns is None:
+      columns = price_columns + [column for column in frame.columns if column not in price_columns and frame[column].dtype.kind in 'fiub']
+    else:
+      missing = set(self._columns).difference(frame.columns)
+      if missing:
+        raise KeyError("The following feature columns are missing after the steps: {missing}".format(missing=missing))
+      columns = list(self._columns)
+
+    return frame[columns].astype(np.float64)
+
+  def _write(self, frame: pd.DataFrame, folder: str) -> None:
+
+    os.makedirs(self._path, exist_ok=True)
+
+    instruments = []
+    tensors = []
+    times = []
+
+    frame_values = frame.to_numpy()
+
+    for instrument, rows in frame.groupby(level=0, sort=False).indices.items():
+
+      values = frame_values[rows]
+
+      # Trim the warm-up, up to the first bar every feature is set
+      complete = np.flatnonzero(~np.isnan(values).any(axis=1))
+      if not len(complete):
+        continue
+
+      values = values[complete[0]:]
+
+      # Later gaps keep the last value
+      values = pd.DataFrame(values).ffill().to_numpy()
+
+      instruments.append(instrument)
+      tensors.append(values)
+      times.append(pd.to_datetime(frame.index.get_level_values(1)[rows][complete[0]:], format='%Y-%m-%dt%H:%M:%Sz').asi8 // 10**9)
+
+    if not tensors:
+      raise ValueError("No instrument has a bar with every feature set, the warm-up is longer than the candles.")
+
+    # The scaler is fitted on all the instruments
+    stacked = np.concatenate(tensors)
+    mean = stacked.mean(axis=0) if self._scale else np.zeros(stacked.shape[1])
+    std = stacked.std(axis=0) if self._scale else np.ones(stacked.shape[1])
+    std = np.where(std > 0, std, 1.0)
+
+    # Built by another process meanwhile, the existing entry is kept
+    with atomic_folder(folder, exist_ok=True) as temp_folder:
+
+      for number, (values, bar_times) in enumerate(zip(tensors, times)):
+        np.save(os.path.join(temp_folder, 'features_{}.npy'.format(number)), np.ascontiguousarray((values - mean) / std, dtype=self._dtype))
+        np.save(os.path.join(temp_folder, 'times_{}.npy'.format(number)), bar_times.astype(np.int64))
+
+      meta = {
+        'instruments': instruments,
+        'columns': list(frame.columns),
+        'steps': self._steps,
+        'mean': mean.tolist(),
+        'std': std.tolist(),
+      }
+
+      with open(os.path.join(temp_folder, 'meta.json'), 'w') as meta_file:
+        json.dump(meta, meta_file)
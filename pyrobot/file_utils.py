@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import contextlib
+
+from typing import IO
+from typing import Iterator
+
+@contextlib.contextmanager
+def atomic_write(path: str, mode: str = 'w', durable: bool = False) -> Iterator[IO]:
+  """Writes a file through a temporary file renamed over `path` once complete.
+
+  Readers, and other processes sharing a cache folder, see either the old
+  file or the new one, never a partial write. Nothing is replaced if the
+  writing raises.
+
+  Arguments:
+  ----
+  path {str} -- The file path.
+
+  mode {str} -- `w` for text, `wb` for bytes. (default: {'w'})
+
+  durable {bool} -- Flushes the file to the disk before the rename, so it survives
+      a power loss too, e.g. for a checkpoint. (default: {False})
+
+  Usage:
+  ----
+      >>> with atomic_write('entry.json') as entry_file:
+              json.dump(entry, entry_file)
+  """
+
+  handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+
+  try:
+    with os.fdopen(handle, mode) as temp_file:
+      yield temp_file
+
+      if durable:
+        temp_file.flush()
+        os.fsync(temp_file.fileno())
+
+    os.replace(temp_path, path)
+
+  except BaseException:
+    if os.path.exists(temp_path):
+      os.remove(temp_path)
+    raise
+
+@contextlib.contextmanager
+def atomic_folder(path: str, exist_ok: bool = False) -> Iterator[str]:
+  """Fills a temporary folder renamed to `path` once complete.
+
+  Arguments:
+  ----
+  path {str} -- The folder path, it must not exist yet.
+
+  exist_ok {bool} -- Keeps the existing folder when `path` was created meanwhile, e.g.
+      the same cache entry built by another process, instead of raising. (default: {False})
+
+  Usage:
+  ----
+      >>> with atomic_folder('models/lstm/v2') as folder:
+              np.save(os.path.join(folder, 'weights.npy'), weights)
+  """
+
+  temp_folder = tempfile.mkdtemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+
+  try:
+    yield temp_folder
+  except BaseException:
+    shutil.rmtree(temp_folder, ignore_errors=True)
+    raise
+
+  try:
+    os.rename(temp_folder, path)
+  except OSError:
+    shutil.rmtree(temp_folder, ignore_errors=True)
+    if not (exist_ok and os.path.isdir(path)):
+      raise
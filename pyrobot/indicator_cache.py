@@ -0,0 +1,264 @@
+import os
+import pickle
+import hashlib
+import inspect
+import functools
+import pandas as pd
+
+from collections import OrderedDict
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from pyrobot.file_utils import atomic_write
+
+# Bump when the layout of the entries changes, so older entries are not reused
+CACHE_VERSION = 2
+
+class IndicatorCache():
+
+  """
+  Content addressed cache for indicator outputs.
+
+  The key of an entry is a digest of the input price arrays of every
+  instrument together with the indicator name and its arguments, so an
+  entry is only reused when the candles and the arguments are unchanged.
+  Entries are kept in an in-memory LRU tier and, when a `path` is given,
+  in an on-disk tier that survives between runs.
+  """
+
+  # Columns every indicator may read
+  price_columns = ['open', 'high', 'low', 'close', 'volume']
+
+  def __init__(self, path: str = '.indicator_cache', memory_size: int = 128, disk_size: int = 512 * 1024 * 1024) -> None:
+    """Initalizes the indicator cache.
+
+    Arguments:
+    ----
+    path {str} -- Folder of the on-disk tier, `None` to only cache in memory. (default: {'.indicator_cache'})
+
+    memory_size {int} -- Maximum number of entries kept in memory. (default: {128})
+
+    disk_size {int} -- Maximum size in bytes of the on-disk tier, the least recently
+        used entries are removed once it is exceeded. (default: {512 MB})
+    """
+
+    self._path = path
+    self._memory_size = memory_size
+    self._disk_size = disk_size
+    self._memory = OrderedDict()
+
+    self.hits = 0
+    self.misses = 0
+
+    if self._path:
+      os.makedirs(self._path, exist_ok=True)
+
+  def fingerprint(self, frame: pd.DataFrame, columns: List[str]) -> str:
+    """Returns a digest of the given columns, instrument by instrument.
+
+    Arguments:
+    ----
+    frame {pd.DataFrame} -- The multi-index StockFrame frame.
+
+    columns {List[str]} -- The input columns of the indicator.
+
+    Returns:
+    ----
+    {str} -- The combined digest of all the instruments.
+    """
+
+    columns = [column for column in columns if column in frame.columns]
+    hashes = pd.util.hash_pandas_object(frame[columns], index=True).to_numpy()
+
+    digest = hashlib.blake2b(repr(columns).encode(), digest_size=20)
+
+    # Hash each instrument separately so its position in the frame does not matter
+    for symbol, rows in sorted(frame.groupby(level=0).indices.items()):
+      instrument = hashlib.blake2b(hashes[rows].tobytes(), digest_size=20)
+      digest.update(str(symbol).encode())
+      digest.update(instrument.digest())
+
+    return digest.hexdigest()
+
+  def key(self, fingerprint: str, name: str, args: Dict[str, Any]) -> str:
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(CACHE_VERSION).encode())
+    digest.update(fingerprint.encode())
+    digest.update(name.encode())
+    digest.update(repr(sorted(args.items())).encode())
+
+    return digest.hexdigest()
+
+  def get(self, key: str) -> Any:
+    """Returns the cached entry, or `None` if the key is not cached."""
+
+    # Memory tier
+    if key in self._memory:
+      self._memory.move_to_end(key)
+      self.hits += 1
+      return self._memory[key]
+
+    # Disk tier
+    if self._path:
+      file_path = os.path.join(self._path, key + '.pkl')
+
+      try:
+        with open(file_path, 'rb') as cache_file:
+          entry = pickle.load(cache_file)
+
+        # Mark as recently used for the eviction
+        os.utime(file_path)
+
+      except (OSError, EOFError, pickle.UnpicklingError):
+        entry = None
+
+      if entry is not None:
+        self._remember(key, entry)
+        self.hits += 1
+        return entry
+
+    self.misses += 1
+    return None
+
+  def set(self, key: str, entry: Any) -> None:
+
+    self._remember(key, entry)
+
+    if self._path:
+
+      with atomic_write(os.path.join(self._path, key + '.pkl'), mode='wb') as cache_file:
+        pickle.dump(entry, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+      self._evict_disk()
+
+  def clear(self) -> None:
+
+    self._memory.clear()
+
+    if self._path:
+      for file_name in os.listdir(self._path):
+        if file_name.endswith('.pkl'):
+          os.remove(os.path.join(self._path, file_name))
+
+  def _remember(self, key: str, entry: Any) -> None:
+
+    self._memory[key] = entry
+    self._memory.move_to_end(key)
+
+    while len(self._memory) > self._memory_size:
+      self._memory.popitem(last=False)
+
+  def _evict_disk(self) -> None:
+
+    files = []
+    total_size = 0
+
+    for file_name in os.listdir(self._path):
+      if not file_name.endswith('.pkl'):
+        continue
+
+      try:
+        stat = os.stat(os.path.join(self._path, file_name))
+      except OSError:
+        continue
+
+      files.append((stat.st_mtime, stat.st_size, file_name))
+      total_size += stat.st_size
+
+    # Remove the least recently used entries first
+    for mtime, size, file_name in sorted(files):
+      if total_size <= self._disk_size:
+        break
+
+      try:
+        os.remove(os.path.join(self._path, file_name))
+      except OSError:
+        pass
+
+      total_size -= size
+
+def cached_indicator(func: Callable) -> Callable:
+  """Caches the columns an `Indicators` method adds to the frame.
+
+  Only the outermost indicator call is cached, indicators called inside it
+  (like `sma` inside `awesome_oscillator`) are computed as usual on a miss
+  and restored together with the outer indicator on a hit.
+
+  The columns are stored with the rows they were computed for, a hit on the
+  same candles in another instrument order is realigned to the frame.
+  Only the first run of an indicator on a frame is stored, a run over
+  columns it wrote before would have to compare every column.
+  """
+
+  signature = inspect.signature(func)
+
+  @functools.wraps(func)
+  def wrapper(self, *args, **kwargs):
+
+    cache: IndicatorCache = self._cache
+
+    if cache is None or self._cache_depth > 0:
+      return func(self, *args, **kwargs)
+
+    # Arguments as `Indicators` records them
+    bound = signature.bind(self, *args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    del arguments['self']
+
+    frame = self._frame
+    columns = list(cache.price_columns)
+    if arguments.get('field') is not None:
+      columns.append(arguments['field'])
+
+    key = cache.key(cache.fingerprint(frame, columns), func.__name__, arguments)
+    entry = cache.get(key)
+
+    # Restore the cached columns and indicators
+    if entry is not None:
+      index, outputs, registered = entry
+
+      # Same candles, the instruments may be in another order
+      positions = None if index.equals(frame.index) else index.get_indexer(frame.index)
+
+      for column_name, values in outputs.items():
+        frame[column_name] = values if positions is None else values[positions]
+
+      for column_name, func_name, indicator_args in registered:
+        self._current_indicators[column_name] = {}
+        self._current_indicators[column_name]['args'] = indicator_args
+        self._current_indicators[column_name]['func'] = getattr(self, func_name)
+
+      return frame
+
+    # Compute the indicator and keep the columns it added
+    before_columns = set(frame.columns)
+    before_indicators = dict(self._current_indicators)
+
+    self._cache_depth += 1
+    try:
+      result = func(self, *args, **kwargs)
+    finally:
+      self._cache_depth -= 1
+
+    registered: List[Tuple[str, str, dict]] = []
+    for column_name, indicator in self._current_indicators.items():
+      if before_indicators.get(column_name) is not indicator:
+        registered.append((column_name, indicator['func'].__name__, indicator['args']))
+
+    # A run over its own columns, e.g. after new rows, is not stored
+    if any(column_name in before_indicators for column_name, _, _ in registered):
+      return result
+
+    outputs = {column: frame[column].to_numpy() for column in frame.columns if column not in before_columns}
+
+    cache.set(key, (frame.index, outputs, registered))
+
+    return result
+
+  return wrapper
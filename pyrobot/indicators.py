@@ -4,9 +4,22 @@ import math
 
 from typing import Any
 from typing import Dict
+from typing import List
+from typing import Tuple
 from typing import Union
 
 from pyrobot.stock_frame import StockFrame
+from pyrobot.indicator_cache import IndicatorCache
+from pyrobot.indicator_cache import cached_indicator
+from pyrobot.session_calendar import get_calendar
+from pyrobot.session_calendar import bar_timestamps
+from pyrobot.rolling import GroupedRollingExtrema
+from pyrobot.rolling import GroupedRollingMoments
+from pyrobot.scan import GroupedScan
+from pyrobot.scan import wilder_step
+from pyrobot.scan import heikin_ashi_step
+from pyrobot.scan import supertrend_step
+from pyrobot.scan import parabolic_sar_step
 
 class Indicators():
 
@@ -15,13 +28,36 @@ class Indicators():
     to easily add technical indicators to a StockFrame.
     """    
     
-    def __init__(self, price_data_frame: StockFrame) -> None:
+    # Bars read on top of the period arguments, e.g. the alligator jaw is a 13 bar SMMA shifted by 8
+    _fixed_lookbacks = {
+        'alligator': 21,
+        'awesome_oscillator': 34,
+        'fractal': 5,
+        'fractal_chaos_oscillator': 5,
+        'heikin_ashi': 2,
+        'macd': 9,
+        'mass_index': 25,
+        'parabolic_sar': 50,
+        'stochastic_momentum_index': 6,
+        'supertrend': 2,
+    }
+
+    # Indicators carrying state from bar to bar
+    _recursive_indicators = {
+        'rsi', 'smma', 'ema', 'alligator', 'heikin_ashi', 'awesome_oscillator', 'average_true_range', 'supertrend',
+        'macd', 'mass_index', 'chaikin_oscillator', 'parabolic_sar',
+    }
+
+    def __init__(self, price_data_frame: StockFrame, cache: IndicatorCache = None) -> None:
         """Initalizes the Indicator Client.
 
         Arguments:
         ----
         price_data_frame {pyrobot.StockFrame} -- The price data frame which is used to add indicators to.
             At a minimum this data frame must have the following columns: `['timestamp','close','open','high','low']`.
+
+        cache {pyrobot.IndicatorCache} -- Reuses the indicator columns of earlier runs on the same
+            candles and arguments instead of computing them again. (default: {None})
         
         Usage:
         ----
@@ -40,7 +76,9 @@ class Indicators():
         self._price_groups = price_data_frame.symbol_groups
         self._current_indicators = {}
         self._indicator_signals = {}
-        self._frame = self._stock_frame.frame
+        self._cache = cache
+        self._cache_depth = 0
+        self._rolling_states = {}
 
         self._indicators_crossover_key = []
         self._indicators_comp_key = []
@@ -203,7 +241,15 @@ class Indicators():
         price_data_frame {pd.DataFrame} -- A multi-index data frame.
         """
 
-        self._frame = price_data_frame
+        self._stock_frame._frame = price_data_frame
+
+        # The groups and the kept states belong to the bars of the previous frame
+        self._price_groups = self._stock_frame.symbol_groups
+        self._rolling_states = {}
+
+    @property
+    def _frame(self) -> pd.DataFrame:
+        return self._stock_frame.frame
 
     @property
     def is_multi_index(self) -> bool:
@@ -219,6 +265,7 @@ class Indicators():
         else:
             return False
 
+    @cached_indicator
     def change_in_price(self, column_name: str = 'change_in_price') -> pd.DataFrame:
         """Calculates the Change in Price.
 
@@ -240,6 +287,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def rsi(self, period: int = 14, method: str = 'wilders', ema: bool = True, column_name: str = 'rsi') -> pd.DataFrame:
         """Calculates the Relative Strength Index (RSI).
 
@@ -249,7 +297,8 @@ class Indicators():
 
         Keyword Arguments:
         ----
-        method {str} -- The calculation methodology. (default: {'wilders'})
+        method {str} -- The calculation methodology, `wilders` for Wilder's smoothing or `ewm` for the
+            exponential moving average used before. (default: {'wilders'})
 
         Returns:
         ----
@@ -316,24 +365,35 @@ class Indicators():
         close_delta = self._price_groups['close'].diff()
 
         # Make two series: one for lower closes and one for higher closes
-        up = close_delta.clip(lower=0)
-        down = -1 * close_delta.clip(upper=0)
+        self._frame['rsi_up'] = close_delta.clip(lower=0)
+        self._frame['rsi_down'] = -1 * close_delta.clip(upper=0)
         
-        if ema == True:
-            # Use exponential moving average
-            ma_up = up.ewm(com = period - 1, adjust=True, min_periods = period).mean()
-            ma_down = down.ewm(com = period - 1, adjust=True, min_periods = period).mean()
+        if ema == True and method == 'ewm':
+            # Use exponential moving average, per instrument
+            ma_up = self._frame.groupby(level=0)['rsi_up'].transform(lambda x: x.ewm(com=period - 1, adjust=True, min_periods=period).mean())
+            ma_down = self._frame.groupby(level=0)['rsi_down'].transform(lambda x: x.ewm(com=period - 1, adjust=True, min_periods=period).mean())
+        elif ema == True:
+            # Use Wilder's smoothing, per instrument
+            ma_up, ma_down = self._scan(step=wilder_step, fields=['rsi_up', 'rsi_down'], params=[period], state_size=4, output_size=2).T
         else:
             # Use simple moving average
-            ma_up = up.rolling(window = period).mean()
-            ma_down = down.rolling(window = period).mean()
+            ma_up = self._rolling_moments(field='rsi_up', window=period)[0]
+            ma_down = self._rolling_moments(field='rsi_down', window=period)[0]
             
         rsi = ma_up / ma_down
         rsi = 100 - (100/(1 + rsi))
         self._frame[column_name] = rsi
 
+        # Clean up before sending back.
+        self._frame.drop(
+            labels=['rsi_up', 'rsi_down'],
+            axis=1,
+            inplace=True
+        )
+
         return self._frame
 
+    @cached_indicator
     def sma(self, period: int, field: str = 'close', column_name: str = 'sma') -> pd.DataFrame:
         """Calculates the Simple Moving Average (SMA).
 
@@ -374,13 +434,19 @@ class Indicators():
 
         return self._frame
     
-    def smma(self, period: int, field: str = 'close', column_name: str = 'smma') -> pd.DataFrame:
+    @cached_indicator
+    def smma(self, period: int, field: str = 'close', method: str = 'wilders', column_name: str = 'smma') -> pd.DataFrame:
         """Calculates the Smoothed Moving Average (SMMA).
 
         Arguments:
         ----
         period {int} -- The number of periods to use when calculating the SMMA.
 
+        Keyword Arguments:
+        ----
+        method {str} -- The calculation methodology, `wilders` for Wilder's smoothing or `ewm` for the
+            exponential moving average used before. (default: {'wilders'})
+
         Returns:
         ----
         {pd.DataFrame} -- A Pandas data frame with the SMMA indicator included.
@@ -408,10 +474,13 @@ class Indicators():
         # Calculate medium
         self._frame['medium'] = (self._frame['high'] + self._frame['low']) / 2
 
-        # Add the SMMA
-        self._frame[column_name] = self._price_groups['medium'].transform(
-            lambda x: x.ewm(span=(2 * period - 1)).mean()
-        )
+        # Add the SMMA, per instrument
+        if method == 'ewm':
+            self._frame[column_name] = self._price_groups['medium'].transform(
+                lambda x: x.ewm(span=(2 * period - 1)).mean()
+            )
+        else:
+            self._frame[column_name] = self._scan(step=wilder_step, fields=['medium'], params=[period], state_size=2)[:, 0]
 
         # Clean up before sending back.
         self._frame.drop(
@@ -422,6 +491,7 @@ class Indicators():
 
         return self._frame 
 
+    @cached_indicator
     def ema(self, period: int, field: str = 'close', alpha: float = 0.0, column_name = 'ema') -> pd.DataFrame:
         """Calculates the Exponential Moving Average (EMA).
 
@@ -464,6 +534,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def rate_of_change(self, period: int = 1, column_name: str = 'rate_of_change') -> pd.DataFrame:
         """Calculates the Rate of Change (ROC).
 
@@ -502,7 +573,8 @@ class Indicators():
 
         return self._frame        
     
-    def alligator(self, column_name: str = 'alligator') -> pd.DataFrame:
+    @cached_indicator
+    def alligator(self, method: str = 'wilders', column_name: str = 'alligator') -> pd.DataFrame:
 
         locals_data = locals()
         del locals_data['self']
@@ -512,9 +584,9 @@ class Indicators():
         self._current_indicators[column_name]['func'] = self.alligator
 
         # Calculate alligator's lips, teeth, jaws
-        self.smma(period = 5,  column_name = 'lips')  # Green
-        self.smma(period = 8,  column_name = 'teeth') # Red
-        self.smma(period = 13, column_name = 'jaw')  # Blue
+        self.smma(period = 5,  method = method, column_name = 'lips')  # Green
+        self.smma(period = 8,  method = method, column_name = 'teeth') # Red
+        self.smma(period = 13, method = method, column_name = 'jaw')  # Blue
 
         # Move to offest
         self._frame['lips'] = self._price_groups['lips'].shift(3)
@@ -523,6 +595,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def awesome_oscillator(self, column_name: str = 'awesome_oscillator') -> pd.DataFrame:
 
         # Calculation
@@ -550,6 +623,7 @@ class Indicators():
 
         return self._frame
     
+    @cached_indicator
     def donchian_channel(self, high_period: int = 20, low_period: int = 20, column_name: str = 'donchian_channel') -> pd.DataFrame:
 
         locals_data = locals()
@@ -560,14 +634,10 @@ class Indicators():
         self._current_indicators[column_name]['func'] = self.donchian_channel
 
         # Calculate donchian upper channel
-        self._frame['donchian_upper'] = self._price_groups['high'].transform(
-            lambda x: x.rolling(window=high_period).max()
-        )
+        self._frame['donchian_upper'] = self._rolling_extreme(field='high', window=high_period, maximum=True)
 
         # Calculate donchian lower channel
-        self._frame['donchian_lower'] = self._price_groups['low'].transform(
-            lambda x: x.rolling(window=low_period).min()
-        )
+        self._frame['donchian_lower'] = self._rolling_extreme(field='low', window=low_period, maximum=False)
 
         # Calculate donchian middle channel
         self._frame['donchian_middle'] = (self._frame['donchian_upper'] + self._frame['donchian_lower']) / 2
@@ -579,13 +649,15 @@ class Indicators():
 
         return self._frame   
 
-    def trading_within(self, start_time: str = '00:00:00', end_time: str = '23:59:59', column_name: str = 'trading_within') -> pd.DataFrame:
+    @cached_indicator
+    def trading_within(self, start_time: str = '00:00:00', end_time: str = '23:59:59', asset_class: str = None, column_name: str = 'trading_within') -> pd.DataFrame:
         """Only able to trade within the time.
 
         Arguments:
         ----
         start_time {str} -- The starting time. (example: 10:30:00)
         end_time {str} -- The ending time. (example: 10:30:00)
+        asset_class {str} -- Also only within the sessions of the asset class, e.g. `forex`. (default: {None})
 
         Returns:
         ----
@@ -599,21 +671,25 @@ class Indicators():
         self._current_indicators[column_name]['args'] = locals_data
         self._current_indicators[column_name]['func'] = self.trading_within
 
-        # Get time
-        self._frame['time'] = self._frame.index.get_level_values(1).str.split('t').str[1].str[:-1]
+        # Get time, in seconds since midnight
+        timestamps = bar_timestamps(bar_times=self._frame.index.get_level_values(1))
+        seconds = timestamps % 86400
+
+        start_seconds = sum(int(value) * unit for value, unit in zip(start_time.split(':'), [3600, 60, 1]))
+        end_seconds = sum(int(value) * unit for value, unit in zip(end_time.split(':'), [3600, 60, 1]))
 
         # Filter time range
-        self._frame[column_name] = np.where((self._frame['time'] >= start_time) & (self._frame['time'] <= end_time), True, False)
+        within = (seconds >= start_seconds) & (seconds <= end_seconds)
 
-        # Clean up before sending back.
-        self._frame.drop(
-            labels=['time'],
-            axis=1,
-            inplace=True
-        )
+        # Filter the closed sessions
+        if asset_class is not None:
+            within &= get_calendar(asset_class).is_open(timestamps=timestamps)
+
+        self._frame[column_name] = within
 
         return self._frame
 
+    @cached_indicator
     def fractal(self, column_name: str = 'fractal') -> pd.DataFrame:
 
         locals_data = locals()
@@ -644,6 +720,7 @@ class Indicators():
 
         return self._frame
     
+    @cached_indicator
     def fractal_chaos_oscillator(self, column_name: str = 'fractal_chaos_oscillator') -> pd.DataFrame:
 
         locals_data = locals()
@@ -679,7 +756,8 @@ class Indicators():
 
         return self._frame 
 
-    def heikin_ashi(self, column_name: str = 'heikin_ashi') -> pd.DataFrame:
+    @cached_indicator
+    def heikin_ashi(self, method: str = 'recursive', column_name: str = 'heikin_ashi') -> pd.DataFrame:
 
         locals_data = locals()
         del locals_data['self']
@@ -688,11 +766,17 @@ class Indicators():
         self._current_indicators[column_name]['args'] = locals_data
         self._current_indicators[column_name]['func'] = self.heikin_ashi
 
-        # Calculate Heikin Ashi open
-        self._frame['HA_open'] = (self._frame['open'].shift(1) + self._frame['close'].shift(1)) / 2
+        if method == 'shift':
+            # Calculate Heikin Ashi open, the mean of the previous open and close as before
+            self._frame['HA_open'] = (self._frame.groupby(level=0)['open'].shift(1) + self._frame.groupby(level=0)['close'].shift(1)) / 2
 
-        # Calculate Heikin Ashi close
-        self._frame['HA_close'] = (self._frame['open'] + self._frame['low'] + self._frame['close'] + self._frame['high']) / 4
+            # Calculate Heikin Ashi close
+            self._frame['HA_close'] = (self._frame['open'] + self._frame['low'] + self._frame['close'] + self._frame['high']) / 4
+        else:
+            # Calculate Heikin Ashi open, the mean of the previous Heikin Ashi open and close, and Heikin Ashi close
+            heikin_ashi = self._scan(step=heikin_ashi_step, fields=['open', 'high', 'low', 'close'], state_size=2, output_size=2)
+            self._frame['HA_open'] = heikin_ashi[:, 0]
+            self._frame['HA_close'] = heikin_ashi[:, 1]
 
         # Clean up before sending back.
         self._frame.drop(
@@ -703,6 +787,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def bollinger_bands(self, period: int = 20, column_name: str = 'bollinger_bands') -> pd.DataFrame:
 
         locals_data = locals()
@@ -712,15 +797,10 @@ class Indicators():
         self._current_indicators[column_name]['args'] = locals_data
         self._current_indicators[column_name]['func'] = self.bollinger_bands
 
-        # Define the Moving Avg.
-        self._frame['moving_avg'] = self._price_groups['close'].transform(
-            lambda x : x.rolling(window=period).mean()
-        )
-
-        # Define Moving Std.
-        self._frame['moving_std'] = self._price_groups['close'].transform(
-            lambda x : x.rolling(window=period).std()
-        )
+        # Define the Moving Avg. and the Moving Std.
+        moving_avg, moving_std = self._rolling_moments(field='close', window=period)
+        self._frame['moving_avg'] = moving_avg
+        self._frame['moving_std'] = moving_std
 
         # Define the Upper Band.
         self._frame['band_upper'] = self._frame['moving_avg'] + (2 * self._frame['moving_std'])
@@ -746,7 +826,8 @@ class Indicators():
 
         return self._frame   
 
-    def average_true_range(self, period: int = 14, column_name: str ='average_true_range') -> pd.DataFrame:
+    @cached_indicator
+    def average_true_range(self, period: int = 14, method: str = 'wilders', column_name: str ='average_true_range') -> pd.DataFrame:
         """Calculates the Average True Range (ATR).
 
         Arguments:
@@ -754,6 +835,9 @@ class Indicators():
         period {int} -- The number of periods to use when calculating 
             the ATR. (default: {14})
 
+        method {str} -- The calculation methodology, `wilders` for Wilder's smoothing or `ewm` for the
+            exponential moving average used before. (default: {'wilders'})
+
         Returns:
         ----
         {pd.DataFrame} -- A Pandas data frame with the ATR included.
@@ -788,10 +872,13 @@ class Indicators():
         # Grab the Max.
         self._frame['true_range'] = self._frame[['true_range_0', 'true_range_1', 'true_range_2']].max(axis=1)
 
-        # Calculate the Average True Range.
-        self._frame[column_name] = self._frame['true_range'].transform(
-            lambda x: x.ewm(span = period, min_periods = period).mean()
-        )
+        # Calculate the Average True Range, per instrument.
+        if method == 'ewm':
+            self._frame[column_name] = self._price_groups['true_range'].transform(
+                lambda x: x.ewm(span = period, min_periods = period).mean()
+            )
+        else:
+            self._frame[column_name] = self._scan(step=wilder_step, fields=['true_range'], params=[period], state_size=2)[:, 0]
 
         # Make NaN to 0
         # self._frame[column_name] = np.where(np.isnan(self._frame[column_name]), 0, self._frame[column_name])
@@ -805,109 +892,32 @@ class Indicators():
 
         return self._frame
 
-    def supertrend(self, atr_length: int = 10, multiplier : int = 3, column_name: str ='supertrend') -> pd.DataFrame:
-        
+    @cached_indicator
+    def supertrend(self, atr_length: int = 10, multiplier : int = 3, method: str = 'wilders', column_name: str ='supertrend') -> pd.DataFrame:
+
+        locals_data = locals()
+        del locals_data['self']
+
+        self._current_indicators[column_name] = {}
+        self._current_indicators[column_name]['args'] = locals_data
+        self._current_indicators[column_name]['func'] = self.supertrend
+
         # Calculate high low average
         self._frame['hla'] = (self._frame['high'] + self._frame['low']) / 2
 
-        # Calculate 10-day average true range
-        self.average_true_range(period=10, column_name='10_atr')
+        # Calculate 10-day average true range, a part of the supertrend rather than an indicator of its own
+        self.average_true_range(period=10, method=method, column_name='10_atr')
+        self._current_indicators.pop('10_atr', None)
 
         # Calculate basic and final upper band and lower band
         self._frame['basic_upperband'] = self._frame['hla'] + (multiplier * self._frame['10_atr'])
         self._frame['basic_lowerband'] = self._frame['hla'] - (multiplier * self._frame['10_atr'])
 
-        # Initial final upper band and lower band same as basic upper band and lower band
-        self._frame['final_upperband'] = self._frame['basic_upperband']
-        self._frame['final_lowerband'] = self._frame['basic_lowerband']
-
-        # Calculate final upper band and lower band
-        self._frame['final_upperband'] = np.where((self._frame['basic_upperband'] < self._frame['final_upperband'].shift(1)) | 
-                                                  (self._frame['close'].shift(1)  > self._frame['final_upperband'].shift(1)), self._frame['basic_upperband'], self._frame['final_upperband'].shift(1))
-        self._frame['final_lowerband'] = np.where((self._frame['basic_lowerband'] > self._frame['final_lowerband'].shift(1)) | 
-                                                  (self._frame['close'].shift(1)  < self._frame['final_lowerband'].shift(1)), self._frame['basic_lowerband'], self._frame['final_lowerband'].shift(1))
-
-        # Calculate supertrend
-        self._frame['supertrend'] = True
-        # self._frame[column_name] = np.where((self._frame['supertrend'].shift(1) == self._frame['final_upperband'].shift(1)) & (self._frame['close'] < self._frame['final_upperband']), self._frame['final_upperband'], 
-        #                            np.where((self._frame['supertrend'].shift(1) == self._frame['final_upperband'].shift(1)) & (self._frame['close'] > self._frame['final_upperband']), self._frame['final_lowerband'], 
-        #                            np.where((self._frame['supertrend'].shift(1) == self._frame['final_lowerband'].shift(1)) & (self._frame['close'] > self._frame['final_lowerband']), self._frame['final_lowerband'], 
-        #                            np.where((self._frame['supertrend'].shift(1) == self._frame['final_lowerband'].shift(1)) & (self._frame['close'] < self._frame['final_lowerband']), self._frame['final_upperband'], 
-        #                                     self._frame['supertrend']))))
-
-        # for i in range(1, len(self._frame.index)):
-        #     curr, prev = i, i-1
-            
-        #     # if current close price crosses above upperband
-        #     if self._frame['close'][curr] > self._frame['final_upperband'][prev]:
-        #         self._frame['supertrend'][curr] = True
-        #     # if current close price crosses below lowerband
-        #     elif self._frame['close'][curr] < self._frame['final_lowerband'][prev]:
-        #         self._frame['supertrend'][curr] = False
-        #     # else, the trend continues
-        #     else:
-        #         self._frame['supertrend'][curr] = self._frame['supertrend'][prev]
-                
-        #         # adjustment to the final bands
-        #         if self._frame['supertrend'][curr] == True and self._frame['final_lowerband'][curr] < self._frame['final_lowerband'][prev]:
-        #             self._frame['final_lowerband'][curr] = self._frame['final_lowerband'][prev]
-        #         if self._frame['supertrend'][curr] == False and self._frame['final_upperband'][curr] > self._frame['final_upperband'][prev]:
-        #             self._frame['final_upperband'][curr] = self._frame['final_upperband'][prev]
-
-        #     # to remove bands according to the trend direction
-        #     if self._frame['supertrend'][curr] == True:
-        #         self._frame['final_upperband'][curr] = np.nan
-        #     else:
-        #         self._frame['final_lowerband'][curr] = np.nan
-
-        final_upperband_list = []
-        final_lowerband_list = []
-        supertrend_list = []
-
-        for index, symbol in self._price_groups:
-
-            length = len(symbol)
-            final_upperband = list(symbol['final_upperband'])
-            final_lowerband = list(symbol['final_lowerband'])
-            close = list(symbol['close'])
-
-            supertrend = [None] * length
-
-            for i in range(1, length):
-                curr, prev = i, i-1
-                
-                # if current close price crosses above upperband
-                if close[curr] > final_upperband[prev]:
-                    supertrend[curr] = True
-                # if current close price crosses below lowerband
-                elif close[curr] < final_lowerband[prev]:
-                    supertrend[curr] = False
-                # else, the trend continues
-                else:
-                    supertrend[curr] = supertrend[prev]
-                    
-                    # adjustment to the final bands
-                    if supertrend[curr] == True and final_lowerband[curr] < final_lowerband[prev]:
-                        final_lowerband[curr] = final_lowerband[prev]
-                    if supertrend[curr] == False and final_upperband[curr] > final_upperband[prev]:
-                        final_upperband[curr] = final_upperband[prev]
-
-                # to remove bands according to the trend direction
-                if supertrend[curr] == True:
-                    final_upperband[curr] = np.nan
-                else:
-                    final_lowerband[curr] = np.nan
-            
-            # join list
-            final_upperband_list += final_upperband
-            final_lowerband_list += final_lowerband
-            supertrend_list += supertrend
-
-        self._frame['final_upperband'] = final_upperband_list
-        self._frame['final_lowerband'] = final_lowerband_list
-        self._frame['supertrend'] = supertrend_list
-
-        self._frame['supertrend'] = np.where(self._frame['supertrend'] == True, 1.0, -1.0)
+        # Calculate final upper band and lower band, and the trend, per instrument
+        supertrend = self._scan(step=supertrend_step, fields=['basic_upperband', 'basic_lowerband', 'close'], state_size=4, output_size=3)
+        self._frame['final_upperband'] = supertrend[:, 0]
+        self._frame['final_lowerband'] = supertrend[:, 1]
+        self._frame['supertrend'] = supertrend[:, 2]
 
         # Clean up before sending back.
         self._frame.drop(
@@ -918,6 +928,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def macd(self, fast_period: int = 12, slow_period: int = 26, column_name: str = 'macd') -> pd.DataFrame:
         """Calculates the Moving Average Convergence Divergence (MACD).
 
@@ -983,6 +994,7 @@ class Indicators():
 
         return self._frame 
 
+    @cached_indicator
     def mass_index(self, period: int = 9, column_name: str = 'mass_index') -> pd.DataFrame:
         """Calculates the Mass Index indicator.
 
@@ -1045,6 +1057,7 @@ class Indicators():
 
         return self._frame
     
+    @cached_indicator
     def force_index(self, period: int, column_name: str = 'force_index') -> pd.DataFrame:
         """Calculates the Force Index.
 
@@ -1082,6 +1095,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def ease_of_movement(self, period: int, column_name: str = 'ease_of_movement') -> pd.DataFrame:
         """Calculates the Ease of Movement.
 
@@ -1133,6 +1147,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def commodity_channel_index(self, period: int, column_name: str = 'commodity_channel_index') -> pd.DataFrame:
         """Calculates the Commodity Channel Index.
 
@@ -1168,18 +1183,15 @@ class Indicators():
         # Calculate the Typical Price.
         self._frame['typical_price'] = (self._frame['high'] + self._frame['low'] + self._frame['close']) / 3
 
-        # Calculate the Rolling Average of the Typical Price.
-        self._frame['typical_price_mean'] = self._frame['pp'].transform(
-            lambda x: x.rolling(window=period).mean()
-        )
-
-        # Calculate the Rolling Standard Deviation of the Typical Price.
-        self._frame['typical_price_std'] = self._frame['pp'].transform(
-            lambda x: x.rolling(window=period).std()
-        )
+        # Calculate the Rolling Average and Standard Deviation of the Typical Price, per instrument.
+        typical_price_mean, typical_price_std = self._rolling_moments(field='typical_price', window=period)
+        self._frame['typical_price_mean'] = typical_price_mean
+        self._frame['typical_price_std'] = typical_price_std
 
         # Calculate the Commodity Channel Index.
-        self._frame[column_name] = self._frame['typical_price_mean'] / self._frame['typical_price_std']
+        self._frame[column_name] = (
+            (self._frame['typical_price'] - self._frame['typical_price_mean']) / (0.015 * self._frame['typical_price_std'])
+        )
 
         # Clean up before sending back.
         self._frame.drop(
@@ -1190,6 +1202,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def standard_deviation(self, period: int, column_name: str = 'standard_deviation') -> pd.DataFrame:
         """Calculates the Standard Deviation.
 
@@ -1222,13 +1235,12 @@ class Indicators():
         self._current_indicators[column_name]['args'] = locals_data
         self._current_indicators[column_name]['func'] = self.standard_deviation
 
-        # Calculate the Standard Deviation.
-        self._frame[column_name] = self._frame['close'].transform(
-            lambda x: x.ewm(span=period).std()
-        )
+        # Calculate the Standard Deviation, per instrument.
+        self._frame[column_name] = self._rolling_moments(field='close', window=period)[1]
 
         return self._frame
 
+    @cached_indicator
     def chaikin_oscillator(self, period: int, column_name: str = 'chaikin_oscillator') -> pd.DataFrame:
         """Calculates the Chaikin Oscillator.
 
@@ -1290,6 +1302,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def kst_oscillator(self, r1: int, r2: int, r3: int, r4: int, n1: int, n2: int, n3: int, n4: int, column_name: str = 'kst_oscillator') -> pd.DataFrame:
         """Calculates the Mass Index indicator.
 
@@ -1369,6 +1382,7 @@ class Indicators():
 
         return self._frame
 
+    @cached_indicator
     def stochastic_oscillator(self, period: int = 14, smoothing_period: int = 3, column_name: str = 'stochastic_oscillator') -> pd.DataFrame:
         """Calculates the Stochastic Oscillator.
 
@@ -1400,13 +1414,8 @@ class Indicators():
         self._current_indicators[column_name]['func'] = self.stochastic_oscillator
 
         # Define the highest high and lowest low within the period
-        self._frame['highest_high'] = self._price_groups['high'].transform(
-            lambda x : x.rolling(window=period).max()
-        )
-
-        self._frame['lowest_low'] = self._price_groups['low'].transform(
-            lambda x : x.rolling(window=period).min()
-        )
+        self._frame['highest_high'] = self._rolling_extreme(field='high', window=period, maximum=True)
+        self._frame['lowest_low'] = self._rolling_extreme(field='low', window=period, maximum=False)
 
         # Calculate the Fast Stochastic indicator (%K).
         self._frame['%K'] = (
@@ -1428,6 +1437,7 @@ class Indicators():
 
         return self._frame
     
+    @cached_indicator
     def stochastic_momentum_index(self, k_periods: int = 10, k_smoothing_periods: int = 3, k_double_smoothing_periods: int = 3, d_periods: int = 10, column_name: str = 'stochastic_momentum_index') -> pd.DataFrame:
         """Calculates the Stochastic Momentum Index.
 
@@ -1459,13 +1469,8 @@ class Indicators():
         self._current_indicators[column_name]['func'] = self.stochastic_momentum_index
 
         # Calculate the highest high and lowest low within the period
-        self._frame['highest_high'] = self._price_groups['high'].transform(
-            lambda x : x.rolling(window=k_periods).max()
-        )
-
-        self._frame['lowest_low'] = self._price_groups['low'].transform(
-            lambda x : x.rolling(window=k_periods).min()
-        )
+        self._frame['highest_high'] = self._rolling_extreme(field='high', window=k_periods, maximum=True)
+        self._frame['lowest_low'] = self._rolling_extreme(field='low', window=k_periods, maximum=False)
 
         # Calculate the midpoint price of the highest high and the lowest low in the selected range
         self._frame['midpoint'] = (self._frame['highest_high'] + self._frame['lowest_low']) / 2
@@ -1507,6 +1512,7 @@ class Indicators():
 
         return self._frame 
 
+    @cached_indicator
     def parabolic_sar(self, min_af: float = 0.02, max_af: float = 0.2, column_name: str = 'parabolic_sar') -> pd.DataFrame:
 
         locals_data = locals()
@@ -1516,75 +1522,20 @@ class Indicators():
         self._current_indicators[column_name]['args'] = locals_data
         self._current_indicators[column_name]['func'] = self.parabolic_sar
 
-        psar_list = []
-        psarbear_list = []
-        psarbull_list = []
-
-        for index, symbol in self._price_groups:
-
-            length = len(symbol)
-            high = list(symbol['high'])
-            low = list(symbol['low'])
-            close = list(symbol['close'])
-            psar = close[0:len(close)]
-            psarbull = [None] * length
-            psarbear = [None] * length
-            bull = True
-            af = min_af
-            hp = high[0]
-            lp = low[0]
-            for i in range(2,length):
-                if bull:
-                    psar[i] = psar[i - 1] + af * (hp - psar[i - 1])
-                else:
-                    psar[i] = psar[i - 1] + af * (lp - psar[i - 1])
-                reverse = False
-                if bull:
-                    if low[i] < psar[i]:
-                        bull = False
-                        reverse = True
-                        psar[i] = hp
-                        lp = low[i]
-                        af = min_af
-                else:
-                    if high[i] > psar[i]:
-                        bull = True
-                        reverse = True
-                        psar[i] = lp
-                        hp = high[i]
-                        af = min_af
-                if not reverse:
-                    if bull:
-                        if high[i] > hp:
-                            hp = high[i]
-                            af = min(af + min_af, max_af)
-                        if low[i - 1] < psar[i]:
-                            psar[i] = low[i - 1]
-                        if low[i - 2] < psar[i]:
-                            psar[i] = low[i - 2]
-                    else:
-                        if low[i] < lp:
-                            lp = low[i]
-                            af = min(af + min_af, max_af)
-                        if high[i - 1] > psar[i]:
-                            psar[i] = high[i - 1]
-                        if high[i - 2] > psar[i]:
-                            psar[i] = high[i - 2]
-                if bull:
-                    psarbull[i] = psar[i]
-                    psarbear[i] = '-'
-                else:
-                    psarbear[i] = psar[i]
-                    psarbull[i] = '-'
-
-            # join list
-            psar_list += psar
-            psarbear_list += psarbear
-            psarbull_list += psarbull
-
-        # self._frame[column_name] = psar_list
-        self._frame['psarbear'] = psarbear_list
-        self._frame['psarbull'] = psarbull_list
+        psar = self._scan(step=parabolic_sar_step, fields=['high', 'low', 'close'], params=[min_af, max_af], state_size=9, output_size=2)
+
+        # The trend is '-' on the other side, and None on the first 2 bars of every instrument
+        psar_values = psar[:, 0].astype(object)
+        warm_up = np.isnan(psar[:, 1])
+
+        psarbull = np.where(psar[:, 1] == 1.0, psar_values, '-')
+        psarbull[warm_up] = None
+        psarbear = np.where(psar[:, 1] == 0.0, psar_values, '-')
+        psarbear[warm_up] = None
+
+        # self._frame[column_name] = psar[:, 0]
+        self._frame['psarbear'] = psarbear
+        self._frame['psarbull'] = psarbull
 
         return self._frame
 
@@ -1600,17 +1551,96 @@ class Indicators():
         # First update the groups since, we have new rows.
         self._price_groups = self._stock_frame.symbol_groups
 
-        # Grab all the details of the indicators so far.
-        for indicator in self._current_indicators:
-            
-            # Grab the function.
-            indicator_argument = self._current_indicators[indicator]['args']
+        # The candles change on every refresh, so the cache is skipped like for the inner indicators.
+        self._cache_depth += 1
+
+        try:
+            # Grab all the details of the indicators so far.
+            for indicator in self._current_indicators:
+
+                # Grab the function.
+                indicator_argument = self._current_indicators[indicator]['args']
+
+                # Grab the arguments.
+                indicator_function = self._current_indicators[indicator]['func']
+
+                # Update the function.
+                indicator_function(**indicator_argument)
+        finally:
+            self._cache_depth -= 1
+
+    def _rolling_extreme(self, field: str, window: int, maximum: bool = True) -> np.ndarray:
+        """Returns the rolling maximum or minimum of a column per instrument.
+
+        The state is kept between calls, so on `refresh` only the bars added
+        since the last call are pushed, shared by every indicator asking for
+        the same column and window.
+        """
+
+        key = ('extreme', field, window, maximum)
+
+        if key not in self._rolling_states:
+            self._rolling_states[key] = GroupedRollingExtrema(window=window, maximum=maximum)
+
+        return self._rolling_states[key].update(frame=self._frame, field=field)
+
+    def _rolling_moments(self, field: str, window: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the rolling mean and standard deviation of a column per instrument.
+
+        Like `_rolling_extreme` the state is kept between calls, on `refresh`
+        the windows slide over the new bars with the Welford update.
+        """
+
+        key = ('moments', field, window)
+
+        if key not in self._rolling_states:
+            self._rolling_states[key] = GroupedRollingMoments(window=window)
+
+        return self._rolling_states[key].update(frame=self._frame, field=field)
+
+    def _scan(self, step, fields: List[str], params: List[float] = [], state_size: int = 1, output_size: int = 1) -> np.ndarray:
+        """Returns the (rows, output_size) outputs of a path-dependent step scanned per instrument.
+
+        Like the rolling statistics the state is kept between calls, on `refresh`
+        every instrument resumes from its state at the last closed bar.
+        """
+
+        key = ('scan', step.__name__, tuple(fields), tuple(params))
+
+        if key not in self._rolling_states:
+            self._rolling_states[key] = GroupedScan(step=step, params=params, state_size=state_size, output_size=output_size)
+
+        return self._rolling_states[key].update(frame=self._frame, fields=fields)
+
+    def max_lookback(self, convergence: int = 20) -> int:
+        """Returns the number of bars per instrument the registered indicators read back.
+
+        Arguments:
+        ----
+        convergence {int} -- Lookback multiplier of the recursive indicators (EMA, Wilder, PSAR ...),
+            their older bars weigh less than 1e-8 after 20 periods. (default: {20})
+
+        Returns:
+        ----
+        {int} -- The lookback, size the `StockFrame` retention from it.
+        """
+
+        lookback = 0
+
+        for indicator in self._current_indicators.values():
+
+            name = getattr(indicator['func'], '__name__', '')
+
+            # The periods are the integer arguments, e.g. `period`, `high_period`, `atr_length`
+            periods = [value for value in indicator['args'].values() if isinstance(value, int) and not isinstance(value, bool)]
+            window = max(periods, default=0) + self._fixed_lookbacks.get(name, 0)
+
+            if name in self._recursive_indicators:
+                window *= convergence
 
-            # Grab the arguments.
-            indicator_function = self._current_indicators[indicator]['func']
+            lookback = max(lookback, window)
 
-            # Update the function.
-            indicator_function(**indicator_argument)
+        return lookback
 
     def check_signals(self) -> Union[pd.DataFrame, None]:
         """Checks to see if any signals have been generated.
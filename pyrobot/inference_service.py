@@ -0,0 +1,137 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from collections import deque
+
+from typing import Dict
+
+from pyrobot.stock_frame import StockFrame
+from pyrobot.model_registry import ModelRegistry
+
+class InferenceService():
+
+  """
+  Keeps a registry model loaded and scores the live StockFrame.
+
+  On every bar `predict` gathers the latest window of every instrument,
+  scales it with the scaler saved with the model and scores all the
+  instruments in one forward pass on the CPU. The latency of every call
+  is recorded.
+  """
+
+  def __init__(self, registry: ModelRegistry, name: str, stock_frame: StockFrame, version: int = None,
+               indicator_client=None) -> None:
+    """Initalizes the inference service.
+
+    Arguments:
+    ----
+    registry {pyrobot.ModelRegistry} -- The registry the model is loaded from.
+
+    name {str} -- The model name.
+
+    stock_frame {pyrobot.StockFrame} -- The live StockFrame.
+
+    version {int} -- The model version. (default: {the latest})
+
+    indicator_client {pyrobot.Indicators} -- Registers the indicators the model features come
+        from, so `refresh` keeps them up to date. (default: {None})
+    """
+
+    # CPU only, must be set before TensorFlow is imported
+    os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+    self._model, self._meta = registry.load(name=name, version=version)
+    self._stock_frame = stock_frame
+
+    scaler = self._meta['scaler']
+    self._features = scaler['features']
+    self._window = scaler['window']
+    self._target = self._features.index(scaler['target'])
+    self._offset = np.asarray(scaler['offset'], dtype=np.float32)
+    self._scale = np.asarray(scaler['scale'], dtype=np.float32)
+
+    if indicator_client is not None:
+      for step_name, args in scaler.get('steps', []):
+        getattr(indicator_client, step_name)(**args)
+
+    # Keras models are called directly, `predict` has a large fixed cost per call
+    if self._meta['format'] == 'keras':
+      self._forward = lambda inputs: self._model(inputs, training=False).numpy()
+    else:
+      self._forward = self._model.predict
+
+    self._latencies = deque(maxlen=10000)
+
+    # The first call builds the graph, not the first bar
+    self._forward(np.zeros((1, self._window, len(self._features)), dtype=np.float32))
+
+  @property
+  def version(self) -> int:
+    return self._meta['version']
+
+  def predict(self) -> Dict[str, float]:
+    """Scores the latest window of every instrument in one batch.
+
+    Returns:
+    ----
+    {Dict[str, float]} -- The predicted target per instrument, instruments with fewer
+        bars than the window or NaN features are left out.
+    """
+
+    start = time.perf_counter()
+
+    frame = self._stock_frame.frame
+    latest = frame[self._features].groupby(level=0, sort=False).tail(n=self._window)
+
+    labels, instruments = pd.factorize(latest.index.get_level_values(0))
+    complete = np.bincount(labels, minlength=len(instruments)) == self._window
+
+    # The frame is sorted by instrument, the rows of every instrument are together
+    rows = complete[labels]
+    inputs = latest.to_numpy(dtype=np.float32)[rows].reshape(-1, self._window, len(self._features))
+    instruments = instruments[complete]
+
+    valid = ~np.isnan(inputs).any(axis=(1, 2))
+    inputs = (inputs[valid] - self._offset) / self._scale
+    instruments = instruments[valid]
+
+    predictions = {}
+
+    if len(inputs):
+      outputs = np.asarray(self._forward(inputs)).reshape(len(inputs), -1)[:, 0]
+      outputs = outputs * self._scale[self._target] + self._offset[self._target]
+      predictions = dict(zip(instruments, outputs.astype(float)))
+
+    self._latencies.append(time.perf_counter() - start)
+
+    return predictions
+
+  def statistics(self) -> Dict[str, float]:
+    """Returns the number of calls and their latencies in milliseconds."""
+
+    latencies = np.array(self._latencies, dtype=np.float64) * 1000
+
+    if not len(latencies):
+      return {'calls': 0, 'latency_p50': 0.0, 'latency_p95': 0.0, 'latency_max': 0.0}
+
+    return {
+      'calls': len(latencies),
+      'latency_p50': float(np.percentile(latencies, 50)),
+      'latency_p95': float(np.percentile(latencies, 95)),
+      'latency_max': float(latencies.max()),
+    }
+
+  def print_statistics(self) -> None:
+
+    statistics = self.statistics()
+
+    print("=" * 50)
+    print('Inference {name} v{version}'.format(name=self._meta['name'], version=self.version))
+    print("=" * 50)
+    print('Calls:        {}'.format(statistics['calls']))
+    print('Latency p50:  {} ms'.format(round(statistics['latency_p50'], 3)))
+    print('Latency p95:  {} ms'.format(round(statistics['latency_p95'], 3)))
+    print('Latency max:  {} ms'.format(round(statistics['latency_max'], 3)))
+    print("-" * 50)
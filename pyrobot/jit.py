@@ -0,0 +1,33 @@
+import importlib.util
+
+from typing import Callable
+from typing import Dict
+
+_compiled: Dict[Callable, Callable] = {}
+_has_numba: bool = None
+
+def has_numba() -> bool:
+  """Returns whether numba is installed, without importing it."""
+
+  global _has_numba
+
+  if _has_numba is None:
+    _has_numba = importlib.util.find_spec('numba') is not None
+
+  return _has_numba
+
+def compiled(func: Callable) -> Callable:
+  """Returns `func` compiled by numba in nopython mode, or `func` itself when numba is not installed.
+
+  numba is only imported by the first call, not with the indicators, and
+  every function is compiled once per process (and cached on disk by numba).
+  """
+
+  if not has_numba():
+    return func
+
+  if func not in _compiled:
+    from numba import njit
+    _compiled[func] = njit(cache=True, nogil=True)(func)
+
+  return _compiled[func]
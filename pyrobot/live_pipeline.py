@@ -0,0 +1,181 @@
+import time
+import asyncio
+import threading
+import numpy as np
+
+from collections import deque
+
+from typing import Dict
+
+from pyrobot.event_bus import Event
+from pyrobot.event_bus import EventBus
+from pyrobot.indicators import Indicators
+from pyrobot.strategies import Strategies
+from pyrobot.execution_service import ExecutionService
+
+class LivePipeline():
+
+  """
+  The live loop of `demo.py` as event bus subscribers.
+
+  The robot bars are published on `bar`, the indicators are refreshed on
+  `bar` and publish `indicators`, the strategies are evaluated on
+  `indicators` and publish `signals`, and the WhatsApp notification and
+  the order execution both subscribe to `signals`. The notification queue
+  drops its oldest signals when it falls behind, so a slow WhatsApp API
+  never holds up the signals.
+  """
+
+  def __init__(self, robot, indicator_client: Indicators, strategies: Strategies, execution_service: ExecutionService = None,
+               notify: bool = True, queue_size: int = 10, retry_interval: float = 1.0, max_retry_interval: float = 60.0) -> None:
+    """Initalizes the live pipeline.
+
+    Arguments:
+    ----
+    robot {pyrobot.Robot} -- The robot the bars are grabbed from.
+
+    indicator_client {pyrobot.Indicators} -- The indicators of the robot StockFrame.
+
+    strategies {pyrobot.Strategies} -- The strategies evaluated on every bar.
+
+    execution_service {pyrobot.ExecutionService} -- Executes the signals, `None` to not trade. (default: {None})
+
+    notify {bool} -- Send the signals to WhatsApp. (default: {True})
+
+    queue_size {int} -- Maximum number of waiting events per subscriber. (default: {10})
+
+    retry_interval {float} -- Seconds to wait after a REST poll without bars, e.g. a failed request,
+        doubled on every empty poll in a row. (default: {1.0})
+
+    max_retry_interval {float} -- Longest wait between two empty REST polls. (default: {60.0})
+    """
+
+    self._robot = robot
+    self._indicator_client = indicator_client
+    self._strategies = strategies
+    self._execution_service = execution_service
+    self._retry_interval = retry_interval
+    self._max_retry_interval = max_retry_interval
+
+    # The indicators and the strategies read and write the same frame from worker threads
+    self._frame_lock = threading.Lock()
+    self._latencies = deque(maxlen=10000)
+
+    self.bus = EventBus(queue_size=queue_size)
+    self.bus.subscribe(topic='bar', handler=self._update_indicators, name='indicators')
+    self.bus.subscribe(topic='indicators', handler=self._evaluate_strategies, name='strategies')
+
+    if notify and hasattr(robot, '_twilio_whatsapp_client'):
+      self.bus.subscribe(topic='signals', handler=self._notify, name='whatsapp', policy='drop_oldest')
+
+    if execution_service is not None:
+      self.bus.subscribe(topic='signals', handler=self._execute, name='orders')
+
+  async def run(self, max_bars: int = None) -> None:
+    """Publishes the robot bars until `max_bars` bars or the end of a replay."""
+
+    await self.bus.start()
+
+    bars = 0
+    empty_polls = 0
+
+    try:
+      while max_bars is None or bars < max_bars:
+
+        # Grab the latest bar.
+        latest_bars = await asyncio.to_thread(self._robot.get_latest_bar)
+
+        if not latest_bars:
+          if self._robot.replay is not None and self._robot.replay.done:
+            break
+
+          # No closed bar yet or the request failed, wait instead of polling again at once
+          empty_polls += 1
+          await self._wait_after_empty_poll(empty_polls=empty_polls)
+          continue
+
+        empty_polls = 0
+
+        # Publish it, waits while the indicators are behind
+        await self.bus.publish(topic='bar', payload=latest_bars)
+        bars += 1
+
+        # Wait till the next bar.
+        last_bar_time = max(bar['fromdate'] for bar in latest_bars)
+        await asyncio.to_thread(self._robot.wait_till_next_bar, last_bar_time)
+
+    finally:
+      await self.bus.stop()
+
+  async def _wait_after_empty_poll(self, empty_polls: int) -> None:
+
+    # The bar aggregator and the replay wake up on their next bar
+    if self._robot.bar_aggregator is not None or self._robot.replay is not None:
+      await asyncio.to_thread(self._robot.wait_till_next_bar, None)
+      return
+
+    # The REST API, wait for the next bar after the last one of the frame, then back off
+    last_bar_times = self._robot.stock_frame.last_bar_times() if self._robot.stock_frame is not None else {}
+    if last_bar_times:
+      await asyncio.to_thread(self._robot.wait_till_next_bar, max(last_bar_times.values()))
+
+    await asyncio.sleep(min(self._retry_interval * 2 ** (empty_polls - 1), self._max_retry_interval))
+
+  def statistics(self) -> Dict[str, float]:
+    """Returns the bar to signals latencies in milliseconds."""
+
+    latencies = np.array(self._latencies, dtype=np.float64) * 1000
+
+    if not len(latencies):
+      return {'signals': 0, 'latency_p50': 0.0, 'latency_p95': 0.0, 'latency_max': 0.0}
+
+    return {
+      'signals': len(latencies),
+      'latency_p50': float(np.percentile(latencies, 50)),
+      'latency_p95': float(np.percentile(latencies, 95)),
+      'latency_max': float(latencies.max()),
+    }
+
+  def print_statistics(self) -> None:
+
+    self.bus.print_statistics()
+
+    statistics = self.statistics()
+
+    print('Bar to signals p50:  {} ms'.format(round(statistics['latency_p50'], 3)))
+    print('Bar to signals p95:  {} ms'.format(round(statistics['latency_p95'], 3)))
+    print('Bar to signals max:  {} ms'.format(round(statistics['latency_max'], 3)))
+    print("-" * 100)
+
+  async def _update_indicators(self, event: Event) -> None:
+
+    def update():
+      with self._frame_lock:
+        self._robot.stock_frame.add_rows(data=event.payload)
+        self._indicator_client.refresh()
+
+    await asyncio.to_thread(update)
+    await self.bus.publish(topic='indicators', payload=event.created)
+
+  async def _evaluate_strategies(self, event: Event) -> None:
+
+    def evaluate():
+      with self._frame_lock:
+        return self._strategies.get_strategy_signals()
+
+    signals = await asyncio.to_thread(evaluate)
+
+    # event.payload = the time the bar was published
+    self._latencies.append(time.perf_counter() - event.payload)
+
+    if self._robot.bar_aggregator is not None:
+      self._robot.bar_aggregator.record_signal_latency()
+
+    if not signals['buys'].empty or not signals['sells'].empty or not signals['close'].empty:
+      await self.bus.publish(topic='signals', payload=signals)
+
+  def _notify(self, event: Event) -> None:
+    self._robot.send_signals_to_whatsapp(signals=event.payload)
+
+  def _execute(self, event: Event) -> None:
+    self._execution_service.submit_signals(signals=event.payload)
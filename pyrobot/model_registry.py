@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import pickle
+import shutil
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from pyrobot.file_utils import atomic_folder
+
+class ModelRegistry():
+
+  """
+  Versioned store of trained models and the scalers they were trained with.
+
+  Every save goes to a new `{name}/v{n}` folder holding the model, the
+  scaler of `WindowDataset.scaler()` and the metadata. Keras models are
+  saved in the Keras format, any other model is pickled. TensorFlow is
+  only imported when a Keras model is loaded.
+  """
+
+  def __init__(self, path: str = 'models') -> None:
+    """Initalizes the model registry.
+
+    Arguments:
+    ----
+    path {str} -- The registry folder. (default: {'models'})
+    """
+
+    self._path = path
+
+  def versions(self, name: str) -> List[int]:
+    """Returns the saved versions of a model, oldest first."""
+
+    folder = os.path.join(self._path, name)
+
+    if not os.path.isdir(folder):
+      return []
+
+    return sorted(int(entry[1:]) for entry in os.listdir(folder) if entry.startswith('v') and entry[1:].isdigit())
+
+  def latest(self, name: str) -> int:
+    """Returns the latest version of a model, or `None` if it was never saved."""
+
+    versions = self.versions(name=name)
+    return versions[-1] if versions else None
+
+  def save(self, name: str, model: Any, scaler: Dict[str, Any], metadata: Dict[str, Any] = None) -> int:
+    """Saves a new version of a model.
+
+    Arguments:
+    ----
+    name {str} -- The model name, for example `lstm_close`.
+
+    model {Any} -- A Keras model, or any picklable model with a `predict` method.
+
+    scaler {Dict[str, Any]} -- The scaler of the training dataset, `WindowDataset.scaler()`.
+
+    metadata {Dict[str, Any]} -- Anything else worth keeping, e.g. the period or the loss. (default: {None})
+
+    Returns:
+    ----
+    {int} -- The version.
+    """
+
+    os.makedirs(os.path.join(self._path, name), exist_ok=True)
+
+    version = (self.latest(name=name) or 0) + 1
+
+    # A model is never loaded half saved
+    with atomic_folder(os.path.join(self._path, name, 'v{}'.format(version))) as temp_folder:
+
+      if self._is_keras(model):
+        model_format = 'keras'
+        model.save(os.path.join(temp_folder, 'model.keras'))
+      else:
+        model_format = 'pickle'
+        with open(os.path.join(temp_folder, 'model.pkl'), 'wb') as model_file:
+          pickle.dump(model, model_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+      meta = {
+        'name': name,
+        'version': version,
+        'saved': time.time(),
+        'format': model_format,
+        'scaler': scaler,
+        'metadata': metadata or {},
+      }
+
+      with open(os.path.join(temp_folder, 'meta.json'), 'w') as meta_file:
+        json.dump(meta, meta_file, indent=2)
+
+    return version
+
+  def load(self, name: str, version: int = None) -> Tuple[Any, Dict[str, Any]]:
+    """Loads a model.
+
+    Arguments:
+    ----
+    name {str} -- The model name.
+
+    version {int} -- The version. (default: {the latest})
+
+    Returns:
+    ----
+    {Tuple[Any, Dict[str, Any]]} -- The model and its meta, with the `scaler` and the `metadata`.
+    """
+
+    version = version or self.latest(name=name)
+
+    if version is None:
+      raise KeyError("The model {name} was never saved in {path}".format(name=name, path=self._path))
+
+    folder = os.path.join(self._path, name, 'v{}'.format(version))
+
+    with open(os.path.join(folder, 'meta.json'), 'r') as meta_file:
+      meta = json.load(meta_file)
+
+    if meta['format'] == 'keras':
+      from tensorflow import keras
+      model = keras.models.load_model(os.path.join(folder, 'model.keras'))
+    else:
+      with open(os.path.join(folder, 'model.pkl'), 'rb') as model_file:
+        model = pickle.load(model_file)
+
+    return model, meta
+
+  def delete(self, name: str, version: int) -> None:
+    shutil.rmtree(os.path.join(self._path, name, 'v{}'.format(version)), ignore_errors=True)
+
+  def _is_keras(self, model: Any) -> bool:
+
+    # Without importing TensorFlow
+    return any(base.__module__.split('.')[0] in ('keras', 'tensorflow', 'tf_keras') for base in type(model).__mro__)
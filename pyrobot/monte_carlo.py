@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+
+from typing import Dict
+from typing import Tuple
+
+from pyrobot.trade_ledger import TradeLedger
+
+def _simulate_chunk(pnl: np.ndarray, paths: int, method: str, starting_equity: float, ruin_equity: float,
+                    seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+  """Resamples `paths` equity curves from the trade profits / losses."""
+
+  rng = np.random.default_rng(seed)
+  trades = len(pnl)
+
+  # Draw the trade order of every path
+  if method == 'bootstrap':
+    samples = pnl[rng.integers(0, trades, size=(paths, trades))]
+  else:
+    samples = rng.permuted(np.broadcast_to(pnl, (paths, trades)), axis=1)
+
+  equity = np.empty((paths, trades + 1), dtype=np.float64)
+  equity[:, 0] = starting_equity
+  np.cumsum(samples, axis=1, out=equity[:, 1:])
+  equity[:, 1:] += starting_equity
+
+  # Drawdown from the running peak
+  peak = np.maximum.accumulate(equity, axis=1)
+  drawdown = peak - equity
+  with np.errstate(divide='ignore', invalid='ignore'):
+    drawdown_pct = np.where(peak > 0, drawdown / peak, 1.0)
+
+  return {
+    'final_equity': equity[:, -1],
+    'max_drawdown': drawdown.max(axis=1),
+    'max_drawdown_pct': drawdown_pct.max(axis=1),
+    'ruined': equity.min(axis=1) <= ruin_equity,
+  }
+
+class MonteCarlo():
+
+  """
+  Monte Carlo robustness test of the trades closed by a backtest.
+
+  The trade profits / losses are resampled into many equity curves, either
+  with replacement (`bootstrap`) or by shuffling their order (`permutation`),
+  to see how much the drawdown and the final equity depend on luck.
+  """
+
+  methods = ['bootstrap', 'permutation']
+
+  def __init__(self, pnl: np.ndarray, starting_equity: float, ruin_equity: float = 0.0) -> None:
+    """Initalizes the Monte Carlo test.
+
+    Arguments:
+    ----
+    pnl {np.ndarray} -- The profit / loss of every closed trade.
+
+    starting_equity {float} -- The equity every path starts with, usually the trading budget.
+
+    ruin_equity {float} -- A path is ruined once its equity falls to this level. (default: {0.0})
+    """
+
+    self._pnl = np.asarray(pnl, dtype=np.float64)
+    self._starting_equity = float(starting_equity)
+    self._ruin_equity = float(ruin_equity)
+    self._results: Dict[str, np.ndarray] = None
+
+  @classmethod
+  def from_ledger(cls, ledger: TradeLedger, starting_equity: float, ruin_equity: float = 0.0, symbol: str = None) -> 'MonteCarlo':
+    """Creates the test from the `Strategies.trade_ledger` of a backtest.
+
+    Arguments:
+    ----
+    ledger {pyrobot.TradeLedger} -- The trades of the backtest.
+
+    symbol {str} -- Only use the trades of this symbol. (default: {None})
+    """
+
+    pnl = ledger.column('pnl')
+    if symbol is not None:
+      pnl = pnl[ledger.column('symbol') == symbol]
+
+    return cls(pnl=pnl, starting_equity=starting_equity, ruin_equity=ruin_equity)
+
+  @property
+  def results(self) -> Dict[str, np.ndarray]:
+    """The `final_equity`, `max_drawdown`, `max_drawdown_pct` and `ruined` value of every path of the last run."""
+    return self._results
+
+  def run(self, paths: int = 10000, method: str = 'bootstrap', chunk_size: int = 10000, workers: int = 1,
+          seed: int = None, print_result: bool = True) -> pd.DataFrame:
+    """Simulates the equity paths and summarizes their distributions.
+
+    Arguments:
+    ----
+    paths {int} -- Number of resampled equity paths. (default: {10000})
+
+    method {str} -- `bootstrap` or `permutation`. (default: {'bootstrap'})
+
+    chunk_size {int} -- Paths simulated at once, bounds the memory to about
+        `chunk_size * trades * 40` bytes per worker. (default: {10000})
+
+    workers {int} -- Number of processes the chunks are spread across. (default: {1})
+
+    seed {int} -- Seed for reproducible results, each chunk gets its own stream. (default: {None})
+
+    Returns:
+    ----
+    {pd.DataFrame} -- The percentiles of each distribution.
+    """
+
+    if method not in self.methods:
+      raise ValueError("Unknown resampling method: {method}".format(method=method))
+
+    if len(self._pnl) == 0:
+      raise ValueError("There are no trades to resample.")
+
+    # Split the paths into chunks with independent random streams
+    sizes = [chunk_size] * (paths // chunk_size)
+    if paths % chunk_size:
+      sizes.append(paths % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    args = [(self._pnl, size, method, self._starting_equity, self._ruin_equity, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    if workers is None or workers <= 1 or len(args) <= 1:
+      chunks = [_simulate_chunk(*chunk_args) for chunk_args in args]
+    else:
+      with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = list(executor.map(_simulate_chunk, *zip(*args)))
+
+    self._results = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+    summary = self.summary()
+
+    # Print results
+    if print_result:
+      print("=" * 100)
+      print('Monte Carlo Result')
+      print("=" * 100)
+      print(f'Method:           {method}')
+      print(f'Paths:            {paths}')
+      print(f'Trades:           {len(self._pnl)}')
+      print(f'Starting equity:  {self._starting_equity}')
+      print(f'Ruin equity:      {self._ruin_equity}')
+      print("-" * 100)
+      print(summary)
+      print("-" * 100)
+      print('Ruin probability: {}%'.format(round(self.ruin_probability() * 100, 2)))
+
+    return summary
+
+  def summary(self, percentiles: Tuple[float, ...] = (1, 5, 25, 50, 75, 95, 99)) -> pd.DataFrame:
+    """Returns the percentiles of the final equity and drawdown distributions."""
+
+    rows = {}
+    for name in ['final_equity', 'max_drawdown', 'max_drawdown_pct']:
+      values = self._results[name]
+      row = {'mean': values.mean(), 'std': values.std()}
+      row.update({f'p{percentile}': value for percentile, value in zip(percentiles, np.percentile(values, percentiles))})
+      rows[name] = row
+
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+  def ruin_probability(self) -> float:
+    return float(self._results['ruined'].mean())
@@ -0,0 +1,326 @@
+import threading
+import numpy as np
+
+from typing import Dict
+from typing import List
+
+from pyrobot.broker import Broker
+from pyrobot.stock_frame import StockFrame
+from pyrobot.trade_ledger import TradeLedger
+
+class PaperBroker(Broker):
+
+  """
+  In-process paper trading broker.
+
+  Orders are filled at the close of the latest StockFrame bar of the symbol,
+  and the stop loss / take profit of the opened positions are checked against
+  the bars added since, so the whole live loop can run without a browser.
+  """
+
+  thread_safe = True
+
+  def __init__(self, stock_frame: StockFrame = None, multiple_trade: bool = True, allocate_amount: float = 0, trading_size: int = 1,
+               leverage: int = 1, verbose: bool = True) -> None:
+    """Initalizes the paper broker.
+
+    Arguments:
+    ----
+    stock_frame {pyrobot.StockFrame} -- The StockFrame the orders are filled against, set by
+        `Robot.create_stock_frame` when the broker is given to the `Robot`. (default: {None})
+
+    multiple_trade {bool} -- Allow opening more than one position on the same symbol. (default: {True})
+
+    allocate_amount {float} -- The amount allocated to trade. (default: {0})
+
+    trading_size {int} -- Maximum number of opened positions. (default: {1})
+
+    leverage {int} -- Leverage used when the order does not give one. (default: {1})
+
+    verbose {bool} -- Print every order like `EtoroPrototype` does. (default: {True})
+    """
+
+    self._stock_frame = stock_frame
+    self._lock = threading.RLock()
+
+    self._multiple_trade = multiple_trade
+    self._allocate_amount = allocate_amount
+    self._trade_amount = allocate_amount
+    self._trading_size = trading_size
+    self._leverage = leverage
+    self._verbose = verbose
+
+    self._labels: Dict[str, str] = {}
+    self.positions: List[dict] = []
+    self.portfolio_records: List[str] = []
+    self.trade_ledger = TradeLedger()
+
+    self._statistics = {}
+    self._statistics['open'] = 0
+    self._statistics['limit'] = 0
+    self._statistics['repeat'] = 0
+    self._statistics['error'] = 0
+
+    self._statistics['profit_count'] = 0
+    self._statistics['loss_count']   = 0
+    self._statistics['total_profit'] = 0.0
+    self._statistics['total_loss']   = 0.0
+
+  def set_stock_frame(self, stock_frame: StockFrame) -> None:
+
+    self._stock_frame = stock_frame
+    self._labels = {}
+
+  @property
+  def equity(self) -> float:
+    """The allocated amount plus the closed and the opened positions profit / loss."""
+
+    with self._lock:
+      self.update_positions()
+
+      equity = self._allocate_amount + float(self.trade_ledger.column('pnl').sum())
+      for position in self.positions:
+        bar = self._latest_bar(label=position['label'])
+        equity += self._profit_loss(position=position, price=bar['close'])
+
+      return equity
+
+  def _label(self, symbol: str) -> str:
+    """Returns the StockFrame symbol ('18 - gold') of a symbol name ('GOLD')."""
+
+    symbol = symbol.lower()
+    if ' - ' in symbol:
+      return symbol
+
+    if symbol not in self._labels:
+      for label in self._stock_frame.frame.index.get_level_values(0).unique():
+        self._labels[label.split(' - ')[1].lower()] = label
+
+    if symbol not in self._labels:
+      raise KeyError("The symbol is missing from the StockFrame: {symbol}".format(symbol=symbol))
+
+    return self._labels[symbol]
+
+  def _rows(self, label: str) -> slice:
+
+    frame = self._stock_frame.frame
+    rows = frame.index.get_loc(label)
+
+    if not isinstance(rows, slice):
+      rows = slice(int(np.flatnonzero(rows)[0]), int(np.flatnonzero(rows)[-1]) + 1)
+
+    return rows
+
+  def _latest_bar(self, label: str) -> dict:
+
+    frame = self._stock_frame.frame
+    row = self._rows(label=label).stop - 1
+
+    return {
+      'time':  frame.index[row][1],
+      'high':  float(frame['high'].iat[row]),
+      'low':   float(frame['low'].iat[row]),
+      'close': float(frame['close'].iat[row]),
+    }
+
+  def _profit_loss(self, position: dict, price: float) -> float:
+
+    if position['action'] == 'buy':
+      return (price - position['open']) * position['units']
+    else:
+      return (position['open'] - price) * position['units']
+
+  def update_positions(self) -> None:
+    """Closes the positions whose stop loss or take profit was met by the bars added since the last check."""
+
+    with self._lock:
+      frame = self._stock_frame.frame
+
+      for position in list(self.positions):
+
+        rows = self._rows(label=position['label'])
+
+        # No bar added since the last check
+        if frame.index[rows.stop - 1][1] == position['checked']:
+          continue
+
+        times = frame.index.get_level_values(1)[rows]
+        start = rows.start + int(np.searchsorted(times, position['checked'], side='right'))
+
+        for row in range(start, rows.stop):
+
+          high = float(frame['high'].iat[row])
+          low  = float(frame['low'].iat[row])
+          time = frame.index[row][1]
+          position['checked'] = time
+
+          # The stop loss is checked first when both are met in the same bar
+          if position['action'] == 'buy':
+            stop_loss   = position['sl'] is not None and low <= position['sl']
+            take_profit = position['tp'] is not None and high >= position['tp']
+          else:
+            stop_loss   = position['sl'] is not None and high >= position['sl']
+            take_profit = position['tp'] is not None and low <= position['tp']
+
+          if stop_loss or take_profit:
+            self._close(position=position, price=position['sl'] if stop_loss else position['tp'], time=time)
+            break
+
+  def _close(self, position: dict, price: float, time: str) -> None:
+
+    profit_loss = self._profit_loss(position=position, price=price)
+
+    if profit_loss > 0.0:
+      self._statistics['total_profit'] += profit_loss
+      self._statistics['profit_count'] += 1
+    else:
+      self._statistics['total_loss'] += profit_loss
+      self._statistics['loss_count'] += 1
+
+    self.positions.remove(position)
+    self.portfolio_records = [position['symbol'] for position in self.positions]
+
+    self.trade_ledger.record(
+      symbol=position['label'],
+      entry_time=position['datetime'],
+      exit_time=time,
+      side=position['action'],
+      entry_price=position['open'],
+      exit_price=price,
+      units=position['units'],
+      pnl=profit_loss,
+      equity=self._allocate_amount + self._statistics['total_profit'] + self._statistics['total_loss']
+    )
+
+  def open_position(
+    self,
+    symbol: str,
+    buy_or_sell: str,
+    amount: float = None,
+    leverage: str = None,
+    stop_loss: float = None,
+    take_profit: float = None,
+  ):
+
+    with self._lock:
+      self.update_positions()
+
+      label = self._label(symbol=symbol)
+      symbol = label.split(' - ')[1]
+
+      # Check the trading size over the opened positions anot
+      if len(self.portfolio_records) >= self._trading_size:
+        self._statistics['limit'] += 1
+        if self._verbose:
+          print("Unable to open '{symbol}' position due to reach the trading size limit.".format(symbol = symbol.upper()))
+        return
+
+      # Check if the symbol opened position
+      if not self._multiple_trade and symbol in self.portfolio_records:
+        self._statistics['repeat'] += 1
+        if self._verbose:
+          print("{symbol} has opened position.".format(symbol = symbol.upper()))
+        return
+
+      # Get trade amount
+      if amount is None:
+        amount = self._trade_amount / self._trading_size
+
+      # Get leverage, for example 'x5'
+      leverage = int(str(leverage).lower().lstrip('x')) if leverage else self._leverage
+
+      # Fill at the latest bar
+      bar = self._latest_bar(label=label)
+      stock_price = bar['close']
+
+      if stock_price <= 0 or amount <= 0:
+        self._statistics['error'] += 1
+        if self._verbose:
+          print("Unable to open {symbol} position due to ==> invalid amount or price".format(symbol = symbol.upper()))
+        return
+
+      position = {}
+      position['symbol'] = symbol
+      position['label'] = label
+      position['datetime'] = bar['time']
+      position['checked'] = bar['time']
+      position['action'] = buy_or_sell
+      position['open'] = stock_price
+      position['amount'] = amount
+      position['leverage'] = leverage
+      position['units'] = amount * leverage / stock_price
+      position['sl'] = stop_loss
+      position['tp'] = take_profit
+
+      self.positions.append(position)
+      self.portfolio_records.append(symbol)
+      self._statistics['open'] += 1
+
+      if self._verbose:
+        print("=" * 50)
+        print('{buy_or_sell} {symbol}'.format(
+          buy_or_sell = buy_or_sell.upper(),
+          symbol = symbol.upper()
+        ))
+        print("=" * 50)
+        print(f'Amount: ${amount}')
+        print('Stock price: ${}'.format(stock_price))
+        print('Stop loss: {}'.format(stop_loss))
+        print('Leverage: x{}'.format(leverage))
+        print('Take profit: {}'.format(take_profit))
+        print("-" * 50)
+        print('{buy_or_sell} {symbol} position opened successful!'.format(
+          buy_or_sell = buy_or_sell.capitalize(),
+          symbol = symbol.upper())
+        )
+        print("-" * 50)
+        print('')
+
+  def close_positions(self, symbols: List[str]):
+
+    with self._lock:
+      self.update_positions()
+
+      for symbol in symbols:
+
+        label = self._label(symbol=symbol)
+        symbol = label.split(' - ')[1]
+
+        if not symbol in self.portfolio_records:
+          if self._verbose:
+            print("No '{}' position opened!".format(symbol.upper()))
+          continue
+
+        # Close all trades on this symbol at the latest bar
+        bar = self._latest_bar(label=label)
+        for position in [position for position in self.positions if position['symbol'] == symbol]:
+          self._close(position=position, price=bar['close'], time=bar['time'])
+
+        if self._verbose:
+          print('All {} positions closed successful!'.format(symbol.upper()))
+
+  def print_history_records(self) -> None:
+
+    with self._lock:
+      self.update_positions()
+
+      self._trade_amount = self._allocate_amount + self._statistics['total_profit'] + self._statistics['total_loss']
+
+      if not self._verbose:
+        return
+
+      # Print statistics
+      print("=" * 50)
+      print('Statistics')
+      print("=" * 50)
+      print('Open position:   {}'.format(self._statistics['open']))
+      print('Reached limit :  {}'.format(self._statistics['limit']))
+      print('Repeat position: {}'.format(self._statistics['repeat']))
+      print('Error occur:     {}'.format(self._statistics['error']))
+      print('Profit count:    {}'.format(self._statistics['profit_count']))
+      print('Loss count:      {}'.format(self._statistics['loss_count']))
+      print("-" * 50)
+      print('Total profit: ${}'.format(self._statistics['total_profit']))
+      print('Total loss:   ${}'.format(self._statistics['total_loss']))
+      print('Total earn:   ${}'.format(self._statistics['total_profit'] + self._statistics['total_loss']))
+      print("-" * 50)
@@ -0,0 +1,56 @@
+import importlib
+
+from typing import Dict
+
+# name ==> 'module:attribute', imported on the first load
+BROKERS: Dict[str, str] = {
+  'etoro': 'pyrobot.etoro_prototype:EtoroPrototype',
+  'paper': 'pyrobot.paper_broker:PaperBroker',
+}
+
+NOTIFIERS: Dict[str, str] = {
+  'whatsapp': 'pyrobot.twilio_whatsapp:WhatsApp',
+}
+
+_loaded: Dict[str, type] = {}
+
+def register_broker(name: str, target: str) -> None:
+  """Registers a broker backend.
+
+  Arguments:
+  ----
+  name {str} -- The broker name, for example `etoro`.
+
+  target {str} -- The `module:attribute` path of the broker class, the module is only imported on `load_broker`.
+  """
+
+  BROKERS[name] = target
+
+def register_notifier(name: str, target: str) -> None:
+  """Registers a notifier backend, see `register_broker`."""
+
+  NOTIFIERS[name] = target
+
+def load_broker(name: str) -> type:
+  """Imports and returns the broker class registered as `name`."""
+
+  if name not in BROKERS:
+    raise KeyError("Broker allowed: {brokers}, got {name}".format(brokers=', '.join(BROKERS), name=name))
+
+  return _load(target=BROKERS[name])
+
+def load_notifier(name: str) -> type:
+  """Imports and returns the notifier class registered as `name`."""
+
+  if name not in NOTIFIERS:
+    raise KeyError("Notifier allowed: {notifiers}, got {name}".format(notifiers=', '.join(NOTIFIERS), name=name))
+
+  return _load(target=NOTIFIERS[name])
+
+def _load(target: str) -> type:
+
+  if target not in _loaded:
+    module_name, attribute = target.split(':')
+    _loaded[target] = getattr(importlib.import_module(module_name), attribute)
+
+  return _loaded[target]
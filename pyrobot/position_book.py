@@ -0,0 +1,117 @@
+import time
+import threading
+
+from collections import Counter
+
+from typing import Callable
+from typing import List
+
+class PositionBook():
+
+  """
+  In-memory book of the opened positions per symbol.
+
+  The book is updated from the order confirmations, so the pre-trade checks
+  are dictionary lookups, and it is reconciled with the positions the broker
+  reports in a background thread to pick up positions closed by the broker
+  itself (stop loss, take profit or manual closes).
+  """
+
+  def __init__(self, fetch_positions: Callable[[], List[str]] = None, interval: float = 60.0) -> None:
+    """Initalizes the position book.
+
+    Arguments:
+    ----
+    fetch_positions {Callable[[], List[str]]} -- Returns the symbol of every position opened
+        on the broker, one entry per position. (default: {None})
+
+    interval {float} -- Seconds between two reconciliations with the broker. (default: {60.0})
+    """
+
+    self._fetch_positions = fetch_positions
+    self._interval = interval
+
+    self._lock = threading.Lock()
+    self._positions = Counter()
+    self._total = 0
+    self._version = 0
+
+    self._stop_event = threading.Event()
+    self._thread: threading.Thread = None
+    self.last_reconciled: float = None
+
+  def __len__(self) -> int:
+    return self._total
+
+  def __contains__(self, symbol: str) -> bool:
+    return self._positions[symbol.lower()] > 0
+
+  @property
+  def symbols(self) -> List[str]:
+
+    with self._lock:
+      return list(self._positions.elements())
+
+  def add(self, symbol: str) -> None:
+    """Records an opened position."""
+
+    with self._lock:
+      self._positions[symbol.lower()] += 1
+      self._total += 1
+      self._version += 1
+
+  def remove(self, symbol: str) -> None:
+    """Records that all the positions of the symbol are closed."""
+
+    with self._lock:
+      self._total -= self._positions.pop(symbol.lower(), 0)
+      self._version += 1
+
+  def reconcile(self) -> None:
+    """Replaces the book with the positions the broker reports."""
+
+    if self._fetch_positions is None:
+      return
+
+    with self._lock:
+      version = self._version
+
+    positions = Counter(symbol.lower() for symbol in self._fetch_positions())
+
+    with self._lock:
+
+      # An order was confirmed while fetching, keep the book until the next run
+      if version != self._version:
+        return
+
+      self._positions = positions
+      self._total = sum(positions.values())
+      self.last_reconciled = time.time()
+
+  def start(self) -> 'PositionBook':
+    """Reconciles once, then keeps reconciling in the background every `interval` seconds."""
+
+    self.reconcile()
+
+    if self._fetch_positions is not None and self._interval:
+      self._stop_event.clear()
+      self._thread = threading.Thread(target=self._run, name='position-book', daemon=True)
+      self._thread.start()
+
+    return self
+
+  def stop(self) -> None:
+
+    self._stop_event.set()
+
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+
+  def _run(self) -> None:
+
+    while not self._stop_event.wait(self._interval):
+      try:
+        self.reconcile()
+      except Exception as error:
+        print("Unable to reconcile the positions due to ==> {error}".format(error=error))
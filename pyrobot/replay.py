@@ -0,0 +1,164 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+
+from collections import OrderedDict
+
+from typing import Dict
+from typing import List
+from typing import Union
+
+class ReplaySession():
+
+  """
+  Replays stored candles through the live loop of `Robot`.
+
+  The first `warmup` bars of every instrument are served by
+  `grab_historical_candles`, the remaining bars one bar time at a time by
+  `get_latest_bar`, and `wait_till_next_bar` returns at once. The time from
+  serving a bar to waiting for the next one is recorded per tick, so the
+  throughput of `add_rows` → `refresh` → `get_strategy_signals` can be
+  measured offline.
+  """
+
+  def __init__(self, candles: Union[List[dict], Dict[str, np.ndarray]], warmup: int = 200) -> None:
+    """Initalizes the replay session.
+
+    Arguments:
+    ----
+    candles {Union[List[dict], Dict[str, np.ndarray]]} -- The stored candles, as returned
+        by `Robot.grab_historical_candles`.
+
+    warmup {int} -- Number of bars per instrument served as the history. (default: {200})
+    """
+
+    if isinstance(candles, dict):
+      candles = pd.DataFrame(data=candles).to_dict(orient='records')
+
+    # Bars by time, the candle dates sort in time order
+    bars = OrderedDict()
+    history = []
+    counts = {}
+
+    for candle in sorted(candles, key=lambda candle: (candle['fromdate'], candle['instrumentid'])):
+
+      label = candle['instrumentid']
+      counts[label] = counts.get(label, 0) + 1
+
+      if counts[label] <= warmup:
+        history.append(candle)
+      else:
+        bars.setdefault(candle['fromdate'], []).append(candle)
+
+    self._history = history
+    self._bars = list(bars.values())
+    self._position = 0
+
+    self._tick_start: float = None
+    self._latencies = np.zeros(len(self._bars), dtype=np.float64)
+    self._ticks = 0
+
+  @classmethod
+  def from_json(cls, path: str, warmup: int = 200) -> 'ReplaySession':
+    """Loads the candles saved by `ReplaySession.to_json`."""
+
+    with open(path, 'r') as candles_file:
+      candles = json.load(candles_file)
+
+    return cls(candles=candles, warmup=warmup)
+
+  @staticmethod
+  def to_json(candles: Union[List[dict], Dict[str, np.ndarray]], path: str) -> None:
+    """Saves candles grabbed from eToro to replay them later."""
+
+    if isinstance(candles, dict):
+      candles = pd.DataFrame(data=candles).to_dict(orient='records')
+
+    with open(path, 'w') as candles_file:
+      json.dump(candles, candles_file)
+
+  @property
+  def done(self) -> bool:
+    return self._position >= len(self._bars)
+
+  def __len__(self) -> int:
+    return len(self._bars)
+
+  def history(self, instrument_ids: List[int] = None) -> List[dict]:
+    """Returns the warm-up candles of the instruments, all of them by default."""
+
+    return self._filter(candles=self._history, instrument_ids=instrument_ids)
+
+  def next_bar(self, instrument_ids: List[int] = None) -> List[dict]:
+    """Returns the candles of the next bar time and starts timing the tick."""
+
+    if self.done:
+      return []
+
+    candles = self._bars[self._position]
+    self._position += 1
+    self._tick_start = time.perf_counter()
+
+    # Copies, the live loop may change the candles
+    return [dict(candle) for candle in self._filter(candles=candles, instrument_ids=instrument_ids)]
+
+  def end_tick(self) -> None:
+    """Stops timing the tick started by `next_bar`."""
+
+    if self._tick_start is None:
+      return
+
+    self._latencies[self._ticks] = time.perf_counter() - self._tick_start
+    self._ticks += 1
+    self._tick_start = None
+
+  def statistics(self) -> Dict[str, float]:
+    """Returns the tick count, the throughput and the tick latencies in milliseconds."""
+
+    latencies = self._latencies[:self._ticks] * 1000
+
+    statistics = {
+      'ticks': self._ticks,
+      'remaining': len(self._bars) - self._position,
+      'ticks_per_second': float(self._ticks / latencies.sum() * 1000) if latencies.sum() else 0.0,
+    }
+
+    if self._ticks:
+      statistics['latency_mean'] = float(latencies.mean())
+      statistics['latency_p50'] = float(np.percentile(latencies, 50))
+      statistics['latency_p95'] = float(np.percentile(latencies, 95))
+      statistics['latency_p99'] = float(np.percentile(latencies, 99))
+      statistics['latency_max'] = float(latencies.max())
+    else:
+      statistics['latency_mean'] = statistics['latency_p50'] = statistics['latency_p95'] = 0.0
+      statistics['latency_p99'] = statistics['latency_max'] = 0.0
+
+    return statistics
+
+  def print_statistics(self) -> None:
+
+    statistics = self.statistics()
+
+    print("=" * 50)
+    print('Replay')
+    print("=" * 50)
+    print('Ticks:           {}'.format(statistics['ticks']))
+    print('Remaining:       {}'.format(statistics['remaining']))
+    print('Ticks / second:  {}'.format(round(statistics['ticks_per_second'], 2)))
+    print("-" * 50)
+    print('Latency mean:    {} ms'.format(round(statistics['latency_mean'], 3)))
+    print('Latency p50:     {} ms'.format(round(statistics['latency_p50'], 3)))
+    print('Latency p95:     {} ms'.format(round(statistics['latency_p95'], 3)))
+    print('Latency p99:     {} ms'.format(round(statistics['latency_p99'], 3)))
+    print('Latency max:     {} ms'.format(round(statistics['latency_max'], 3)))
+    print("-" * 50)
+
+  def _filter(self, candles: List[dict], instrument_ids: List[int] = None) -> List[dict]:
+
+    if not instrument_ids:
+      return candles
+
+    # label = '18 - gold'
+    instrument_ids = set(int(instrument_id) for instrument_id in instrument_ids)
+    return [candle for candle in candles if int(str(candle['instrumentid']).split(' - ')[0]) in instrument_ids]
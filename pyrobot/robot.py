@@ -1,12 +1,14 @@
 import sys
 import json
-import pytz
 import time as time_true
 import requests
+import numpy as np
 import pandas as pd
 
 from os import system
 
+from concurrent.futures import ThreadPoolExecutor
+
 from datetime import datetime
 from datetime import timezone
 from datetime import timedelta
@@ -15,9 +17,35 @@ from typing import List
 from typing import Dict
 from typing import Union
 
+from pyrobot.broker import Broker
+from pyrobot.replay import ReplaySession
+from pyrobot.bar_aggregator import BarAggregator
+from pyrobot.bar_aggregator import PERIOD_SECONDS
+from pyrobot.checkpoint import Checkpoint
+from pyrobot.session_calendar import get_calendar
 from pyrobot.stock_frame import StockFrame
-from pyrobot.etoro_prototype import EtoroPrototype
-from pyrobot.twilio_whatsapp import WhatsApp
+from pyrobot.candle_decoder import decode_candles
+from pyrobot.candle_decoder import concat_candles
+from pyrobot.candle_decoder import slice_candles
+from pyrobot.candle_decoder import to_frame_data
+from pyrobot.plugins import load_broker
+from pyrobot.plugins import load_notifier
+from etoro_api.response_cache import ResponseCache
+
+INSTRUMENTS_METADATA_URL = "https://api.etorostatic.com/sapi/instrumentsmetadata/V1.1/instruments"
+
+# Candle API names of the periods
+PERIOD_WORDS = {
+  '1M': 'oneminute',
+  '5M': 'fiveminutes',
+  '10M': 'tenminutes',
+  '15M': 'fifteenminutes',
+  '30M': 'thirtyminutes',
+  '1H': 'onehour',
+  '4H': 'fourhours',
+  '1D': 'oneday',
+  '1W': 'oneweek',
+}
 
 class Robot():
 
@@ -43,15 +71,27 @@ class Robot():
     multiple_trade: bool = None,
     allocate_amount: float = None, 
     trading_size: int = None,
+    broker: Broker = None,
+    replay: ReplaySession = None,
+    bar_aggregator: BarAggregator = None,
+    intrabar: bool = False,
+    response_cache: ResponseCache = None,
   ) -> None:
 
-    if trade:
+    # Trade through the given broker, for example a `PaperBroker`
+    if broker is not None:
+      self.etoro = broker
+
+    elif trade:
 
       if None in (email, password, mode, multiple_trade, allocate_amount, trading_size):
         print('TypeError: __init__() missing required positional argument')
         sys.exit()
 
       print('Opening etoro ...')
+
+      # selenium is only imported once the robot trades on eToro
+      EtoroPrototype = load_broker('etoro')
       self.etoro = EtoroPrototype(
         email=email,
         password=password,
@@ -62,129 +102,91 @@ class Robot():
       )
 
     self.mode = mode
+    self.replay = replay
+    self.bar_aggregator = bar_aggregator
+    self.intrabar = intrabar
     self.instrument_ids = []
     self.period = None
     self.period_words = None
     self.stock_frame: StockFrame = None
-    self.instruments_metadata = self._instruments_metadata()
+    # The instruments metadata is read from disk on a warm start
+    self.response_cache = response_cache if response_cache is not None else ResponseCache()
+    # Replays run offline, the stored candles already carry their symbols
+    self.instruments_metadata = self._instruments_metadata() if replay is None else []
 
     if twilio_whatsapp:
       account_sid = twilio_whatsapp.get('account_sid')
       auth_token = twilio_whatsapp.get('auth_token')
       to_whatsapp_numbers = twilio_whatsapp.get('to_whatsapp_numbers')
+      WhatsApp = load_notifier('whatsapp')
       self._twilio_whatsapp_client = WhatsApp(account_sid=account_sid, auth_token=auth_token, to_whatsapp_numbers=to_whatsapp_numbers)
 
   def forex_market_open(self) -> bool:
 
     # Open  - Sunday, 10pm
     # Close - Friday, 9pm
-    
-    london_timezone = pytz.timezone('Europe/London')
-    london_current_datetime = datetime.now(london_timezone)
-    
-    # If Monday to Thrusday, return True
-    if london_current_datetime.isoweekday() in range(1, 5):
-      return True
-
-    if london_current_datetime.strftime("%a") == 'Sat':
-      return False
+    return get_calendar('forex').is_open_now()
 
-    if london_current_datetime.strftime("%a") == 'Sun':
-
-      open_time = datetime.now(london_timezone).replace(
-        hour=22,
-        minute=00,
-        second=00
-      )
-
-      if london_current_datetime >= open_time:
-        return True
-      else:
-        return False
-
-    if london_current_datetime.strftime("%a") == 'Fri':
+  @property
+  def pre_market_open(self) -> bool:
+    return get_calendar('us_pre').is_open_now()
 
-      close_time = datetime.now(london_timezone).replace(
-        hour=21,
-        minute=00,
-        second=00
-      )
+  @property
+  def post_market_open(self) -> bool:
+    return get_calendar('us_post').is_open_now()
 
-      if close_time >= london_current_datetime:
-        return True
-      else:
-        return False
-  
   @property
-  def pre_market_open(self) -> bool:
+  def regular_market_open(self) -> bool:
+    return get_calendar('us_regular').is_open_now()
 
-    pre_market_start_time = datetime.utcnow().replace(
-      hour=8,
-      minute=00,
-      second=00
-    ).timestamp()
+  def create_stock_frame(self, data: Union[List[dict], Dict[str, np.ndarray]]) -> StockFrame:
 
-    market_start_time = datetime.utcnow().replace(
-      hour=13,
-      minute=30,
-      second=00
-    ).timestamp()
+    # Create the Frame.
+    self.stock_frame = StockFrame(data=data, period=self.period)
 
-    right_now = datetime.utcnow().timestamp()
+    # Let the broker price the orders from the frame
+    if hasattr(self, 'etoro'):
+      self.etoro.set_stock_frame(stock_frame=self.stock_frame)
 
-    if market_start_time >= right_now >= pre_market_start_time:
-      return True
-    else:
-      return False
+    return self.stock_frame
 
-  @property
-  def post_market_open(self):
+  def resume_stock_frame(self, checkpoint: Checkpoint) -> StockFrame:
+    """Loads the StockFrame of a checkpoint and adds the bars closed since it was saved.
 
-    post_market_end_time = datetime.utcnow().replace(
-      hour=00,
-      minute=00,
-      second=00
-    ).timestamp()
+    Arguments:
+    ----
+    checkpoint {pyrobot.Checkpoint} -- The checkpoint saved by the previous run.
 
-    market_end_time = datetime.utcnow().replace(
-      hour=20,
-      minute=00,
-      second=00
-    ).timestamp()
+    Returns:
+    ----
+    {pyrobot.StockFrame} -- The StockFrame, or `None` if there is no checkpoint.
+    """
 
-    right_now = datetime.utcnow().timestamp()
+    stock_frame = checkpoint.load()
 
-    if post_market_end_time >= right_now >= market_end_time:
-      return True
-    else:
-      return False
+    if stock_frame is None:
+      return None
 
-  @property
-  def regular_market_open(self):
+    self.period = stock_frame.period
+    self.period_words = PERIOD_WORDS.get(self.period)
 
-    market_start_time = datetime.utcnow().replace(
-      hour=13,
-      minute=30,
-      second=00
-    ).timestamp()
+    # '18 - gold' ==> 18
+    labels = stock_frame.frame.index.get_level_values(0).unique()
+    self.instrument_ids = [int(label.split(' - ')[0]) for label in labels]
 
-    market_end_time = datetime.utcnow().replace(
-      hour=20,
-      minute=00,
-      second=00
-    ).timestamp()
+    self.stock_frame = stock_frame
 
-    right_now = datetime.utcnow().timestamp()
+    # Only grab the bars missed while the robot was down
+    missed_candles = self._grab_bars_since(last_bar_times=stock_frame.last_bar_times())
 
-    if market_end_time >= right_now >= market_start_time:
-      return True
-    else:
-      return False
+    print('Resumed {rows} bars from the checkpoint, {missed} bars missed.'.format(rows=len(stock_frame.frame), missed=len(missed_candles)))
 
-  def create_stock_frame(self, data: List[dict]) -> StockFrame:
+    if missed_candles:
+      self.stock_frame.add_rows(data=missed_candles)
 
-    # Create the Frame.
-    self.stock_frame = StockFrame(data=data, period=self.period)
+    # Let the broker price the orders from the frame
+    if hasattr(self, 'etoro'):
+      self.etoro.set_stock_frame(stock_frame=self.stock_frame)
 
     return self.stock_frame
 
@@ -198,15 +200,44 @@ class Robot():
     print("")
 
   def _instruments_metadata(self) -> List[Dict]:
+    """Returns the instruments metadata, from the response cache while it is fresh."""
+
+    url = INSTRUMENTS_METADATA_URL
+    key = self.response_cache.key(url=url)
+    entry = self.response_cache.get(key)
+
+    if entry is not None and self.response_cache.is_fresh(entry=entry, url=url):
+      self.response_cache.hits += 1
+      return entry['data']
+
+    try:
+      res = requests.get(url, headers=self.response_cache.conditional_headers(entry=entry))
+    except Exception:
+      # Serve the stale table rather than failing while the API is unreachable
+      if entry is not None:
+        return entry['data']
+      raise
+
+    # Not modified since it was cached
+    if res.status_code == 304 and entry is not None:
+      self.response_cache.revalidated += 1
+      return self.response_cache.touch(key=key, entry=entry)['data']
 
-    url = "https://api.etorostatic.com/sapi/instrumentsmetadata/V1.1/instruments"
-    res = requests.get(url)
     instruments_metadata = json.loads(res.text.lower())["instrumentdisplaydatas"]
 
     for instrument in instruments_metadata:
       # remove images
       instrument.pop("images")
 
+    self.response_cache.misses += 1
+    self.response_cache.set(
+      key=key,
+      url=url,
+      data=instruments_metadata,
+      etag=res.headers.get('ETag'),
+      last_modified=res.headers.get('Last-Modified')
+    )
+
     return instruments_metadata
 
   def get_instruments_ids_by_type(self, instrument_type: str) -> List[int]:
@@ -247,30 +278,41 @@ class Robot():
     
     return instruments_ids
 
-  def grab_historical_candles(self, instrument_ids: List[int], period: str) -> List[dict]:
-
-    period_list = {
-      '1M': 'oneminute',
-      '5M': 'fiveminutes',
-      '10M': 'tenminutes',
-      '15M': 'fifteenminutes',
-      '30M': 'thirtyminutes',
-      '1H': 'onehour',
-      '4H': 'fourhours',
-      '1D': 'oneday',
-      '1W': 'oneweek',
-    }
+  def grab_historical_candles(self, instrument_ids: List[int], period: str, columnar: bool = False) -> Union[List[dict], Dict[str, np.ndarray]]:
+    """Grabs the last 1000 closed candles of the instruments.
+
+    Arguments:
+    ----
+    instrument_ids {List[int]} -- The instrument IDs.
+
+    period {str} -- The candle period, for example `15M`.
+
+    columnar {bool} -- Decode the candles straight into arrays instead of one
+        dictionary per candle, `create_stock_frame` accepts both. (default: {False})
+
+    Returns:
+    ----
+    {Union[List[dict], Dict[str, np.ndarray]]} -- The candles.
+    """
 
-    if period not in period_list:
+    if period not in PERIOD_WORDS:
       raise Exception("Period allowed: 1M, 5M, 10M, 15M, 30M, 1H, 4H, 1D, 1W")
 
     self.instrument_ids = instrument_ids
     self.period = period
-    self.period_words = period_list.get(period)
+    self.period_words = PERIOD_WORDS.get(period)
+
+    # Serve the warm-up bars of the stored candles
+    if self.replay is not None:
+      return self.replay.history(instrument_ids=instrument_ids)
 
     historical_candles = []
 
     print('Grabing historical candles...')
+
+    if columnar:
+      return self._grab_columnar_candles(instrument_ids=instrument_ids, count=1000)
+
     for instrument_id in instrument_ids:
 
       url = "https://candle.etoro.com/candles/asc.json/{period}/1000/{instrument_id}".format(
@@ -299,40 +341,154 @@ class Robot():
       
     return historical_candles
   
-  def get_latest_bar(self):
-    print('Getting latest candles ...')
-    latest_candles = []
+  def _grab_columnar_candles(self, instrument_ids: List[int], count: int) -> Dict[str, np.ndarray]:
 
-    for instrument_id in self.instrument_ids:
+    decoded_candles = []
+    symbols = {}
 
-      url = "https://candle.etoro.com/candles/asc.json/{period}/2/{instrument_id}".format(
+    for instrument_id in instrument_ids:
+
+      url = "https://candle.etoro.com/candles/asc.json/{period}/{count}/{instrument_id}".format(
         period = self.period_words,
+        count = count,
         instrument_id = instrument_id
       )
       res = requests.get(url)
 
-      candles = json.loads(res.text.lower())["candles"][0]["candles"]
+      candles = decode_candles(body=res.content, instrument_id=instrument_id)
 
       # check got candles anot
-      if candles:
+      if len(candles['timestamp']):
+
+        # get symbol by the instrument id
+        symbols[instrument_id] = next((item for item in self.instruments_metadata if item["instrumentid"] == instrument_id), None)["symbolfull"]
 
         # delete the latest candle because it is live
-        del candles[-1]
+        decoded_candles.append(slice_candles(candles=candles, index=slice(None, -1)))
 
-        # get symbol by the instrument id
-        symbol = next((item for item in self.instruments_metadata if item["instrumentid"] == instrument_id), None)["symbolfull"]
+    return to_frame_data(candles=concat_candles(candles=decoded_candles), symbols=symbols)
+
+  def get_latest_bar(self):
+
+    # Serve the next stored bar
+    if self.replay is not None:
+      return self.replay.next_bar(instrument_ids=self.instrument_ids)
+
+    # Serve the bars built from the ticks, with the forming ones for intrabar strategies
+    if self.bar_aggregator is not None:
+      latest_bars = self.bar_aggregator.pop_closed_bars()
+      if self.intrabar:
+        latest_bars.extend(self.bar_aggregator.forming_bars())
+      return latest_bars
+
+    print('Getting latest candles ...')
+
+    # Count from the last bar of the frame, so the bars of failed or stalled polls are grabbed too
+    last_bar_times = self.stock_frame.last_bar_times() if self.stock_frame is not None else {}
+    last_bar_times = {int(label.split(' - ')[0]): (label, last_bar_time) for label, last_bar_time in last_bar_times.items()}
+
+    with ThreadPoolExecutor(max_workers=min(8, max(len(self.instrument_ids), 1))) as executor:
+      results = executor.map(
+        lambda instrument_id: self._grab_latest_candles(instrument_id, *last_bar_times.get(instrument_id, (None, None))),
+        self.instrument_ids
+      )
+
+    latest_candles = [candle for candles in results for candle in candles]
+
+    return latest_candles
+
+  def _grab_bars_since(self, last_bar_times: Dict[str, str]) -> List[dict]:
+
+    with ThreadPoolExecutor(max_workers=min(8, max(len(last_bar_times), 1))) as executor:
+      results = executor.map(
+        lambda item: self._grab_latest_candles(int(item[0].split(' - ')[0]), item[0], item[1]),
+        last_bar_times.items()
+      )
+
+    return [candle for candles in results for candle in candles]
+
+  def _grab_latest_candles(self, instrument_id: int, label: str = None, last_bar_time: str = None) -> List[dict]:
+    """Grabs the closed candles after `last_bar_time`, one request whatever the number of missed bars.
+
+    Arguments:
+    ----
+    instrument_id {int} -- The instrument ID.
+
+    label {str} -- The StockFrame label, for example `18 - gold`. (default: {from the instruments metadata})
+
+    last_bar_time {str} -- The latest bar of the instrument in the StockFrame, `None` for the latest candle only. (default: {None})
+
+    Returns:
+    ----
+    {List[dict]} -- The candles, empty if the request failed, the next call grabs them again.
+    """
 
+    # + the live candle
+    count = 2
+
+    if last_bar_time is not None:
+      last_bar_timestamp = datetime.strptime(last_bar_time, '%Y-%m-%dt%H:%M:%Sz').replace(tzinfo=timezone.utc).timestamp()
+      # Bars closed since the last bar, 1 when no poll was missed
+      new_bars = int((datetime.utcnow().replace(tzinfo=timezone.utc).timestamp() - last_bar_timestamp) // PERIOD_SECONDS[self.period]) - 1
+
+      if new_bars > 1:
+        print('Backfilling {missed} missed bars of {instrument_id}.'.format(missed=new_bars - 1, instrument_id=label or instrument_id))
+
+      # + the live candle, + 1 spare
+      count = min(max(new_bars + 2, 2), 1000)
+
+    url = "https://candle.etoro.com/candles/asc.json/{period}/{count}/{instrument_id}".format(
+      period = self.period_words,
+      count = count,
+      instrument_id = instrument_id
+    )
+
+    try:
+      res = requests.get(url)
+      candles = json.loads(res.text.lower())["candles"][0]["candles"]
+    except Exception as error:
+      print("Unable to get the candles of {instrument_id} due to ==> {error}".format(instrument_id=instrument_id, error=error))
+      return []
+
+    # check got candles anot
+    if not candles:
+      return []
+
+    # delete the latest candle because it is live
+    del candles[-1]
+
+    # get symbol by the instrument id
+    if label is None:
+      symbol = next((item for item in self.instruments_metadata if item["instrumentid"] == instrument_id), None)["symbolfull"]
+      label = str(instrument_id) + ' - ' + symbol
+
+    latest_candles = []
+
+    for candle in candles:
+      if last_bar_time is None or candle["fromdate"] > last_bar_time:
         # replace the instrument ID to symbol
-        for candle in candles:
-          # candle.pop("instrumentid")
-          candle["instrumentid"] = str(candle["instrumentid"]) + ' - ' + symbol
+        candle["instrumentid"] = label
+        latest_candles.append(candle)
 
-        latest_candles.extend(candles)
-      
     return latest_candles
 
   def wait_till_next_bar(self, last_bar_time: pd.DatetimeIndex) -> None:
 
+    # The next stored bar is ready at once
+    if self.replay is not None:
+      self.replay.end_tick()
+      return
+
+    # Wake up on the next closed bar, or on the next tick for intrabar strategies
+    if self.bar_aggregator is not None:
+
+      # Wakes up at the end of the bar at the latest, a symbol may have stopped ticking
+      self.bar_aggregator.wait(intrabar=self.intrabar, timeout=self.bar_aggregator.seconds_to_close())
+
+      # Close the bars of the symbols without ticks in the new bar, once their late ticks had time to come
+      self.bar_aggregator.close_bars(timestamp=time_true.time() - self.bar_aggregator.close_delay)
+      return
+
     # london_timezone = pytz.timezone('Europe/London')
 
     # duration = [minute, hour, day, week]
@@ -363,10 +519,10 @@ class Robot():
         weeks=duration[3]
       )
     else:
-      next_bar_time = last_bar_time + timedelta(
-        seconds=10,
-        hours=1,
-        days=2,
+      # The first bar after the market opens
+      next_open = get_calendar('forex').next_open(timestamp=int(time_true.time()))
+      next_bar_time = datetime.utcfromtimestamp(next_open) + timedelta(
+        seconds=PERIOD_SECONDS[self.period] + 10
       )
     curr_bar_time = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S') # string
     curr_bar_time = datetime.strptime(curr_bar_time, '%Y-%m-%d %H:%M:%S')       # datetime
@@ -0,0 +1,558 @@
+import numpy as np
+import pandas as pd
+
+from collections import deque
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+def group_starts(frame: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+  """Returns the first and the end row of every instrument, the frame is sorted by instrument."""
+
+  labels = frame.index.codes[0]
+  starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]]) if len(labels) else np.empty(0, dtype=np.int64)
+  ends = np.r_[starts[1:], len(labels)].astype(np.int64)
+
+  return starts, ends
+
+def rolling_extrema(values: np.ndarray, window: int, starts: np.ndarray = None, maximum: bool = True) -> np.ndarray:
+  """Rolling maximum or minimum over concatenated instruments in O(n), whatever the window.
+
+  The values are split in blocks of `window`, the extreme of any window is
+  the extreme of the suffix of one block and the prefix of the next
+  (van Herk / Gil-Werman). Like `rolling(window).max()` the first
+  `window - 1` bars of every instrument and the windows touching a NaN are NaN.
+
+  Arguments:
+  ----
+  values {np.ndarray} -- The values of all the instruments, one after the other.
+
+  window {int} -- Bars per window.
+
+  starts {np.ndarray} -- The first row of every instrument. (default: {one instrument})
+
+  maximum {bool} -- The rolling maximum, or else the minimum. (default: {True})
+
+  Returns:
+  ----
+  {np.ndarray} -- The rolling extreme of every row.
+  """
+
+  values = np.asarray(values, dtype=np.float64)
+  size = len(values)
+  output = np.full(size, np.nan)
+
+  if size == 0 or window > size:
+    return output
+
+  accumulate = np.maximum.accumulate if maximum else np.minimum.accumulate
+  extreme = np.maximum if maximum else np.minimum
+
+  nans = np.isnan(values)
+
+  # NaN never wins, the windows touching one are masked below
+  padded = np.full(-(-size // window) * window, -np.inf if maximum else np.inf)
+  padded[:size] = np.where(nans, padded[0], values)
+  blocks = padded.reshape(-1, window)
+
+  prefix = accumulate(blocks, axis=1).ravel()
+  suffix = accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+  output[window - 1:] = extreme(suffix[:size - window + 1], prefix[window - 1:size])
+
+  output[_incomplete_windows(nans=nans, window=window, starts=starts)] = np.nan
+
+  return output
+
+def rolling_moments(values: np.ndarray, window: int, starts: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+  """Rolling mean and sample standard deviation over concatenated instruments in O(n), whatever the window.
+
+  Like `rolling_extrema` every window is the suffix of one block of `window`
+  values and the prefix of the next. The sums of a block are taken around
+  its own mean and the two parts are merged with the pairwise Welford
+  update (Chan et al.), so prices far from 0 or a long history do not
+  cancel out the variance like `sum(x ** 2) - sum(x) ** 2 / n` would.
+
+  Arguments:
+  ----
+  values {np.ndarray} -- The values of all the instruments, one after the other.
+
+  window {int} -- Bars per window.
+
+  starts {np.ndarray} -- The first row of every instrument. (default: {one instrument})
+
+  Returns:
+  ----
+  {Tuple[np.ndarray, np.ndarray]} -- The rolling mean and standard deviation (ddof 1) of every row,
+      NaN where `rolling(window)` is NaN.
+  """
+
+  values = np.asarray(values, dtype=np.float64)
+  size = len(values)
+  mean = np.full(size, np.nan)
+  std = np.full(size, np.nan)
+
+  if size == 0 or window > size:
+    return mean, std
+
+  nans = np.isnan(values)
+
+  padded = np.full(-(-size // window) * window, np.nan)
+  padded[:size] = values
+  blocks = padded.reshape(-1, window)
+
+  # Center every block on its own mean
+  valid = ~np.isnan(blocks)
+  counts = valid.sum(axis=1)
+  centers = np.where(counts > 0, np.where(valid, blocks, 0).sum(axis=1) / np.maximum(counts, 1), 0)
+  centered = np.where(valid, blocks - centers[:, np.newaxis], 0)
+
+  squares = centered ** 2
+
+  prefix_sum = np.cumsum(centered, axis=1).ravel()
+  prefix_squares = np.cumsum(squares, axis=1).ravel()
+  suffix_sum = np.cumsum(centered[:, ::-1], axis=1)[:, ::-1].ravel()
+  suffix_squares = np.cumsum(squares[:, ::-1], axis=1)[:, ::-1].ravel()
+  centers = np.repeat(centers, window)
+
+  # Window [first, last] = the suffix of the block of `first` + the prefix of the block of `last`
+  last = slice(window - 1, size)
+  first = slice(0, size - window + 1)
+  prefix_count = np.arange(window - 1, size) % window + 1
+  suffix_count = window - prefix_count
+
+  # A window ending a block is all in that block
+  has_suffix = suffix_count > 0
+  suffix_count_safe = np.where(has_suffix, suffix_count, 1)
+
+  prefix_mean = centers[last] + prefix_sum[last] / prefix_count
+  prefix_m2 = prefix_squares[last] - prefix_sum[last] ** 2 / prefix_count
+
+  suffix_mean = np.where(has_suffix, centers[first] + suffix_sum[first] / suffix_count_safe, prefix_mean)
+  suffix_m2 = np.where(has_suffix, suffix_squares[first] - suffix_sum[first] ** 2 / suffix_count_safe, 0)
+
+  delta = prefix_mean - suffix_mean
+  mean[window - 1:] = suffix_mean + delta * prefix_count / window
+  m2 = suffix_m2 + prefix_m2 + delta ** 2 * suffix_count * prefix_count / window
+
+  if window > 1:
+    std[window - 1:] = np.sqrt(np.maximum(m2, 0) / (window - 1))
+
+  incomplete = _incomplete_windows(nans=nans, window=window, starts=starts)
+  mean[incomplete] = np.nan
+  std[incomplete] = np.nan
+
+  return mean, std
+
+def _incomplete_windows(nans: np.ndarray, window: int, starts: np.ndarray = None) -> np.ndarray:
+
+  size = len(nans)
+  incomplete = np.zeros(size, dtype=bool)
+
+  # Windows touching a NaN
+  nan_rows = np.r_[0, np.cumsum(nans)]
+  incomplete[window - 1:] = nan_rows[window:] - nan_rows[:size - window + 1] > 0
+
+  # Windows crossing into the previous instrument
+  if starts is None:
+    starts = np.array([0])
+
+  lengths = np.diff(np.r_[starts, size])
+  positions = np.arange(size) - np.repeat(starts, lengths)
+  incomplete[positions < window - 1] = True
+
+  return incomplete
+
+
+class RollingExtrema():
+
+  """
+  Rolling maximum or minimum of one instrument, a value at a time.
+
+  A monotonic deque keeps the candidates of the window, every value is
+  pushed and popped once, so a new bar costs O(1) amortized whatever the
+  window.
+  """
+
+  def __init__(self, window: int, maximum: bool = True) -> None:
+    """Initalizes the rolling extrema.
+
+    Arguments:
+    ----
+    window {int} -- Bars per window.
+
+    maximum {bool} -- The rolling maximum, or else the minimum. (default: {True})
+    """
+
+    self._window = window
+    self._maximum = maximum
+
+    # (position, value), positions rising, values falling for the maximum
+    self._candidates = deque()
+    self._count = 0
+    self._last_nan = -1
+
+  def push(self, value: float) -> float:
+    """Adds the next value and returns the extreme of the last `window` values."""
+
+    position = self._count
+    candidates = self._candidates
+
+    if value != value:
+      self._last_nan = position
+    elif self._maximum:
+      while candidates and candidates[-1][1] <= value:
+        candidates.pop()
+      candidates.append((position, value))
+    else:
+      while candidates and candidates[-1][1] >= value:
+        candidates.pop()
+      candidates.append((position, value))
+
+    while candidates and candidates[0][0] <= position - self._window:
+      candidates.popleft()
+
+    self._count += 1
+
+    if self._count < self._window or self._last_nan > position - self._window:
+      return np.nan
+
+    return candidates[0][1]
+
+  def peek(self, value: float) -> float:
+    """Returns the extreme of the last `window - 1` values and `value` without adding it, e.g. for a forming bar."""
+
+    position = self._count
+    first = position - self._window + 1
+
+    if position + 1 < self._window or value != value or self._last_nan >= first:
+      return np.nan
+
+    for candidate_position, candidate in self._candidates:
+      if candidate_position >= first:
+        return max(candidate, value) if self._maximum else min(candidate, value)
+
+    return value
+
+
+class RollingMoments():
+
+  """
+  Rolling mean and standard deviation of one instrument, a value at a time.
+
+  The window slides with the Welford update, O(1) per value whatever the
+  window. The moments are computed again from the window values after a
+  NaN has left it and every `_exact_every` values, so the rounding errors
+  of the updates never pile up.
+  """
+
+  _exact_every = 1000
+
+  def __init__(self, window: int) -> None:
+    """Initalizes the rolling moments.
+
+    Arguments:
+    ----
+    window {int} -- Bars per window.
+    """
+
+    self._window = window
+    self._values = deque()
+
+    # The moments are kept around `_shift`, close to the values, so large prices do not cost precision
+    self._shift = None
+    self._mean = 0.0
+    self._m2 = 0.0
+    self._nans = 0
+    self._stale = False
+    self._updates = 0
+
+  def push(self, value: float) -> Tuple[float, float]:
+    """Adds the next value and returns the mean and the standard deviation of the last `window` values."""
+
+    values = self._values
+    values.append(value)
+    removed = values.popleft() if len(values) > self._window else None
+
+    if value != value:
+      self._nans += 1
+    if removed is not None and removed != removed:
+      self._nans -= 1
+
+    if self._nans:
+      self._stale = True
+      return np.nan, np.nan
+
+    if self._stale or self._shift is None or self._updates >= self._exact_every:
+      self._shift, self._m2 = self._exact(values=values)
+      self._mean = 0.0
+      self._stale = False
+      self._updates = 0
+
+    elif removed is None:
+      value -= self._shift
+      delta = value - self._mean
+      self._mean += delta / len(values)
+      self._m2 += delta * (value - self._mean)
+
+    else:
+      value -= self._shift
+      removed -= self._shift
+      mean = self._mean + (value - removed) / self._window
+      self._m2 += (value - removed) * (value - mean + removed - self._mean)
+      self._mean = mean
+
+    self._updates += 1
+
+    return self._moments(count=len(values), mean=self._shift + self._mean, m2=self._m2)
+
+  def peek(self, value: float) -> Tuple[float, float]:
+    """Returns the moments of the last `window - 1` values and `value` without adding it, e.g. for a forming bar."""
+
+    values = self._values
+    full = len(values) == self._window
+
+    if len(values) + 1 < self._window or value != value:
+      return np.nan, np.nan
+
+    # NaN left in the window once the oldest value is dropped
+    if self._nans - (full and values[0] != values[0]) > 0:
+      return np.nan, np.nan
+
+    if self._stale or self._shift is None:
+      mean, m2 = self._exact(values=list(values)[1 if full else 0:] + [value])
+      return self._moments(count=self._window, mean=mean, m2=m2)
+
+    value -= self._shift
+
+    if not full:
+      delta = value - self._mean
+      mean = self._mean + delta / self._window
+      m2 = self._m2 + delta * (value - mean)
+    else:
+      removed = values[0] - self._shift
+      mean = self._mean + (value - removed) / self._window
+      m2 = self._m2 + (value - removed) * (value - mean + removed - self._mean)
+
+    return self._moments(count=self._window, mean=self._shift + mean, m2=m2)
+
+  def _moments(self, count: int, mean: float, m2: float) -> Tuple[float, float]:
+
+    if count < self._window:
+      return np.nan, np.nan
+
+    return mean, np.sqrt(max(m2, 0.0) / (self._window - 1)) if self._window > 1 else np.nan
+
+  def _exact(self, values) -> Tuple[float, float]:
+
+    values = np.fromiter(values, dtype=np.float64)
+    mean = values.mean()
+
+    return mean, float(((values - mean) ** 2).sum())
+
+
+class GroupedRolling():
+
+  """
+  A rolling statistic of a StockFrame column, kept up to date bar by bar.
+
+  The first update runs the batch function over all the instruments.
+  Later updates only push the bars closed since into the state of every
+  instrument and peek the forming last bar, the closed bars are not
+  computed again. An instrument whose bars do not follow on from the
+  last update, or whose last closed bar changed since, is computed
+  again in batch. The frame has the StockFrame
+  (instrument, time) index.
+
+  Subclasses give `_batch`, the statistics of all the rows, and `_state`,
+  a new per-instrument state with `push` and `peek`. `_resume` brings a
+  new state up to the last closed bar of an instrument.
+  """
+
+  # Bars closed since the last update looked for, like the backfill limit of `Robot.get_latest_bar`
+  _max_new_bars = 1000
+
+  # Statistics per row
+  _outputs = 1
+
+  def __init__(self, window: int) -> None:
+    """Initalizes the grouped rolling statistic.
+
+    Arguments:
+    ----
+    window {int} -- Bars per window.
+    """
+
+    self._window = window
+
+    # Instrument ==> (the state, the time of the last closed bar, the statistics up to that bar, its inputs)
+    self._states: Dict[str, Tuple[Any, str, np.ndarray, np.ndarray]] = {}
+
+  def _batch(self, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    raise NotImplementedError
+
+  def _state(self) -> Any:
+    raise NotImplementedError
+
+  def _resume(self, values: np.ndarray) -> Any:
+
+    # The closed bars of the last window are enough to carry on
+    rolling = self._state()
+    for value in values[max(0, len(values) - 1 - self._window):-1]:
+      rolling.push(value)
+
+    return rolling
+
+  def _update(self, frame: pd.DataFrame, field: Union[str, List[str]]) -> np.ndarray:
+
+    # One column, or the (rows, columns) inputs of a multi-column statistic
+    values = frame[field].to_numpy(dtype=np.float64)
+    starts, ends = group_starts(frame=frame)
+
+    # The codes, materializing the levels of every row costs more than the update
+    instrument_codes, time_codes = frame.index.codes
+    instrument_level, time_level = frame.index.levels
+
+    # Bars of the instruments interleaved, e.g. a frame not sorted yet, no state is kept
+    if len(starts) != np.count_nonzero(np.bincount(instrument_codes)):
+      order = np.argsort(instrument_codes, kind='stable')
+      sorted_codes = instrument_codes[order]
+      output = np.empty((len(values), self._outputs))
+      output[order] = self._batch(values=values[order], starts=np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]))
+      self._states = {}
+      return output
+
+    if not self._states:
+      output = self._batch(values=values, starts=starts)
+      for start, end in zip(starts, ends):
+        self._reset(instrument=instrument_level[instrument_codes[start]], values=values[start:end],
+                    output=output[start:end], bar_time=time_level[time_codes[end - 2]] if end - start > 1 else None)
+      return output
+
+    pieces = []
+
+    for start, end in zip(starts, ends):
+
+      instrument = instrument_level[instrument_codes[start]]
+      state = self._states.get(instrument)
+      last_closed = None
+
+      # The last closed bar is one of the latest bars, past the backfill limit the batch is as quick
+      if state is not None:
+        for row in range(end - 2, max(start, end - 2 - self._max_new_bars) - 1, -1):
+          if time_level[time_codes[row]] == state[1]:
+            last_closed = row
+            break
+
+      # New instrument, bars that do not follow on from the last update, or another frame with the same bar times
+      if last_closed is None or len(state[2]) < last_closed - start + 1 or not np.array_equal(values[last_closed], state[3], equal_nan=True):
+        output = self._batch(values=values[start:end], starts=np.array([0]))
+        self._reset(instrument=instrument, values=values[start:end], output=output,
+                    bar_time=time_level[time_codes[end - 2]] if end - start > 1 else None)
+        pieces.append(output)
+        continue
+
+      rolling, _, closed, _ = state
+
+      # Bars trimmed off the front of the frame are dropped from the output too
+      closed = closed[len(closed) - (last_closed - start + 1):]
+
+      if last_closed < end - 2:
+        pushed = np.array([rolling.push(value) for value in values[last_closed + 1:end - 1]], dtype=np.float64)
+        closed = np.concatenate([closed, pushed.reshape(-1, self._outputs)])
+
+      self._states[instrument] = (rolling, time_level[time_codes[end - 2]], closed, values[end - 2].copy())
+
+      pieces.append(closed)
+      pieces.append(np.array(rolling.peek(values[end - 1]), dtype=np.float64).reshape(1, self._outputs))
+
+    return np.concatenate(pieces) if pieces else np.empty((0, self._outputs))
+
+  def _reset(self, instrument: str, values: np.ndarray, output: np.ndarray, bar_time: str) -> None:
+
+    if bar_time is None:
+      self._states.pop(instrument, None)
+      return
+
+    self._states[instrument] = (self._resume(values=values), bar_time, output[:-1].copy(), values[-2].copy())
+
+
+class GroupedRollingExtrema(GroupedRolling):
+
+  """
+  Rolling maximum or minimum of a StockFrame column per instrument, `rolling_extrema`
+  on the first update and a `RollingExtrema` per instrument on the new bars.
+  """
+
+  def __init__(self, window: int, maximum: bool = True) -> None:
+    """Initalizes the grouped rolling extrema.
+
+    Arguments:
+    ----
+    window {int} -- Bars per window.
+
+    maximum {bool} -- The rolling maximum, or else the minimum. (default: {True})
+    """
+
+    super().__init__(window=window)
+    self._maximum = maximum
+
+  def update(self, frame: pd.DataFrame, field: str) -> np.ndarray:
+    """Returns the rolling extreme of a column for every row of the frame.
+
+    Arguments:
+    ----
+    frame {pd.DataFrame} -- The StockFrame frame, sorted by instrument.
+
+    field {str} -- The column, e.g. `high`.
+
+    Returns:
+    ----
+    {np.ndarray} -- The rolling extreme, aligned with the frame.
+    """
+
+    return self._update(frame=frame, field=field)[:, 0]
+
+  def _batch(self, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    return rolling_extrema(values=values, window=self._window, starts=starts, maximum=self._maximum)[:, np.newaxis]
+
+  def _state(self) -> RollingExtrema:
+    return RollingExtrema(window=self._window, maximum=self._maximum)
+
+
+class GroupedRollingMoments(GroupedRolling):
+
+  """
+  Rolling mean and standard deviation of a StockFrame column per instrument,
+  `rolling_moments` on the first update and a `RollingMoments` per instrument
+  on the new bars.
+  """
+
+  _outputs = 2
+
+  def update(self, frame: pd.DataFrame, field: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the rolling mean and standard deviation of a column for every row of the frame.
+
+    Arguments:
+    ----
+    frame {pd.DataFrame} -- The StockFrame frame, sorted by instrument.
+
+    field {str} -- The column, e.g. `close`.
+
+    Returns:
+    ----
+    {Tuple[np.ndarray, np.ndarray]} -- The rolling mean and standard deviation (ddof 1), aligned with the frame.
+    """
+
+    output = self._update(frame=frame, field=field)
+
+    return output[:, 0], output[:, 1]
+
+  def _batch(self, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    return np.column_stack(rolling_moments(values=values, window=self._window, starts=starts))
+
+  def _state(self) -> RollingMoments:
+    return RollingMoments(window=self._window)
@@ -0,0 +1,403 @@
+import numpy as np
+import pandas as pd
+
+from typing import Callable
+from typing import List
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from pyrobot.jit import compiled
+from pyrobot.jit import has_numba
+from pyrobot.rolling import GroupedRolling
+
+# Steps of `grouped_scan`, `step(inputs, params, state, outputs, position)`:
+#
+#   inputs    -- The input columns of the bar.
+#   params    -- The indicator arguments, e.g. the period.
+#   state     -- Carried from bar to bar, all zeros on the first bar of an instrument.
+#   outputs   -- Written by the step, NaN before.
+#   position  -- The bar number within the instrument, 0 on the first bar.
+#
+# They run as numba kernels on arrays, or as Python on lists when numba is not installed,
+# so only indexing, arithmetic and `min`/`max` are used.
+
+def wilder_step(inputs, params, state, outputs, position):
+  """Wilder smoothing (RMA) of every input column, seeded with the mean of the first `period` values.
+
+  params = (period,), state = (average, count) per column.
+  """
+
+  period = params[0]
+
+  for column in range(len(inputs)):
+
+    value = inputs[column]
+    average = 2 * column
+    count = average + 1
+
+    # NaN bars, e.g. the first price change, are skipped
+    if value == value:
+      state[count] += 1
+      state[average] += (value - state[average]) / min(state[count], period)
+
+    outputs[column] = state[average] if state[count] >= period else np.nan
+
+def heikin_ashi_step(inputs, params, state, outputs, position):
+  """Heikin-Ashi open and close of (open, high, low, close), state = (open, close)."""
+
+  ha_close = (inputs[0] + inputs[1] + inputs[2] + inputs[3]) / 4
+
+  if position == 0:
+    ha_open = (inputs[0] + inputs[3]) / 2
+  else:
+    ha_open = (state[0] + state[1]) / 2
+
+  state[0] = ha_open
+  state[1] = ha_close
+
+  outputs[0] = ha_open
+  outputs[1] = ha_close
+
+def supertrend_step(inputs, params, state, outputs, position):
+  """Supertrend of (basic upper band, basic lower band, close).
+
+  state = (final upper band, final lower band, close, trend), outputs = (final upper band,
+  final lower band, trend), the band on the wrong side of the trend is NaN.
+  """
+
+  basic_upperband = inputs[0]
+  basic_lowerband = inputs[1]
+  close = inputs[2]
+
+  if position == 0:
+    final_upperband = basic_upperband
+    final_lowerband = basic_lowerband
+    trend = -1.0
+
+  else:
+    previous_upperband = state[0]
+    previous_lowerband = state[1]
+    previous_close = state[2]
+    trend = state[3]
+
+    # The bands only tighten, until the close crosses them
+    if previous_upperband != previous_upperband or basic_upperband < previous_upperband or previous_close > previous_upperband:
+      final_upperband = basic_upperband
+    else:
+      final_upperband = previous_upperband
+
+    if previous_lowerband != previous_lowerband or basic_lowerband > previous_lowerband or previous_close < previous_lowerband:
+      final_lowerband = basic_lowerband
+    else:
+      final_lowerband = previous_lowerband
+
+    if close > previous_upperband:
+      trend = 1.0
+    elif close < previous_lowerband:
+      trend = -1.0
+
+  state[0] = final_upperband
+  state[1] = final_lowerband
+  state[2] = close
+  state[3] = trend
+
+  outputs[0] = np.nan if trend > 0 else final_upperband
+  outputs[1] = final_lowerband if trend > 0 else np.nan
+  outputs[2] = trend
+
+def parabolic_sar_step(inputs, params, state, outputs, position):
+  """Parabolic SAR of (high, low, close).
+
+  params = (min_af, max_af), state = (psar, bull, af, high point, low point, the highs
+  and the lows of the last 2 bars), outputs = (psar, bull), bull is NaN on the first 2 bars.
+  """
+
+  high = inputs[0]
+  low = inputs[1]
+  min_af = params[0]
+  max_af = params[1]
+
+  if position < 2:
+
+    if position == 0:
+      state[1] = 1.0
+      state[2] = min_af
+      state[3] = high
+      state[4] = low
+
+    psar = inputs[2]
+    bull = np.nan
+
+  else:
+    psar = state[0]
+    bull = state[1]
+    af = state[2]
+    hp = state[3]
+    lp = state[4]
+
+    if bull > 0:
+      psar = psar + af * (hp - psar)
+    else:
+      psar = psar + af * (lp - psar)
+
+    reverse = False
+
+    if bull > 0:
+      if low < psar:
+        bull = 0.0
+        reverse = True
+        psar = hp
+        lp = low
+        af = min_af
+    else:
+      if high > psar:
+        bull = 1.0
+        reverse = True
+        psar = lp
+        hp = high
+        af = min_af
+
+    if not reverse:
+      if bull > 0:
+        if high > hp:
+          hp = high
+          af = min(af + min_af, max_af)
+        if state[7] < psar:
+          psar = state[7]
+        if state[8] < psar:
+          psar = state[8]
+      else:
+        if low < lp:
+          lp = low
+          af = min(af + min_af, max_af)
+        if state[5] > psar:
+          psar = state[5]
+        if state[6] > psar:
+          psar = state[6]
+
+    state[1] = bull
+    state[2] = af
+    state[3] = hp
+    state[4] = lp
+
+  state[0] = psar
+  state[6] = state[5]
+  state[5] = high
+  state[8] = state[7]
+  state[7] = low
+
+  outputs[0] = psar
+  outputs[1] = bull
+
+
+def _scan_arrays(step, inputs, params, starts, ends, states, positions, outputs):
+
+  for group in range(len(starts)):
+
+    state = states[group]
+    position = positions[group]
+
+    for row in range(starts[group], ends[group]):
+      step(inputs[row], params, state, outputs[row], position)
+      position += 1
+
+    positions[group] = position
+
+def _scan_lists(step, inputs, params, starts, ends, states, positions, outputs):
+
+  # Lists, indexing numpy arrays one value at a time is slower than the step itself
+  rows = inputs.tolist()
+  results = outputs.tolist()
+  params = params.tolist()
+
+  for group in range(len(starts)):
+
+    state = states[group].tolist()
+    position = int(positions[group])
+
+    for row in range(starts[group], ends[group]):
+      step(rows[row], params, state, results[row], position)
+      position += 1
+
+    states[group] = state
+    positions[group] = position
+
+  outputs[:] = results
+
+def grouped_scan(step: Callable, inputs: np.ndarray, starts: np.ndarray = None, params: Sequence[float] = (),
+                 state_size: int = 1, output_size: int = 1, states: np.ndarray = None,
+                 positions: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+  """Runs a path-dependent step over concatenated instruments, bar after bar.
+
+  The loop is compiled with numba when it is installed, and runs as Python
+  on lists otherwise. Every instrument starts from its own state, so
+  nothing carries over from the previous instrument.
+
+  Arguments:
+  ----
+  step {Callable} -- The step, e.g. `wilder_step`, see the steps above.
+
+  inputs {np.ndarray} -- The (rows, columns) inputs of all the instruments, one after the other.
+
+  starts {np.ndarray} -- The first row of every instrument. (default: {one instrument})
+
+  params {Sequence[float]} -- The step arguments. (default: {()})
+
+  state_size {int} -- Values of the state. (default: {1})
+
+  output_size {int} -- Values written per bar. (default: {1})
+
+  states {np.ndarray} -- The (instruments, state_size) states to resume from, e.g. returned
+      by an earlier call on the bars before. (default: {zeros, the full history})
+
+  positions {np.ndarray} -- The bars per instrument already scanned, with `states`. (default: {zeros})
+
+  Returns:
+  ----
+  {Tuple[np.ndarray, np.ndarray, np.ndarray]} -- The (rows, output_size) outputs, the states and
+      the positions after the last bar of every instrument.
+  """
+
+  inputs = np.asarray(inputs, dtype=np.float64)
+  inputs = inputs.reshape(len(inputs), -1)
+
+  starts = np.array([0] if starts is None else starts, dtype=np.int64)
+  ends = np.r_[starts[1:], len(inputs)].astype(np.int64)
+
+  states = np.zeros((len(starts), state_size)) if states is None else np.array(states, dtype=np.float64).reshape(len(starts), state_size)
+  positions = np.zeros(len(starts), dtype=np.int64) if positions is None else np.array(positions, dtype=np.int64)
+  params = np.asarray(params, dtype=np.float64)
+  outputs = np.full((len(inputs), output_size), np.nan)
+
+  if len(inputs):
+    if has_numba():
+      compiled(_scan_arrays)(compiled(step), inputs, params, starts, ends, states, positions, outputs)
+    else:
+      _scan_lists(step, inputs, params, starts, ends, states, positions, outputs)
+
+  return outputs, states, positions
+
+
+class ScanState():
+
+  """
+  The state of one instrument, to carry a `grouped_scan` on bar by bar.
+  """
+
+  def __init__(self, step: Callable, params: Sequence[float], state: np.ndarray, position: int, output_size: int) -> None:
+    """Initalizes the scan state.
+
+    Arguments:
+    ----
+    step {Callable} -- The step.
+
+    params {Sequence[float]} -- The step arguments.
+
+    state {np.ndarray} -- The state after the last bar scanned.
+
+    position {int} -- The bars scanned.
+
+    output_size {int} -- Values written per bar.
+    """
+
+    self._step = step
+    self._params = np.asarray(params, dtype=np.float64)
+    self._state = np.array(state, dtype=np.float64)
+    self._position = int(position)
+    self._output_size = output_size
+
+  def push(self, inputs: Union[float, np.ndarray]) -> np.ndarray:
+    """Scans the next bar and returns its outputs."""
+
+    outputs, states, positions = grouped_scan(
+      step=self._step,
+      inputs=np.reshape(inputs, (1, -1)),
+      params=self._params,
+      state_size=len(self._state),
+      output_size=self._output_size,
+      states=self._state[np.newaxis],
+      positions=[self._position]
+    )
+
+    self._state = states[0]
+    self._position = int(positions[0])
+
+    return outputs[0]
+
+  def peek(self, inputs: Union[float, np.ndarray]) -> np.ndarray:
+    """Returns the outputs of the next bar without scanning it, e.g. for a forming bar."""
+
+    outputs, _, _ = grouped_scan(
+      step=self._step,
+      inputs=np.reshape(inputs, (1, -1)),
+      params=self._params,
+      state_size=len(self._state),
+      output_size=self._output_size,
+      states=self._state[np.newaxis],
+      positions=[self._position]
+    )
+
+    return outputs[0]
+
+
+class GroupedScan(GroupedRolling):
+
+  """
+  A `grouped_scan` of StockFrame columns, kept up to date bar by bar.
+
+  The first update scans the full history of every instrument, later
+  updates resume every instrument from its state at the last closed bar.
+  """
+
+  def __init__(self, step: Callable, params: Sequence[float] = (), state_size: int = 1, output_size: int = 1) -> None:
+    """Initalizes the grouped scan.
+
+    Arguments:
+    ----
+    step {Callable} -- The step, e.g. `wilder_step`.
+
+    params {Sequence[float]} -- The step arguments. (default: {()})
+
+    state_size {int} -- Values of the state. (default: {1})
+
+    output_size {int} -- Values written per bar. (default: {1})
+    """
+
+    super().__init__(window=None)
+
+    self._step = step
+    self._params = list(params)
+    self._state_size = state_size
+    self._outputs = output_size
+
+  def update(self, frame: pd.DataFrame, fields: List[str]) -> np.ndarray:
+    """Returns the (rows, output_size) outputs of the scan of the columns for every row of the frame.
+
+    Arguments:
+    ----
+    frame {pd.DataFrame} -- The StockFrame frame, sorted by instrument.
+
+    fields {List[str]} -- The input columns, in the order of the step inputs.
+
+    Returns:
+    ----
+    {np.ndarray} -- The outputs, aligned with the frame.
+    """
+
+    return self._update(frame=frame, field=list(fields))
+
+  def _batch(self, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+
+    outputs, _, _ = grouped_scan(step=self._step, inputs=values, starts=starts, params=self._params,
+                                 state_size=self._state_size, output_size=self._outputs)
+
+    return outputs
+
+  def _resume(self, values: np.ndarray) -> ScanState:
+
+    # The state depends on the full history, scan the closed bars again
+    _, states, positions = grouped_scan(step=self._step, inputs=values[:-1], params=self._params,
+                                        state_size=self._state_size, output_size=self._outputs)
+
+    return ScanState(step=self._step, params=self._params, state=states[0], position=positions[0], output_size=self._outputs)
@@ -0,0 +1,173 @@
+import time
+import pytz
+import numpy as np
+import pandas as pd
+
+from datetime import datetime
+from datetime import timedelta
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+# Weekly sessions, (open weekday, open time, close weekday, close time) in the session timezone, Monday = 0
+SESSIONS: Dict[str, Tuple[str, List[Tuple[int, str, int, str]]]] = {
+  # Open Sunday 10pm, close Friday 9pm London
+  'forex': ('Europe/London', [(6, '22:00', 4, '21:00')]),
+  'us_pre': ('UTC', [(day, '08:00', day, '13:30') for day in range(5)]),
+  'us_regular': ('UTC', [(day, '13:30', day, '20:00') for day in range(5)]),
+  'us_post': ('UTC', [(day, '20:00', day + 1, '00:00') for day in range(5)]),
+  # No sessions = always open
+  'crypto': ('UTC', []),
+}
+
+_calendars: Dict[str, 'SessionCalendar'] = {}
+
+class SessionCalendar():
+
+  """
+  Precomputed open and close times of an asset class.
+
+  The sessions of every week between `start_year` and `end_year` are
+  converted once to sorted int64 epoch seconds, so whether a whole column
+  of bars is open is one `searchsorted`. The calendar is extended when it
+  is asked about a time outside of its years.
+  """
+
+  def __init__(self, asset_class: str = 'forex', start_year: int = None, end_year: int = None) -> None:
+    """Initalizes the session calendar.
+
+    Arguments:
+    ----
+    asset_class {str} -- One of the `SESSIONS`. (default: {'forex'})
+
+    start_year {int} -- First year precomputed. (default: {5 years ago})
+
+    end_year {int} -- Last year precomputed. (default: {next year})
+    """
+
+    if asset_class not in SESSIONS:
+      raise ValueError("Asset class allowed: {asset_classes}".format(asset_classes=', '.join(SESSIONS)))
+
+    this_year = datetime.utcnow().year
+
+    self._asset_class = asset_class
+    self._start_year = start_year or this_year - 5
+    self._end_year = end_year or this_year + 1
+
+    self._opens, self._closes = self._build(start_year=self._start_year, end_year=self._end_year)
+
+  @property
+  def asset_class(self) -> str:
+    return self._asset_class
+
+  @property
+  def sessions(self) -> Tuple[np.ndarray, np.ndarray]:
+    """The open and the close epoch seconds, sorted."""
+
+    return self._opens, self._closes
+
+  def is_open(self, timestamps: Union[np.ndarray, List[int]]) -> np.ndarray:
+    """Returns whether the market is open at every epoch second of `timestamps`."""
+
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+
+    if len(timestamps):
+      self._extend(timestamp_min=timestamps.min(), timestamp_max=timestamps.max())
+
+    # The last session opened at or before every timestamp
+    session = np.searchsorted(self._opens, timestamps, side='right') - 1
+
+    return (session >= 0) & (timestamps < self._closes[np.maximum(session, 0)])
+
+  def is_bar_open(self, bar_times: Union[pd.Index, np.ndarray, List[str]]) -> np.ndarray:
+    """Returns whether the market is open at every bar time, e.g. the `fromdate` level of a StockFrame."""
+
+    return self.is_open(timestamps=bar_timestamps(bar_times=bar_times))
+
+  def is_open_now(self) -> bool:
+    return bool(self.is_open(timestamps=[int(time.time())])[0])
+
+  def next_open(self, timestamp: int) -> int:
+    """Returns `timestamp` when the market is open, or else the epoch seconds of the next open."""
+
+    if self.is_open(timestamps=[timestamp])[0]:
+      return int(timestamp)
+
+    self._extend(timestamp_min=timestamp, timestamp_max=timestamp + 7 * 24 * 3600)
+
+    return int(self._opens[np.searchsorted(self._opens, timestamp, side='right')])
+
+  def next_close(self, timestamp: int) -> int:
+    """Returns the epoch seconds the session open at `timestamp` closes, or the next session when closed."""
+
+    self._extend(timestamp_min=timestamp, timestamp_max=timestamp + 7 * 24 * 3600)
+
+    return int(self._closes[np.searchsorted(self._closes, timestamp, side='right')])
+
+  def _extend(self, timestamp_min: int, timestamp_max: int) -> None:
+
+    # Always open, nothing to extend
+    if not SESSIONS[self._asset_class][1]:
+      return
+
+    year_min = datetime.utcfromtimestamp(int(timestamp_min)).year
+    year_max = datetime.utcfromtimestamp(int(timestamp_max)).year
+
+    if year_min >= self._start_year and year_max <= self._end_year:
+      return
+
+    self._start_year = min(self._start_year, year_min)
+    self._end_year = max(self._end_year, year_max)
+    self._opens, self._closes = self._build(start_year=self._start_year, end_year=self._end_year)
+
+  def _build(self, start_year: int, end_year: int) -> Tuple[np.ndarray, np.ndarray]:
+
+    timezone_name, weekly_sessions = SESSIONS[self._asset_class]
+    timezone = pytz.timezone(timezone_name)
+
+    # Always open, one session over all the years
+    if not weekly_sessions:
+      return np.array([0], dtype=np.int64), np.array([np.iinfo(np.int64).max], dtype=np.int64)
+
+    # From the Monday of the week before start_year to the end of end_year
+    week = datetime(start_year, 1, 1) - timedelta(days=datetime(start_year, 1, 1).weekday() + 7)
+    last_day = datetime(end_year + 1, 1, 1)
+
+    opens = []
+    closes = []
+
+    while week < last_day:
+
+      for open_day, open_time, close_day, close_time in weekly_sessions:
+
+        open_local = week + timedelta(days=open_day, hours=int(open_time[:2]), minutes=int(open_time[3:]))
+        close_local = week + timedelta(days=close_day, hours=int(close_time[:2]), minutes=int(close_time[3:]))
+
+        # The session closes in the next week, e.g. forex
+        if close_local <= open_local:
+          close_local += timedelta(days=7)
+
+        opens.append(int(timezone.localize(open_local).timestamp()))
+        closes.append(int(timezone.localize(close_local).timestamp()))
+
+      week += timedelta(days=7)
+
+    order = np.argsort(opens)
+
+    return np.array(opens, dtype=np.int64)[order], np.array(closes, dtype=np.int64)[order]
+
+
+def bar_timestamps(bar_times: Union[pd.Index, np.ndarray, List[str]]) -> np.ndarray:
+  """Converts `2021-06-24t06:30:00z` bar times to int64 epoch seconds."""
+
+  return pd.to_datetime(pd.Index(bar_times), format='%Y-%m-%dt%H:%M:%Sz').asi8 // 10**9
+
+def get_calendar(asset_class: str) -> SessionCalendar:
+  """Returns the session calendar of the asset class, built once per process."""
+
+  if asset_class not in _calendars:
+    _calendars[asset_class] = SessionCalendar(asset_class=asset_class)
+
+  return _calendars[asset_class]
@@ -0,0 +1,70 @@
+import numpy as np
+
+from multiprocessing import shared_memory
+
+from typing import Dict
+from typing import Tuple
+
+class SharedArrays():
+
+  """
+  Packs a dict of numpy arrays into a single shared memory block.
+
+  The `spec` is a small picklable description of the block that worker
+  processes use to map the same arrays without copying them.
+  """
+
+  def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+
+    layout = {}
+    offset = 0
+
+    for name, array in arrays.items():
+      array = np.ascontiguousarray(array)
+
+      # Keep every array 8 bytes aligned
+      offset = (offset + 7) // 8 * 8
+      layout[name] = (offset, array.dtype.str, array.shape)
+      offset += array.nbytes
+
+    self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    self._layout = layout
+
+    for name, array in arrays.items():
+      start, dtype, shape = layout[name]
+      view = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=start)
+      view[...] = array
+
+  @property
+  def spec(self) -> Tuple[str, dict]:
+    return (self._shm.name, self._layout)
+
+  def __enter__(self) -> 'SharedArrays':
+    return self
+
+  def __exit__(self, *args) -> None:
+    self.release()
+
+  def release(self) -> None:
+
+    self._shm.close()
+    self._shm.unlink()
+
+def attach(spec: Tuple[str, dict]) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+  """Maps the arrays of a `SharedArrays.spec` inside a worker process.
+
+  The returned shared memory handle must be closed once the arrays are
+  no longer used.
+  """
+
+  name, layout = spec
+
+  # Pool workers share the resource tracker of the creating process, which
+  # unlinks the block once in `SharedArrays.release`.
+  shm = shared_memory.SharedMemory(name=name)
+
+  arrays = {}
+  for key, (start, dtype, shape) in layout.items():
+    arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+
+  return shm, arrays
@@ -1,7 +1,5 @@
+import os
 import pandas as pd
-import pprint
-import requests
-import ast
 import operator
 import numpy as np 
 # import matplotlib.pyplot as plt
@@ -19,16 +17,34 @@ pd.set_option('display.max_rows', 1000)
 
 class StockFrame():
 
-    def __init__(self, data: List[Dict], period: str) -> None:
+    def __init__(self, data: Union[List[Dict], Dict[str, np.ndarray]], period: str) -> None:
 
         self._data = data
         self._period = period
         self._frame: pd.DataFrame = self.create_frame()
         self._symbol_groups = None
         self._symbol_rolling_groups = None
+        self._capacity: int = None
+        self._spill_path: str = None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, period: str) -> 'StockFrame':
+        """Creates a StockFrame around an existing multi-index frame, for example a loaded checkpoint."""
+
+        stock_frame = cls.__new__(cls)
+        stock_frame._data = None
+        stock_frame._period = period
+        stock_frame._frame = frame
+        stock_frame._symbol_groups = None
+        stock_frame._symbol_rolling_groups = None
+        stock_frame._capacity = None
+        stock_frame._spill_path = None
+
+        return stock_frame
 
     @property
     def frame(self) -> pd.DataFrame:
+        # `add_rows` and the retention replace the frame, read it through this property rather than keeping it
         return self._frame
 
     @property
@@ -62,28 +78,88 @@ class StockFrame():
 
     def add_rows(self, data: List[Dict]) -> None:
 
-        column_names = ['open', 'close', 'high', 'low']
+        if not data:
+            return
+
+        column_names = ['open', 'close', 'high', 'low', 'volume']
+
+        # Define the Index Tuples.
+        new_index = pd.MultiIndex.from_tuples(
+            [(quote['instrumentid'], quote['fromdate']) for quote in data],
+            names=self._frame.index.names
+        )
+
+        # Define the values, a missing volume would leave NaN rows the signals drop.
+        new_rows = pd.DataFrame(
+            data=[[quote['open'], quote['close'], quote['high'], quote['low'], quote.get('volume', 0)] for quote in data],
+            index=new_index,
+            columns=column_names
+        )
+        new_rows = new_rows[~new_rows.index.duplicated(keep='last')]
+
+        # Update the bars already in the frame, e.g. a forming bar
+        existing = new_rows.index.isin(self._frame.index)
+        if existing.any():
+            self._frame.loc[new_rows.index[existing], column_names] = new_rows[existing].values
+
+        # Append the others as one batch, only sort when they are not the latest bars
+        if not existing.all():
+            frame = pd.concat([self._frame, new_rows[~existing]])
+
+            if not frame.index.is_monotonic_increasing:
+                frame.sort_index(inplace=True)
+
+            self._frame = frame
+
+        self._trim()
+
+    def set_retention(self, capacity: int, spill_path: str = None) -> None:
+        """Keeps only the latest `capacity` bars per instrument, so a live frame stops growing.
+
+        Arguments:
+        ----
+        capacity {int} -- Bars kept per instrument, at least `Indicators.max_lookback()`
+            so the signals do not change.
+
+        spill_path {str} -- CSV file the older bars are appended to, `None` to drop them. (default: {None})
+        """
+
+        if capacity < 1:
+            raise ValueError("The capacity must be at least 1, got {capacity}".format(capacity=capacity))
+
+        self._capacity = capacity
+        self._spill_path = spill_path
+
+        self._trim(slack=0)
+
+    def _trim(self, slack: int = None) -> None:
+
+        if self._capacity is None:
+            return
+
+        # Trim once an instrument is 10% over, not on every bar
+        if slack is None:
+            slack = max(self._capacity // 10, 1)
+
+        if self._frame.groupby(level=0, sort=False).size().max() <= self._capacity + slack:
+            return
 
-        for quote in data:
+        # 0 = latest bar of the instrument
+        expired = self._frame.groupby(level=0, sort=False).cumcount(ascending=False).to_numpy() >= self._capacity
 
-            # Define the Index Tuple.
-            row_id = (quote['instrumentid'], quote['fromdate'])
+        if self._spill_path:
+            spill = self._frame.loc[expired, [column for column in ['open', 'high', 'low', 'close', 'volume'] if column in self._frame.columns]]
+            spill.to_csv(self._spill_path, mode='a', header=not os.path.exists(self._spill_path))
 
-            # Define the values.
-            row_values = [
-                quote['open'],
-                quote['close'],
-                quote['high'],
-                quote['low'],
-            ]
+        frame = self._frame[~expired]
+        frame.index = frame.index.remove_unused_levels()
 
-            # Create a new row.
-            new_row = pd.Series(data=row_values)
+        self._frame = frame
 
-            # Add the row.
-            self.frame.loc[row_id, column_names] = new_row.values
+    def last_bar_times(self) -> Dict[str, str]:
+        """Returns the time of the latest bar of every instrument, e.g. `{'18 - gold': '2021-06-24t06:30:00z'}`."""
 
-            self.frame.sort_index(inplace=True)
+        return dict(self._frame.groupby(level=0, sort=False).tail(n=1).index.tolist())
 
     def do_stock_exist(self, symbol: str) -> bool:
 
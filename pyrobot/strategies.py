@@ -5,6 +5,11 @@ from typing import Union
 
 from pyrobot.indicators import Indicators
 from pyrobot.stock_frame import StockFrame
+from pyrobot.trade_ledger import TradeLedger
+from pyrobot.backtest_engine import SIDES
+from pyrobot.backtest_engine import run_symbols
+from pyrobot.backtest_engine import prepare_grid_backtest_arrays
+from pyrobot.backtest_engine import prepare_new_backtest_arrays
 
 class Strategies():
 
@@ -14,10 +19,14 @@ class Strategies():
     self._indicator_client: Indicators = indicator_client
 
     self._period = self._stock_frame.period
-    self._frame = self._stock_frame.frame
 
     self._strategy_name = ''
     self._signals = {}
+    self._trade_ledger: TradeLedger = None
+
+  @property
+  def _frame(self) -> pd.DataFrame:
+    return self._stock_frame.frame
 
   def empty_indicators(self) -> None:
 
@@ -569,15 +578,22 @@ class Strategies():
 
     return self._frame
   
-  def fractals_alligator(self) -> None:
+  def fractals_alligator(self, method: str = 'wilders') -> None:
+    """Adds the fractals alligator strategy.
+
+    Arguments:
+    ----
+    method {str} -- `wilders` for the Wilder's smoothing of the RSI and the alligator and the recursive
+        Heikin Ashi, `ewm` for the exponential moving averages and the shifted Heikin Ashi used before. (default: {'wilders'})
+    """
 
     self._strategy_name = 'fractals_alligator'
 
     # Indicators
-    self._indicator_client.rsi()
+    self._indicator_client.rsi(method=method)
     self._indicator_client.macd()
-    self._indicator_client.alligator()
-    self._indicator_client.heikin_ashi()
+    self._indicator_client.alligator(method=method)
+    self._indicator_client.heikin_ashi(method='shift' if method == 'ewm' else 'recursive')
     self._indicator_client.parabolic_sar()
     self._indicator_client.donchian_channel()
     self._indicator_client.stochastic_oscillator()
@@ -849,7 +865,12 @@ class Strategies():
 
     return conditions
 
-  def backtest_strategy(self, multiple_trade: bool = False, atr: bool = False) -> None:
+  @property
+  def trade_ledger(self) -> TradeLedger:
+    """The trades closed by the last `new_backtest_strategy` run."""
+    return self._trade_ledger
+
+  def backtest_strategy(self, multiple_trade: bool = False, atr: bool = False, workers: int = 1) -> None:
 
     print('Backtesting ...')
 
@@ -859,8 +880,8 @@ class Strategies():
     # Remove the first row due to no signal
     self._frame.drop(self._frame.head(1).index, inplace=True)
 
-    # Create results in dataframe type
-    results = pd.DataFrame(columns=[
+    # Create results columns
+    columns = [
       'earn_ratio',   # earn ratio
       'loss_ratio',   # loss ratio
       'open',         # total number of positions opened
@@ -874,7 +895,19 @@ class Strategies():
       'profit_1',     # total money earned
       'win_rate_2',   # win rate of the total win and loss (remain counted as loss)
       'profit_2',     # total money earned
-    ])
+    ]
+    rows = []
+
+    # Run every symbol, across worker processes if asked
+    arrays, tasks = prepare_grid_backtest_arrays(self._stock_frame.symbol_groups)
+    symbol_results = run_symbols(
+      'grid_backtest_symbol',
+      arrays,
+      tasks,
+      workers=workers,
+      multiple_trade=multiple_trade,
+      atr=atr
+    )
 
     # For each earn pct
     for i in range(1, 10): # from 1.001 to 1.009
@@ -890,114 +923,13 @@ class Strategies():
           earn_ratio = 1 + (i / 1000)
           loss_ratio = 1 + (j / 1000)
 
-        # Create result dict
-        result = {}
-        result['open'] = 0
-        result['miss'] = 0
-        result['win'] = 0
-        result['loss'] = 0
-        result['open/close'] = 0
-        result['win/loss'] = 0
-        result['remain'] = 0
-
-        # For each symbol
-        for symbol, group in self._stock_frame.symbol_groups: # symbol = '18 - gold'
-
-          positions = []
-
-          # For each row / candle in dataframe
-          for index, candle in group.iterrows(): # index = '18 - gold', '2021-06-24t06:30:00z' ==> type tuple
-           
-            # Check signal
-            if candle['signal'] != '-':
-
-              open_trade = False
-
-              # Check able to open multiple positions
-              if multiple_trade:
-                open_trade = True
-              else:
-
-                # Check has opened position anot
-                if len(positions) == 0:
-                  open_trade = True
-                else:
-                  result['miss'] += 1
-
-              # If able to open position
-              if open_trade:
-
-                # Create position
-                position = {}
-                position['fromdate'] = index[1]
-
-                # Set take profit and stop loss
-                if atr:
-                  if candle['signal'] == 'buy':
-                    position['tp'] = candle['open'] + (candle['atr'] * earn_ratio)
-                    position['sl'] = candle['open'] - (candle['atr'] * loss_ratio)
-                  else:
-                    position['tp'] = candle['open'] - (candle['atr'] * earn_ratio)
-                    position['sl'] = candle['open'] + (candle['atr'] * loss_ratio)
-
-                else:
-                  if candle['signal'] == 'buy':
-                    position['tp'] = candle['open'] * earn_ratio
-                    position['sl'] = candle['open'] / loss_ratio
-                  else:
-                    position['tp'] = candle['open'] / earn_ratio
-                    position['sl'] = candle['open'] * loss_ratio
-
-                # Add position to positions
-                positions.append(position)
-                result['open'] += 1
-            
-            ## Check positions met tp and ls
-
-            # Check position is empty
-            if positions:
-              
-              # For each position opened
-              for position in positions:
-
-                # Check does the position met the tp and sl
-                current_time = index[1]
-                current_high = candle['high']
-                current_low  = candle['low']
-
-                # Conditions
-                win = False
-                loss = False
-
-                # Win
-                if current_low < position['tp'] < current_high:
-                  result['win'] += 1
-                  win = True
-
-                # Loss
-                if current_low < position['sl'] < current_high:
-                  result['loss'] += 1
-                  loss = True
-
-                # Win or loss met
-                if win | loss:
-
-                  # Check does the position open and close in the same candle
-                  if position['fromdate'] == current_time:
-                    result['open/close'] += 1
-
-                  # Remove (close) the position in positions
-                  positions.remove(position)
-
-                # Both win and loss met
-                if win & loss:
-                  result['win/loss'] += 1
-
-          # The remain positions havent close yet
-          result['remain'] += int(len(positions))
-
         # Add each symbol results togather
-        results = results.append({
+        result = {key: 0 for key in ['open', 'miss', 'win', 'loss', 'open/close', 'win/loss', 'remain']}
+        for symbol_result in symbol_results:
+          for key in result:
+            result[key] += symbol_result[(i, j)][key]
+
+        rows.append({
           'earn_ratio':   earn_ratio,
           'loss_ratio':   loss_ratio,
           
@@ -1014,9 +946,10 @@ class Strategies():
 
           'win_rate_2':   str(round(result['win'] / (result['win'] + result['loss'] + result['remain']) * 100, 2)) + '%',
           'profit_2':     (result['win'] * i) - ((result['loss'] + result['remain']) * j),    
-        }, ignore_index = True)
+        })
 
     # Print results
+    results = pd.DataFrame(data=rows, columns=columns)
     results = results.set_index(keys=['earn_ratio', 'loss_ratio'])
     print("=" * 100)
     print('Backtest Result')
@@ -1030,16 +963,31 @@ class Strategies():
     
     return results
 
-  def new_backtest_strategy(self, trading_budget: int = 50, leverage: int = 1, multiple_trade: bool = False, risk_ratio: str = '1:1', print_result: bool = True) -> pd.DataFrame:
+  def new_backtest_strategy(self, trading_budget: int = 50, leverage: int = 1, multiple_trade: bool = False, risk_ratio: str = '1:1', print_result: bool = True, verbose: bool = False, workers: int = 1) -> pd.DataFrame:
+    """Backtests the strategy signals symbol by symbol.
+
+    Arguments:
+    ----
+    verbose {bool} -- Print every closed trade while backtesting. Terminal output is slow
+        on big runs, the trades are always available in `Strategies.trade_ledger`. (default: {False})
+
+    workers {int} -- Number of processes the symbols are sharded across. The results are
+        merged in symbol order, so they are identical to the serial run. (default: {1})
+
+    Returns:
+    ----
+    {pd.DataFrame} -- The results of each symbol.
+    """
 
-    print(f'Backtesting ==> {self._strategy_name} ...')
+    if verbose:
+      print(f'Backtesting ==> {self._strategy_name} ...')
 
     # Define earn and loss ratio
     earn_ratio = float(risk_ratio.split(':')[0])
     loss_ratio = float(risk_ratio.split(':')[1])
 
-    # Create results in dataframe
-    results = pd.DataFrame(columns=[
+    # Create results columns
+    columns = [
       'symbol',           # each symbols
       'open',             # total number of positions opened
       'miss',             # total number of positions didnt opened due to not able multiple positions
@@ -1055,201 +1003,51 @@ class Strategies():
       'lost',             # total money lost
       'profit/loss',      # total money earned (trade with same trading budget)
       'equity',           # final money
-    ])
+    ]
+    rows = []
+
+    # Create the trade ledger
+    ledger = TradeLedger()
+
+    # Run every symbol, across worker processes if asked
+    arrays, tasks, times = prepare_new_backtest_arrays(self._stock_frame.symbol_groups)
+    symbol_results = run_symbols(
+      'new_backtest_symbol',
+      arrays,
+      tasks,
+      workers=workers,
+      trading_budget=trading_budget,
+      leverage=leverage,
+      multiple_trade=multiple_trade,
+      earn_ratio=earn_ratio,
+      loss_ratio=loss_ratio,
+      verbose=verbose
+    )
 
     # For each symbol
-    for symbol, group in self._stock_frame.symbol_groups: # symbol = '18 - gold'
-
-      # Move all signals to the next row
-      group['signal']      = group['signal'].shift(1)
-      group['stop_loss']   = group['stop_loss'].shift(1)   if 'stop_loss' in group else 0
-      group['take_profit'] = group['take_profit'].shift(1) if 'take_profit' in group else 0
-      group['stop_signal'] = group['stop_signal'].shift(1) if 'stop_signal' in group else '-'
-      group['atr']         = group['atr'].shift(1)         if 'atr' in group else 0
-
-      # Remove the first row due to no signal
-      group.drop(group.head(14).index, inplace=True)
-
-      # Create result dict of this symbol
-      result = {}
-      result['open'] = 1
-      result['miss'] = 0
-      result['multi'] = 0
-      result['highest'] = 0
-      result['win'] = 0
-      result['loss'] = 0
-      result['profit/loss'] = 0
-      result['open/close'] = 0
-      result['earn'] = 0
-      result['lost'] = 0
-      result['win/loss'] = 0
-      result['remain'] = 0
-
-      # Create positions slot
-      positions = []
-      ongoing_trading_budget = trading_budget
-
-      # For each row / candle in dataframe
-      for index, candle in group.iterrows(): # index = '18 - gold', '2021-06-24t06:30:00z' ==> type tuple
-        
-        # Skip this candle is no signal and opened positions
-        if candle['signal'] == '-' and not positions:
-          continue
-
-        open_trade = False
-
-        # Check signal
-        if candle['signal'] != '-':
-
-          open_trade = True
-
-          # Check able multiple trade and have opened position
-          if not multiple_trade and len(positions) > 0:
-
-            open_trade = False
-            result['miss'] += 1
-        
-        # If positions not empty
-        if positions:
-
-          current_time = index[1]
-          current_high = candle['high']
-          current_low  = candle['low']
-
-          # Get the highest record of opened positions number
-          if len(positions) > result['highest']:
-            result['highest'] = len(positions)
-
-          # For each position opened
-          for position in positions:
-
-            # Check conditions
-            win = False
-            loss = False
-            profit_loss = 0
-
-            # Win
-            if current_low < position['tp'] < current_high:
-              result['profit/loss']  += abs((position['open'] - position['tp']) * position['units_1'])
-              ongoing_trading_budget += abs((position['open'] - position['tp']) * position['units_2'])
-              result['win'] += 1
-              result['earn'] += abs((position['open'] - position['tp']) * position['units_1'])
-              profit_loss = abs((position['open'] - position['tp']) * position['units_1'])
-              win = True
-
-            # Loss
-            if current_low < position['sl'] < current_high:
-              result['profit/loss']  -= abs((position['open'] - position['sl']) * position['units_1'])
-              ongoing_trading_budget -= abs((position['open'] - position['sl']) * position['units_2'])
-              result['loss'] += 1
-              result['lost'] -= abs((position['open'] - position['sl']) * position['units_1'])
-              profit_loss = -abs((position['open'] - position['sl']) * position['units_1'])
-              loss = True
-
-            # Both win and loss met
-            if win & loss:
-              result['win/loss'] += 1
-
-            # Win or loss met
-            if win | loss:
-
-              print(f"{position['datetime']} ==> {current_time} ({position['action']}) {profit_loss}")
-
-              # Check does the position open and close in the same candle
-              if position['datetime'] == current_time:
-                result['open/close'] += 1
-
-              # Remove (close) the position in positions
-              positions.remove(position)
-        
-        # Check stop signal
-        if candle['stop_signal'] != '-' and positions:
-
-          current_time = index[1]
-          current_open = candle['open']
-          current_high = candle['high']
-          current_low  = candle['low']
-
-          # For each position opened
-          for position in positions:
-
-            closed = False
-            profit_loss = 0
-
-            if position['action'] == 'buy' and (candle['stop_signal'] == 'buy_stop' or candle['stop_signal'] == 'stop'):
-
-              profit_loss = (current_open - position['open']) * position['units_1']
-              ongoing_trading_budget += (current_open - position['open']) * position['units_2']
-              result['profit/loss'] += profit_loss
-              closed = True
-
-            if position['action'] == 'sell' and (candle['stop_signal'] == 'sell_stop' or candle['stop_signal'] == 'stop'):
-
-              profit_loss = (position['open'] - current_open) * position['units_1']
-              ongoing_trading_budget += (position['open'] - current_open) * position['units_2']
-              result['profit/loss'] += profit_loss
-              closed = True
-
-            if profit_loss > 0:
-              result['earn'] += profit_loss
-            else:
-              result['lost'] += profit_loss
-            
-            print(f"{position['datetime']} ==> {current_time} ({position['action']}) {profit_loss}")
-
-            # Remove (close) the position in positions
-            if closed:
-
-              # Check does the position open and close in the same candle
-              if position['datetime'] == current_time:
-                result['open/close'] += 1
-              
-              # Check profit loss
-              if profit_loss > 0:
-                result['win'] += 1
-              else:
-                result['loss'] += 1
-              positions.remove(position)
-              
-        # Open position
-        if open_trade:
-
-          # Create position
-          position = {}
-          position['datetime'] = index[1]
-          position['action'] = candle['signal']
-          position['open'] = candle['open']
-          position['units_1'] = trading_budget * leverage / candle['open']
-          position['units_2'] = ongoing_trading_budget * leverage / candle['open']
-          
-          # Set take profit and stop loss
-          if position['action'] == 'buy':
-            if candle['take_profit'] == 0 and candle['atr']:
-              candle['take_profit'] = candle['open'] + (candle['atr'] * earn_ratio)
-            if candle['stop_loss'] == 0 and candle['atr']:
-              candle['stop_loss'] = candle['open'] - (candle['atr'] * loss_ratio)
-          else:
-            if candle['take_profit'] == 0 and candle['atr']:
-              candle['take_profit'] = candle['open'] - (candle['atr'] * earn_ratio)
-            if candle['stop_loss'] == 0 and candle['atr']:
-              candle['stop_loss'] = candle['open'] + (candle['atr'] * loss_ratio)
-
-          position['tp'] = float(candle['take_profit'])
-          position['sl'] = float(candle['stop_loss'])
-
-          # Add position to positions
-          positions.append(position)
-          result['open'] += 1
-
-          # Position opened when there are other opened positions
-          if len(positions) > 1:
-            result['multi'] += 1
-        
-      # The remain positions havent close yet
-      result['remain'] += int(len(positions))
+    for (symbol, start, stop), symbol_result in zip(tasks, symbol_results): # symbol = '18 - gold'
+
+      result = symbol_result['result']
+
+      if verbose:
+        for entry_row, exit_row, action, profit_loss in symbol_result['log']:
+          print(f"{times[entry_row]} ==> {times[exit_row]} ({SIDES.get(action)}) {profit_loss}")
+
+      for entry_row, exit_row, action, entry_price, exit_price, units, profit_loss, equity in symbol_result['trades']:
+        ledger.record(
+          symbol=symbol,
+          entry_time=times[entry_row],
+          exit_time=times[exit_row],
+          side=SIDES.get(action),
+          entry_price=entry_price,
+          exit_price=exit_price,
+          units=units,
+          pnl=profit_loss,
+          equity=equity
+        )
 
       # Add each symbol results togather
-      results = results.append({
+      rows.append({
         'symbol':         symbol,
         'open':           result['open'],
         'miss':           result['miss'],
@@ -1264,8 +1062,11 @@ class Strategies():
         'lost':           result['lost'],
         'win_rate':       str(round(result['win'] / result['open'] * 100, 2)) + '%',
         'profit/loss':    result['profit/loss'],
-        'equity':         (ongoing_trading_budget - trading_budget) / leverage
-      }, ignore_index = True)
+        'equity':         (symbol_result['equity'] - trading_budget) / leverage
+      })
+
+    results = pd.DataFrame(data=rows, columns=columns)
+    self._trade_ledger = ledger
 
     # Print results
     if print_result:
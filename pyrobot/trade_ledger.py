@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+class TradeLedger():
+
+  """
+  Columnar record of the trades closed by a backtest.
+
+  The columns are preallocated numpy arrays that grow by doubling, so
+  recording a trade never copies the whole ledger and the result can be
+  exported to a DataFrame, CSV or Parquet in one go.
+  """
+
+  columns = [
+    'symbol',       # instrument label, e.g. '18 - gold'
+    'entry_time',   # candle the position was opened on
+    'exit_time',    # candle the position was closed on
+    'side',         # buy / sell
+    'entry_price',  # open price of the position
+    'exit_price',   # take profit, stop loss or stop signal price
+    'units',        # units traded with the fixed trading budget
+    'pnl',          # profit / loss with the fixed trading budget
+    'equity',       # ongoing trading budget after the trade is closed
+  ]
+
+  def __init__(self, capacity: int = 1024) -> None:
+
+    self._size = 0
+    self._capacity = max(int(capacity), 1)
+
+    self._symbol      = np.empty(self._capacity, dtype=object)
+    self._entry_time  = np.empty(self._capacity, dtype=object)
+    self._exit_time   = np.empty(self._capacity, dtype=object)
+    self._side        = np.empty(self._capacity, dtype=object)
+    self._entry_price = np.empty(self._capacity, dtype=np.float64)
+    self._exit_price  = np.empty(self._capacity, dtype=np.float64)
+    self._units       = np.empty(self._capacity, dtype=np.float64)
+    self._pnl         = np.empty(self._capacity, dtype=np.float64)
+    self._equity      = np.empty(self._capacity, dtype=np.float64)
+
+  def __len__(self) -> int:
+    return self._size
+
+  def _grow(self, required: int) -> None:
+
+    capacity = self._capacity
+    while capacity < required:
+      capacity *= 2
+
+    for name in self.columns:
+      column = getattr(self, '_' + name)
+      grown = np.empty(capacity, dtype=column.dtype)
+      grown[:self._size] = column[:self._size]
+      setattr(self, '_' + name, grown)
+
+    self._capacity = capacity
+
+  def record(self, symbol: str, entry_time: str, exit_time: str, side: str, entry_price: float,
+             exit_price: float, units: float, pnl: float, equity: float) -> None:
+
+    if self._size == self._capacity:
+      self._grow(self._size + 1)
+
+    i = self._size
+    self._symbol[i]      = symbol
+    self._entry_time[i]  = entry_time
+    self._exit_time[i]   = exit_time
+    self._side[i]        = side
+    self._entry_price[i] = entry_price
+    self._exit_price[i]  = exit_price
+    self._units[i]       = units
+    self._pnl[i]         = pnl
+    self._equity[i]      = equity
+
+    self._size += 1
+
+  def extend(self, ledger: 'TradeLedger') -> None:
+    """Appends all the trades of another ledger to this one."""
+
+    if not len(ledger):
+      return
+
+    required = self._size + len(ledger)
+    if required > self._capacity:
+      self._grow(required)
+
+    for name in self.columns:
+      getattr(self, '_' + name)[self._size:required] = ledger.column(name)
+
+    self._size = required
+
+  def column(self, name: str) -> np.ndarray:
+
+    if name not in self.columns:
+      raise KeyError("Unknown ledger column: {name}".format(name=name))
+
+    return getattr(self, '_' + name)[:self._size]
+
+  def to_dict(self) -> Dict[str, np.ndarray]:
+    return {name: self.column(name) for name in self.columns}
+
+  def to_frame(self) -> pd.DataFrame:
+    return pd.DataFrame(data=self.to_dict(), columns=self.columns)
+
+  def to_csv(self, path: str) -> None:
+    self.to_frame().to_csv(path, index=False)
+
+  def to_parquet(self, path: str) -> None:
+    # Requires pyarrow or fastparquet to be installed.
+    self.to_frame().to_parquet(path, index=False)
+
+  def equity_curve(self, symbol: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the exit times and the equity after each closed trade.
+
+    Arguments:
+    ----
+    symbol {str} -- Only return the curve of this symbol. (default: {None})
+
+    Returns:
+    ----
+    {Tuple[np.ndarray, np.ndarray]} -- The exit times and the equity values.
+    """
+
+    exit_time = self.column('exit_time')
+    equity = self.column('equity')
+
+    if symbol is not None:
+      mask = self.column('symbol') == symbol
+      exit_time = exit_time[mask]
+      equity = equity[mask]
+
+    return exit_time, equity
+
+  def equity_curves(self) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+
+    symbols: List[str] = list(dict.fromkeys(self.column('symbol')))
+
+    return {symbol: self.equity_curve(symbol=symbol) for symbol in symbols}
@@ -0,0 +1,259 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from pyrobot.indicators import Indicators
+from pyrobot.stock_frame import StockFrame
+from pyrobot.backtest_engine import run_symbols
+from pyrobot.backtest_engine import prepare_new_backtest_arrays
+
+class WalkForward():
+
+  """
+  Walk-forward optimization of a strategy already set on a StockFrame.
+
+  The history is split into rolling in-sample / out-of-sample windows. For
+  every parameter combination the indicators are computed once on the whole
+  history and each window only slices the rows it covers, so overlapping
+  windows never recompute the same bars. The best combination of each
+  in-sample window is then evaluated on the following out-of-sample window.
+  """
+
+  # Parameters passed to the backtest, every other key is an indicator argument
+  backtest_params = ['trading_budget', 'leverage', 'multiple_trade', 'risk_ratio']
+
+  def __init__(self, price_data_frame: StockFrame, indicator_client: Indicators, in_sample: int, out_of_sample: int,
+               step: int = None, objective: str = 'profit/loss') -> None:
+    """Initalizes the walk-forward engine.
+
+    Arguments:
+    ----
+    price_data_frame {pyrobot.StockFrame} -- The StockFrame the strategy indicators are set on.
+
+    indicator_client {pyrobot.Indicators} -- The indicator client holding the strategy indicators.
+
+    in_sample {int} -- Number of candles of each in-sample window.
+
+    out_of_sample {int} -- Number of candles of each out-of-sample window.
+
+    step {int} -- Number of candles the windows move forward, defaults to `out_of_sample`. (default: {None})
+
+    objective {str} -- The backtest result summed over the symbols that is maximized
+        in-sample, for example `profit/loss` or `win`. (default: {'profit/loss'})
+
+    Usage:
+    ----
+        >>> strategies.supertrend_psar_indicators()
+        >>> walk_forward = WalkForward(price_data_frame=stock_frame, indicator_client=indicator_client, in_sample=2000, out_of_sample=500)
+        >>> walk_forward.run(param_grid={'risk_ratio': ['1:1', '2:1'], 'supertrend.multiplier': [2, 3]}, workers=4)
+    """
+
+    self._stock_frame: StockFrame = price_data_frame
+    self._indicator_client: Indicators = indicator_client
+
+    self._in_sample = in_sample
+    self._out_of_sample = out_of_sample
+    self._step = step or out_of_sample
+    self._objective = objective
+
+  def windows(self) -> List[Tuple[str, str, str, str]]:
+    """Returns the `(in_sample_start, in_sample_end, out_of_sample_start, out_of_sample_end)` candle times of every window."""
+
+    times = np.unique(self._stock_frame.frame.index.get_level_values(1).to_numpy().astype(str))
+
+    windows = []
+    start = 0
+
+    while start + self._in_sample + self._out_of_sample <= len(times):
+
+      in_sample_end = start + self._in_sample
+      out_of_sample_end = in_sample_end + self._out_of_sample
+
+      windows.append((
+        times[start],
+        times[in_sample_end - 1],
+        times[in_sample_end],
+        times[out_of_sample_end - 1],
+      ))
+
+      start += self._step
+
+    return windows
+
+  def run(self, param_grid: Dict[str, List[Any]], trading_budget: int = 50, leverage: int = 1, multiple_trade: bool = False,
+          risk_ratio: str = '1:1', workers: int = 1, print_result: bool = True) -> pd.DataFrame:
+    """Optimizes the parameters in-sample and evaluates them out-of-sample.
+
+    Arguments:
+    ----
+    param_grid {Dict[str, List[Any]]} -- The values to try for each parameter. Backtest parameters use
+        their name (`risk_ratio`), indicator arguments use `<indicator column name>.<argument>`
+        (`supertrend.multiplier`).
+
+    workers {int} -- Number of processes the windows and symbols are sharded across. (default: {1})
+
+    Returns:
+    ----
+    {pd.DataFrame} -- One row per window with the best parameters and their results.
+    """
+
+    windows = self.windows()
+    if not windows:
+      raise ValueError("Not enough candles for one in-sample and out-of-sample window.")
+
+    names = list(param_grid.keys())
+    combinations = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+
+    defaults = {
+      'trading_budget': trading_budget,
+      'leverage': leverage,
+      'multiple_trade': multiple_trade,
+      'risk_ratio': risk_ratio,
+    }
+
+    # Keep the indicator arguments to put them back at the end
+    indicators = self._indicator_client._current_indicators
+    original_args = {column_name: dict(indicator['args']) for column_name, indicator in indicators.items()}
+
+    # Group the combinations by indicator arguments, the indicators are computed once per group
+    indicator_groups: Dict[tuple, List[dict]] = {}
+    for combination in combinations:
+      indicator_params = tuple((name, value) for name, value in combination.items() if name not in self.backtest_params)
+      indicator_groups.setdefault(indicator_params, []).append(combination)
+
+    scores = []
+
+    try:
+      for indicator_params, group in indicator_groups.items():
+
+        self._set_indicator_args(original_args=original_args, indicator_params=indicator_params)
+
+        # Rows of every window segment inside the full history arrays
+        arrays, symbol_tasks, times = prepare_new_backtest_arrays(self._stock_frame.symbol_groups)
+        tasks, segments = self._window_tasks(windows=windows, symbol_tasks=symbol_tasks, times=times)
+
+        for combination in group:
+
+          params = dict(defaults)
+          params.update({name: value for name, value in combination.items() if name in self.backtest_params})
+          earn_ratio, loss_ratio = [float(ratio) for ratio in params['risk_ratio'].split(':')]
+
+          results = run_symbols(
+            'new_backtest_symbol',
+            arrays,
+            tasks,
+            workers=workers,
+            trading_budget=params['trading_budget'],
+            leverage=params['leverage'],
+            multiple_trade=params['multiple_trade'],
+            earn_ratio=earn_ratio,
+            loss_ratio=loss_ratio
+          )
+
+          scores.append((combination, self._sum_results(results=results, segments=segments, windows=windows)))
+
+    finally:
+      self._set_indicator_args(original_args=original_args, indicator_params=())
+
+    # Pick the best in-sample combination of each window
+    rows = []
+    for index, window in enumerate(windows):
+
+      combination, summary = max(scores, key=lambda score: score[1][(index, 'in_sample')][self._objective])
+      in_sample = summary[(index, 'in_sample')]
+      out_of_sample = summary[(index, 'out_of_sample')]
+
+      rows.append({
+        'window':               index,
+        'in_sample_start':      window[0],
+        'in_sample_end':        window[1],
+        'out_of_sample_start':  window[2],
+        'out_of_sample_end':    window[3],
+        'params':               combination,
+        'in_sample':            in_sample[self._objective],
+        'out_of_sample':        out_of_sample[self._objective],
+        'open':                 out_of_sample['open'],
+        'win':                  out_of_sample['win'],
+        'loss':                 out_of_sample['loss'],
+      })
+
+    results = pd.DataFrame(data=rows)
+    results = results.set_index(keys=['window'])
+
+    # Print results
+    if print_result:
+      print("=" * 100)
+      print('Walk Forward Result')
+      print("=" * 100)
+      print(f'In sample:      {self._in_sample}')
+      print(f'Out of sample:  {self._out_of_sample}')
+      print(f'Step:           {self._step}')
+      print(f'Objective:      {self._objective}')
+      print(f'Combinations:   {len(combinations)}')
+      print("-" * 100)
+      print(results)
+      print("-" * 100)
+      print('Total out of sample: {}'.format(results['out_of_sample'].sum()))
+
+    return results
+
+  def _set_indicator_args(self, original_args: Dict[str, dict], indicator_params: tuple) -> None:
+    """Sets the indicator arguments of a combination and refreshes the indicators."""
+
+    indicators = self._indicator_client._current_indicators
+
+    for column_name, args in original_args.items():
+      indicators[column_name]['args'] = dict(args)
+
+    for name, value in indicator_params:
+      column_name, _, argument = name.rpartition('.')
+
+      if column_name not in indicators or argument not in indicators[column_name]['args']:
+        raise KeyError("Unknown indicator argument: {name}".format(name=name))
+
+      indicators[column_name]['args'][argument] = value
+
+    self._indicator_client.refresh()
+
+  def _window_tasks(self, windows: List[Tuple[str, str, str, str]], symbol_tasks: List[Tuple[str, int, int]],
+                    times: np.ndarray) -> Tuple[List[Tuple[str, int, int]], List[Tuple[int, str]]]:
+    """Splits the rows of every symbol into the in-sample and out-of-sample segments of each window."""
+
+    times = times.astype(str)
+    tasks = []
+    segments = []
+
+    for index, (in_sample_start, in_sample_end, out_of_sample_start, out_of_sample_end) in enumerate(windows):
+      for symbol, start, stop in symbol_tasks:
+
+        symbol_times = times[start:stop]
+
+        for segment, first, last in [('in_sample', in_sample_start, in_sample_end), ('out_of_sample', out_of_sample_start, out_of_sample_end)]:
+          tasks.append((
+            symbol,
+            start + int(np.searchsorted(symbol_times, first, side='left')),
+            start + int(np.searchsorted(symbol_times, last, side='right')),
+          ))
+          segments.append((index, segment))
+
+    return tasks, segments
+
+  def _sum_results(self, results: List[dict], segments: List[Tuple[int, str]], windows: list) -> Dict[Tuple[int, str], Dict[str, float]]:
+    """Adds the symbol results of each window segment togather."""
+
+    summary = {}
+    for index in range(len(windows)):
+      for segment in ['in_sample', 'out_of_sample']:
+        summary[(index, segment)] = {'open': 0, 'win': 0, 'loss': 0, self._objective: 0}
+
+    for segment, result in zip(segments, results):
+      total = summary[segment]
+      for key in total:
+        total[key] += result['result'][key]
+
+    return summary
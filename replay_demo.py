@@ -0,0 +1,69 @@
+import os
+
+from pyrobot.indicators import Indicators
+from pyrobot.strategies import Strategies
+from pyrobot.robot import Robot
+from pyrobot.paper_broker import PaperBroker
+from pyrobot.replay import ReplaySession
+
+period = '15M'
+instrument_ids = [18]
+replay_path = 'replay_candles.json'
+
+# Store the candles once, later runs replay them offline
+if not os.path.exists(replay_path):
+  recording_robot = Robot(trade=False, twilio_whatsapp=None)
+  ReplaySession.to_json(
+    candles=recording_robot.grab_historical_candles(instrument_ids=instrument_ids, period=period),
+    path=replay_path
+  )
+
+replay = ReplaySession.from_json(path=replay_path, warmup=200)
+
+trading_robot = Robot(
+  trade = False,
+  twilio_whatsapp = None,
+  broker = PaperBroker(multiple_trade=False, allocate_amount=10000, trading_size=1),
+  replay = replay,
+)
+
+historical_candles = trading_robot.grab_historical_candles(instrument_ids=instrument_ids, period=period)
+
+stock_frame = trading_robot.create_stock_frame(data=historical_candles)
+
+indicator_client = Indicators(price_data_frame=stock_frame)
+
+strategies = Strategies(price_data_frame=stock_frame, indicator_client=indicator_client)
+strategies.fractals_alligator()
+
+# The same loop as demo.py, without the sleeps
+while not replay.done:
+
+  # Grab the latest bar.
+  latest_bars = trading_robot.get_latest_bar()
+
+  # Add latest bar to the Stock Frame.
+  stock_frame.add_rows(data=latest_bars)
+
+  # Refresh the Indicators.
+  indicator_client.refresh()
+
+  # Get signals.
+  signals = strategies.get_strategy_signals()
+
+  # Execute Trades.
+  for label, bar_time in signals['close'].index:
+    trading_robot.etoro.close_positions(symbols=[label])
+
+  for action, frame in [('buy', signals['buys']), ('sell', signals['sells'])]:
+    for label, bar_time in frame.index:
+      trading_robot.etoro.open_position(symbol=label.split(" - ")[1].upper(), buy_or_sell=action)
+
+  # Grab the last bar time.
+  last_bar_time = stock_frame.frame.tail(n=1).index.get_level_values(1).values[0]
+
+  # Wait till the next bar.
+  trading_robot.wait_till_next_bar(last_bar_time=last_bar_time)
+
+replay.print_statistics()
+trading_robot.etoro.print_history_records()
@@ -0,0 +1,35 @@
+from pyrobot.bar_aggregator import BarAggregator
+
+
+def test_late_tick_of_a_closed_bar_is_dropped():
+
+  aggregator = BarAggregator(period='1M', close_delay=2.0)
+
+  for price, timestamp in [(1, 60), (3, 70), (1, 80), (2, 90)]:
+    aggregator.add_tick(symbol='18 - gold', price=price, timestamp=timestamp)
+
+  # No tick in the next bar, the stalled bar is closed at the boundary
+  aggregator.close_bars(timestamp=122)
+  closed = aggregator.pop_closed_bars()
+  assert [(bar['open'], bar['high'], bar['low'], bar['close']) for bar in closed] == [(1, 3, 1, 2)]
+
+  # Later than `close_delay`, it must not come out as the same bar again
+  aggregator.add_tick(symbol='18 - gold', price=9, timestamp=100)
+  aggregator.add_tick(symbol='18 - gold', price=5, timestamp=130)
+  aggregator.add_tick(symbol='18 - gold', price=6, timestamp=185)
+
+  closed = aggregator.pop_closed_bars()
+  assert [bar['fromdate'] for bar in closed] == ['1970-01-01t00:02:00z']
+  assert closed[0]['open'] == 5
+
+
+def test_tick_of_the_previous_bar_after_a_new_one_is_dropped():
+
+  aggregator = BarAggregator(period='1M')
+
+  aggregator.add_tick(symbol='18 - gold', price=1, timestamp=60)
+  aggregator.add_tick(symbol='18 - gold', price=2, timestamp=125)
+  aggregator.add_tick(symbol='18 - gold', price=9, timestamp=119)
+
+  assert aggregator.pop_closed_bars()[0]['high'] == 1
+  assert aggregator.forming_bars()[0]['high'] == 2
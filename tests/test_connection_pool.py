@@ -0,0 +1,265 @@
+import gzip
+import json
+import os
+import ssl
+import socket
+import threading
+import time
+import http.client
+import http.server
+
+import pytest
+
+from etoro_api.connection_pool import ConnectionPool
+
+# Self-signed certificate of localhost and 127.0.0.1
+CERTIFICATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'localhost.pem')
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+
+  protocol_version = 'HTTP/1.1'
+
+  def log_message(self, format, *args):
+    pass
+
+  def do_GET(self):
+
+    server = self.server
+    server.requests.append((self.command, self.path))
+    server.connections.add(id(self.connection))
+    server.resumed.append(self.connection.session_reused)
+
+    if self.path == '/json':
+      self._send(200, json.dumps({'ok': True}).encode())
+
+    elif self.path == '/gzip':
+      body = json.dumps({'compressed': 'x' * 1000}).encode()
+      if 'gzip' in self.headers.get('Accept-Encoding', ''):
+        self._send(200, gzip.compress(body), headers={'Content-Encoding': 'gzip'})
+      else:
+        self._send(200, body)
+
+    elif self.path == '/close':
+      self._send(200, b'{}', headers={'Connection': 'close'})
+
+    elif self.path == '/drop':
+      # Answer as keep-alive, then close the connection like an idle timeout would
+      self._send(200, b'{}')
+      self.close_connection = True
+
+    elif self.path == '/flaky':
+      server.flaky -= 1
+      if server.flaky >= 0:
+        self._send(503, b'')
+      else:
+        self._send(200, b'{"ok": true}')
+
+    elif self.path == '/slow':
+      time.sleep(0.5)
+      self._send(200, b'{}')
+
+    else:
+      self._send(404, b'')
+
+  do_POST = do_GET
+
+  def _send(self, status, body, headers=None):
+
+    if self.headers.get('Content-Length'):
+      self.rfile.read(int(self.headers['Content-Length']))
+
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    for name, value in (headers or {}).items():
+      self.send_header(name, value)
+    self.end_headers()
+    self.wfile.write(body)
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+
+  daemon_threads = True
+
+  def __init__(self):
+
+    super().__init__(('127.0.0.1', 0), StubHandler)
+
+    self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    self.context.load_cert_chain(CERTIFICATE)
+    self.socket = self.context.wrap_socket(self.socket, server_side=True)
+
+    self.requests = []
+    self.connections = set()
+    self.resumed = []
+    self.flaky = 0
+
+  @property
+  def port(self):
+    return self.server_address[1]
+
+
+@pytest.fixture
+def server():
+
+  server = StubServer()
+  thread = threading.Thread(target=server.serve_forever, daemon=True)
+  thread.start()
+
+  yield server
+
+  server.shutdown()
+  server.server_close()
+
+
+def make_pool(server, **kwargs):
+
+  context = ssl.create_default_context(cafile=CERTIFICATE)
+  kwargs.setdefault('backoff_factor', 0.001)
+
+  return ConnectionPool(host='localhost', port=server.port, context=context, **kwargs)
+
+
+def test_reuses_the_connection(server):
+
+  pool = make_pool(server)
+
+  for _ in range(5):
+    response = pool.request('GET', '/json')
+    assert response.status == 200
+    assert response.data == {'ok': True}
+
+  assert len(server.connections) == 1
+  assert pool.statistics['connections'] == 1
+  assert pool.statistics['reused'] == 4
+
+  pool.close()
+
+
+def test_resumes_the_tls_session(server):
+
+  pool = make_pool(server)
+
+  # Every response closes the connection, so every request opens a new one
+  for _ in range(3):
+    assert pool.request('GET', '/close').status == 200
+
+  assert pool.statistics['connections'] == 3
+  assert server.resumed == [False, True, True]
+
+  pool.close()
+
+
+def test_decompresses_gzip(server):
+
+  pool = make_pool(server)
+
+  response = pool.request('GET', '/gzip')
+
+  assert response.headers['Content-Encoding'] == 'gzip'
+  assert response.data == {'compressed': 'x' * 1000}
+
+  pool.close()
+
+
+def test_retries_retry_statuses(server):
+
+  server.flaky = 2
+  pool = make_pool(server, retries=3)
+
+  response = pool.request('GET', '/flaky')
+
+  assert response.status == 200
+  assert pool.statistics['retries'] == 2
+  assert len(server.requests) == 3
+
+  pool.close()
+
+
+def test_returns_the_last_retry_status(server):
+
+  server.flaky = 10
+  pool = make_pool(server, retries=2)
+
+  assert pool.request('GET', '/flaky').status == 503
+  assert len(server.requests) == 3
+
+  pool.close()
+
+
+def test_does_not_retry_post(server):
+
+  server.flaky = 1
+  pool = make_pool(server, retries=3)
+
+  assert pool.request('POST', '/flaky', body=b'{}').status == 503
+  assert len(server.requests) == 1
+
+  pool.close()
+
+
+def test_sends_get_again_when_an_idle_connection_was_closed(server):
+
+  pool = make_pool(server)
+
+  pool.request('GET', '/drop')
+  time.sleep(0.05)
+
+  assert pool.request('GET', '/json').data == {'ok': True}
+  assert pool.statistics['connections'] == 2
+  assert [path for _, path in server.requests] == ['/drop', '/json']
+
+  pool.close()
+
+
+def test_does_not_send_post_again_on_a_closed_connection(server):
+
+  pool = make_pool(server)
+
+  pool.request('GET', '/drop')
+  time.sleep(0.05)
+
+  # The server may have processed it, sending it again could open a second position
+  with pytest.raises((OSError, http.client.HTTPException)):
+    pool.request('POST', '/json', body=b'{}')
+
+  assert [path for _, path in server.requests] == ['/drop']
+
+  pool.close()
+
+
+def test_read_timeout(server):
+
+  pool = make_pool(server, timeout=0.1, retries=1)
+
+  started = time.monotonic()
+  with pytest.raises(socket.timeout):
+    pool.request('GET', '/slow')
+
+  # One retry, each attempt gives up after `timeout`
+  assert time.monotonic() - started < 0.5
+  assert pool.statistics['retries'] == 1
+  assert len(server.requests) == 2
+
+  pool.close()
+
+
+def test_connect_timeout():
+
+  # A listening socket with a full backlog and nobody accepting
+  listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  listener.bind(('127.0.0.1', 0))
+  listener.listen(0)
+
+  context = ssl.create_default_context(cafile=CERTIFICATE)
+  pool = ConnectionPool(host='localhost', port=listener.getsockname()[1], context=context, timeout=0.1,
+                        retries=0, backoff_factor=0.001)
+
+  started = time.monotonic()
+  with pytest.raises(OSError):
+    pool.request('GET', '/json')
+
+  assert time.monotonic() - started < 2.0
+
+  listener.close()
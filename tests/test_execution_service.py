@@ -0,0 +1,94 @@
+import threading
+import time
+
+from pyrobot.broker import Broker
+from pyrobot.execution_service import ExecutionService
+
+
+class FakeBroker(Broker):
+
+  """
+  Broker recording when every call starts and ends, the close of a symbol
+  in `slow` takes `delay` seconds.
+  """
+
+  def __init__(self, thread_safe: bool = True, slow: tuple = (), delay: float = 0.5) -> None:
+    self.thread_safe = thread_safe
+    self.slow = slow
+    self.delay = delay
+    self.calls = []
+    self.lock = threading.Lock()
+
+  def _record(self, action: str, symbol: str, delay: float = 0.0) -> None:
+    started = time.monotonic()
+    time.sleep(delay)
+    with self.lock:
+      self.calls.append((action, symbol, started, time.monotonic()))
+
+  def open_position(self, symbol: str, buy_or_sell: str, **kwargs) -> None:
+    self._record(buy_or_sell, symbol)
+
+  def close_positions(self, symbols: list) -> None:
+    self._record('close', symbols[0].split(' - ')[1].upper(), self.delay if symbols[0] in self.slow else 0.0)
+
+  def print_history_records(self) -> None:
+    pass
+
+
+def test_orders_of_a_symbol_wait_for_its_timed_out_call():
+
+  broker = FakeBroker(slow=('18 - gold',))
+  service = ExecutionService(broker=broker, lanes=1, call_timeout=0.1).start()
+
+  service.submit(symbol='18 - gold', action='close', bar_time='t1')
+  service.submit(symbol='18 - gold', action='buy', bar_time='t1')
+  service.submit(symbol='17 - oil', action='buy', bar_time='t1')
+
+  assert service.wait(timeout=5)
+
+  # The other symbol went on, the buy of gold only after its close
+  assert [(action, symbol) for action, symbol, _, _ in broker.calls] == [('buy', 'OIL'), ('close', 'GOLD'), ('buy', 'GOLD')]
+  close, buy = broker.calls[1], broker.calls[2]
+  assert buy[2] >= close[3]
+
+  # The close executed, late
+  statistics = service.statistics()
+  assert statistics['executed'] == 3
+  assert statistics['timeout'] == 1
+  assert statistics['error'] == 0
+
+  service.stop(timeout=5)
+
+
+def test_broker_not_thread_safe_holds_every_symbol():
+
+  broker = FakeBroker(thread_safe=False, slow=('18 - gold',))
+  service = ExecutionService(broker=broker, lanes=2, call_timeout=0.1).start()
+
+  service.submit(symbol='18 - gold', action='close', bar_time='t1')
+  time.sleep(0.2)
+  for symbol in ['17 - oil', '1 - eurusd', '2 - gbpusd']:
+    service.submit(symbol=symbol, action='buy', bar_time='t1')
+
+  assert service.wait(timeout=5)
+
+  # Only the hung call timed out, the others waited for the broker instead of timing out on its lock
+  statistics = service.statistics()
+  assert statistics['executed'] == 4
+  assert statistics['timeout'] == 1
+  assert broker.calls[0][:2] == ('close', 'GOLD')
+
+  service.stop(timeout=5)
+
+
+def test_stop_runs_the_held_orders():
+
+  broker = FakeBroker(slow=('18 - gold',), delay=0.3)
+  service = ExecutionService(broker=broker, lanes=1, call_timeout=0.05).start()
+
+  service.submit(symbol='18 - gold', action='close', bar_time='t1')
+  service.submit(symbol='18 - gold', action='sell', bar_time='t1')
+
+  service.stop(timeout=5)
+
+  assert [action for action, _, _, _ in broker.calls] == ['close', 'sell']
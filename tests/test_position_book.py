@@ -0,0 +1,200 @@
+import threading
+import time
+
+from pyrobot.position_book import PositionBook
+
+
+class FakeBroker():
+
+  """
+  Broker backend keeping its positions in a list, like the eToro portfolio.
+
+  Orders are confirmed into the book like `EtoroPrototype` does, and the
+  broker can close positions on its own (stop loss, take profit).
+  """
+
+  def __init__(self) -> None:
+    self.positions = []
+    self.fetches = 0
+    self.book = PositionBook(fetch_positions=self.fetch_positions, interval=0.01)
+
+  def fetch_positions(self):
+    self.fetches += 1
+    return list(self.positions)
+
+  def open_position(self, symbol: str) -> None:
+    self.positions.append(symbol.upper())
+    self.book.add(symbol)
+
+  def close_positions(self, symbol: str) -> None:
+    self.positions = [position for position in self.positions if position.lower() != symbol.lower()]
+    self.book.remove(symbol)
+
+  def stop_loss(self, symbol: str) -> None:
+    self.positions.remove(symbol.upper())
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+
+  deadline = time.monotonic() + timeout
+
+  while time.monotonic() < deadline:
+    if condition():
+      return True
+    time.sleep(0.005)
+
+  return condition()
+
+
+def test_order_confirmations_update_the_book():
+
+  broker = FakeBroker()
+
+  broker.open_position('GOLD')
+  broker.open_position('gold')
+  broker.open_position('OIL')
+
+  assert len(broker.book) == 3
+  assert 'gold' in broker.book
+  assert 'GOLD' in broker.book
+  assert sorted(broker.book.symbols) == ['gold', 'gold', 'oil']
+
+  broker.close_positions('GOLD')
+
+  assert len(broker.book) == 1
+  assert 'gold' not in broker.book
+  assert 'oil' in broker.book
+
+  # Closing a symbol without positions changes nothing
+  broker.close_positions('SILVER')
+  assert len(broker.book) == 1
+
+  # No fetch is needed for the checks
+  assert broker.fetches == 0
+
+
+def test_reconcile_picks_up_positions_closed_by_the_broker():
+
+  broker = FakeBroker()
+  broker.open_position('GOLD')
+  broker.open_position('OIL')
+
+  broker.stop_loss('GOLD')
+  assert 'gold' in broker.book
+
+  broker.book.reconcile()
+
+  assert 'gold' not in broker.book
+  assert len(broker.book) == 1
+  assert broker.book.last_reconciled is not None
+
+
+def test_background_reconcile():
+
+  broker = FakeBroker()
+  broker.positions = ['GOLD', 'GOLD', 'OIL']
+
+  broker.book.start()
+
+  try:
+    # The first reconcile runs before `start` returns
+    assert len(broker.book) == 3
+    assert sorted(broker.book.symbols) == ['gold', 'gold', 'oil']
+
+    broker.stop_loss('OIL')
+    assert wait_for(lambda: 'oil' not in broker.book)
+    assert len(broker.book) == 2
+
+    fetches = broker.fetches
+    assert wait_for(lambda: broker.fetches > fetches)
+
+  finally:
+    broker.book.stop()
+
+  fetches = broker.fetches
+  time.sleep(0.05)
+  assert broker.fetches == fetches
+
+
+def test_reconcile_keeps_orders_confirmed_while_fetching():
+
+  fetching = threading.Event()
+  release = threading.Event()
+
+  def slow_fetch():
+    fetching.set()
+    release.wait(2.0)
+    return []
+
+  book = PositionBook(fetch_positions=slow_fetch, interval=None)
+
+  thread = threading.Thread(target=book.reconcile)
+  thread.start()
+  assert fetching.wait(2.0)
+
+  # Confirmed after the broker answered, not in its list yet
+  book.add('GOLD')
+  release.set()
+  thread.join()
+
+  assert 'gold' in book
+  assert len(book) == 1
+
+
+def test_reconcile_errors_do_not_stop_the_thread():
+
+  calls = []
+
+  def flaky_fetch():
+    calls.append(time.monotonic())
+    if len(calls) == 2:
+      raise ConnectionError('portfolio unavailable')
+    return ['GOLD']
+
+  book = PositionBook(fetch_positions=flaky_fetch, interval=0.01).start()
+
+  try:
+    assert wait_for(lambda: len(calls) >= 4)
+    assert 'gold' in book
+  finally:
+    book.stop()
+
+
+def test_size_and_repeated_symbol_checks_are_constant_time():
+
+  book = PositionBook()
+
+  for index in range(10000):
+    book.add('SYMBOL{}'.format(index % 100))
+
+  # `len` reads a counter and `in` a dictionary, without building the symbol list
+  original_elements = book._positions.elements
+  book._positions.elements = None
+
+  try:
+    assert len(book) == 10000
+    assert 'symbol42' in book
+    assert 'missing' not in book
+  finally:
+    book._positions.elements = original_elements
+
+  started = time.perf_counter()
+  for _ in range(10000):
+    len(book)
+    'symbol42' in book
+  elapsed = time.perf_counter() - started
+
+  assert elapsed < 0.5
+
+
+def test_checks_without_a_broker():
+
+  book = PositionBook().start()
+
+  book.add('GOLD')
+  book.reconcile()
+
+  assert 'gold' in book
+  assert book.last_reconciled is None
+
+  book.stop()
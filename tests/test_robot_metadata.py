@@ -0,0 +1,73 @@
+import json
+import time
+
+import pyrobot.robot
+
+from etoro_api.response_cache import ResponseCache
+from pyrobot.robot import Robot
+
+
+class FakeResponse():
+
+  def __init__(self, status_code: int, text: str = '', headers: dict = None) -> None:
+    self.status_code = status_code
+    self.text = text
+    self.headers = headers or {}
+
+
+class FakeMetadataAPI():
+
+  """
+  The instruments metadata endpoint, answering 304 to a matching `If-None-Match`.
+  """
+
+  def __init__(self) -> None:
+    self.requests = []
+
+  def get(self, url, headers=None):
+
+    self.requests.append(dict(headers or {}))
+
+    if (headers or {}).get('If-None-Match') == '"v1"':
+      return FakeResponse(304)
+
+    body = {'InstrumentDisplayDatas': [{'InstrumentID': 18, 'SymbolFull': 'GOLD', 'Images': []}]}
+    return FakeResponse(200, text=json.dumps(body), headers={'ETag': '"v1"'})
+
+
+def make_robot(path):
+  return Robot(trade=False, twilio_whatsapp=None, response_cache=ResponseCache(path=path))
+
+
+def test_warm_start_reads_the_metadata_from_disk(tmp_path, monkeypatch):
+
+  api = FakeMetadataAPI()
+  monkeypatch.setattr(pyrobot.robot.requests, 'get', api.get)
+
+  cold = make_robot(str(tmp_path))
+  assert cold.instruments_metadata == [{'instrumentid': 18, 'symbolfull': 'gold'}]
+  assert len(api.requests) == 1
+
+  # A new process, only the disk store is shared
+  warm = make_robot(str(tmp_path))
+  assert warm.instruments_metadata == cold.instruments_metadata
+  assert len(api.requests) == 1
+  assert warm.response_cache.hits == 1
+
+
+def test_expired_metadata_is_revalidated(tmp_path, monkeypatch):
+
+  api = FakeMetadataAPI()
+  monkeypatch.setattr(pyrobot.robot.requests, 'get', api.get)
+
+  make_robot(str(tmp_path))
+
+  # Two days later, past the one day to live
+  later = time.time() + 2 * 24 * 3600
+  monkeypatch.setattr('etoro_api.response_cache.time.time', lambda: later)
+
+  robot = make_robot(str(tmp_path))
+
+  assert api.requests[-1] == {'If-None-Match': '"v1"'}
+  assert robot.response_cache.revalidated == 1
+  assert robot.instruments_metadata == [{'instrumentid': 18, 'symbolfull': 'gold'}]
@@ -0,0 +1,59 @@
+import os
+import numpy as np
+
+from pyrobot.indicators import Indicators
+from pyrobot.strategies import Strategies
+from pyrobot.stock_frame import StockFrame
+from pyrobot.bar_aggregator import BarAggregator
+from pyrobot.bar_aggregator import read_tick_file
+
+period = '1M'
+tick_path = 'ticks.csv'
+warmup = 200
+
+# A minute of ticks every 10 milliseconds
+speed = 6000
+
+# A file stand-in for the tick feed of demo.py, a random walk of one tick every 5 seconds
+if not os.path.exists(tick_path):
+  timestamps = 1624492800 + np.arange(0, 12 * 3600, 5)
+  prices = 1780 + np.cumsum(np.random.default_rng(18).normal(scale=0.05, size=len(timestamps)))
+  with open(tick_path, 'w') as tick_file:
+    for timestamp, price in zip(timestamps, prices):
+      tick_file.write('18 - gold,{timestamp},{price:.2f},1\n'.format(timestamp=timestamp, price=price))
+
+bar_aggregator = BarAggregator(period=period)
+feed = bar_aggregator.consume(ticks=read_tick_file(path=tick_path, speed=speed))
+
+# Warm the indicators up on the first bars
+historical_bars = []
+while len(historical_bars) < warmup and (feed.is_alive() or bar_aggregator.wait(timeout=0)):
+  bar_aggregator.wait(timeout=1.0)
+  historical_bars.extend(bar_aggregator.pop_closed_bars())
+
+stock_frame = StockFrame(data=historical_bars, period=period)
+
+indicator_client = Indicators(price_data_frame=stock_frame)
+
+strategies = Strategies(price_data_frame=stock_frame, indicator_client=indicator_client)
+strategies.fractals_alligator()
+
+# The loop of demo.py on the bars built from the ticks, until the file is read
+while feed.is_alive() or bar_aggregator.wait(timeout=0):
+
+  if not bar_aggregator.wait(timeout=1.0):
+    continue
+
+  # Add the closed bars to the Stock Frame.
+  stock_frame.add_rows(data=bar_aggregator.pop_closed_bars())
+
+  # Refresh the Indicators.
+  indicator_client.refresh()
+
+  # Get signals.
+  signals = strategies.get_strategy_signals()
+
+  # Time from the last tick to the signals
+  bar_aggregator.record_signal_latency()
+
+print(bar_aggregator.statistics())